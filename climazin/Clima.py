@@ -1,21 +1,22 @@
 from shiny import App, ui, render, reactive
-import pandas as pd
-from cidades import cidades
-from ClimaAPI import (
-    buscar_dados_clima,
-    grafico_temperatura,
-    gerar_mapa_temperatura,
-    grafico_chuva,
-    mapa_vento
-)
-import matplotlib.pyplot as plt
-
-anos = list(range(2000, 2025))
+from cidades import cidades, anos
+import base64
+import ClimaAPI
+from trabalhadores import executar, submeter, iniciar_pool
+from reativo import debounce, TarefaRecente
+from shiny.types import SilentException
+from artefatos import rotas as rotas_artefatos, url_mapa
+from api_dados import rotas as rotas_api
+from starlette.applications import Starlette
+from starlette.routing import Mount
+import threading
+import multiprocessing
+from geocodificacao import indice_geocodificacao
 
 app_ui = ui.page_sidebar(
     ui.sidebar(
         ui.input_select("tipo_dado", "Tipo de dado:", choices=["Temperatura", "Precipitação", "Vento"]),
-        ui.input_select("tipo_vis", "Tipo de visualização:", choices=["Gráfico", "Mapa"]),
+        ui.input_select("tipo_vis", "Tipo de visualização:", choices=["Gráfico", "Mapa", "Capitais", "Tendência"]),
         ui.input_select('cidade', 'Escolha a cidade:', choices=cidades),
         ui.input_slider('ano', 'Escolha o ano:', min=min(anos), max=max(anos), value=min(anos), step=1),
         style='background-color: white; height: 100vh;'
@@ -60,19 +61,25 @@ app_ui = ui.page_sidebar(
             )
         ),
         ui.div( 
-            ui.panel_conditional("input.tipo_dado == 'Temperatura' && input.tipo_vis == 'Gráfico'", ui.output_plot('graficoTemp'),
+            ui.panel_conditional("input.tipo_dado == 'Temperatura' && input.tipo_vis == 'Gráfico'", ui.output_ui('graficoTemp'),
             style=(
                 'background: linear-gradient(to bottom, #004578, #006099); '
                 'padding: 15px; border-radius: 30px; width: 920px; '
                 'box-shadow: 0 6px 25px rgba(0, 0, 0, 0.3); margin-top: 50px;'
             )),
-            ui.panel_conditional("input.tipo_dado == 'Temperatura' && input.tipo_vis == 'Mapa'", ui.output_plot('mapaTop'), height='700px', width='100%'),
+            ui.panel_conditional("input.tipo_dado == 'Temperatura' && input.tipo_vis == 'Mapa'", ui.output_ui('mapaTop'), height='700px', width='100%'),
 
-            ui.panel_conditional("input.tipo_dado == 'Precipitação' && input.tipo_vis == 'Gráfico'", ui.output_plot('graficoChuva')),
+            ui.panel_conditional("input.tipo_dado == 'Precipitação' && input.tipo_vis == 'Gráfico'", ui.output_ui('graficoChuva')),
             ui.panel_conditional("input.tipo_dado == 'Precipitação' && input.tipo_vis == 'Mapa'", ui.output_ui("avisoMapa")),
 
-            ui.panel_conditional("input.tipo_dado == 'Vento' && input.tipo_vis == 'Mapa'", ui.output_plot('ventoMapa')),
-            ui.panel_conditional("input.tipo_dado == 'Vento' && input.tipo_vis == 'Gráfico'", ui.output_ui("avisoGrafico")),
+            ui.panel_conditional("input.tipo_dado == 'Vento' && input.tipo_vis == 'Mapa'", ui.output_ui('ventoMapa')),
+            ui.panel_conditional("input.tipo_dado == 'Vento' && input.tipo_vis != 'Mapa'", ui.output_ui("avisoGrafico")),
+
+            # visões de todas as capitais / todos os anos, só com o que já está em cache
+            ui.panel_conditional("input.tipo_dado == 'Temperatura' && input.tipo_vis == 'Capitais'", ui.output_ui('capitaisTemp')),
+            ui.panel_conditional("input.tipo_dado == 'Precipitação' && input.tipo_vis == 'Capitais'", ui.output_ui('capitaisChuva')),
+            ui.panel_conditional("input.tipo_dado == 'Temperatura' && input.tipo_vis == 'Tendência'", ui.output_ui('tendenciaTemp')),
+            ui.panel_conditional("input.tipo_dado == 'Precipitação' && input.tipo_vis == 'Tendência'", ui.output_ui('tendenciaChuva')),
 
             style='background: linear-gradient(to bottom, #004578, #7ba8c9); padding: 10px; border-radius: 10px; width: 920px;; box-shadow: 0 4px 20px rgba(0, 0, 0 , 0.3); margin-top: 50px;'
         ),
@@ -101,46 +108,84 @@ def server(input, output, session):
             "style": "padding: 20px; background-color: #ffdddd; color: #a33; border-radius: 10px; border: 1px solid #a33;"
         }, "Gráfico desse modo não está disponível.")
 
-    @reactive.Calc
-    def dados_filtrados():
-        return buscar_dados_clima(input.cidade(), input.ano())
-
-    @output
-    @render.plot
-    def graficoTemp():
-        df = dados_filtrados()
-        return grafico_temperatura(df, input.cidade(), input.ano())
-
+    # arrastar o slider passa por vários anos; as saídas só reagem ao ano em que ele parou
+    @debounce(0.5)
+    def ano():
+        return input.ano()
+
+    # os gráficos são desenhados no pool de processos dentro de uma extended_task: o render
+    # só lê o resultado, então a espera não segura o flush reativo (nem as outras sessões)
+    def saida_png(saida, nome, argumentos):
+        @TarefaRecente # só o pedido mais recente interessa
+        async def tarefa(*args):
+            return await executar(ClimaAPI.chamar, nome, *args)
+
+        ultimo = [None]
+
+        @reactive.effect
+        def _disparar():
+            if session.clientdata.output_hidden(saida) is not False:
+                # saída escondida: o pedido em andamento (ou na fila do pool) é abandonado
+                tarefa.cancel()
+                ultimo[0] = None
+                return
+            args = argumentos()
+            with reactive.isolate():
+                if args == ultimo[0] and tarefa.status() in ("running", "success"):
+                    return
+            ultimo[0] = args
+            tarefa.invoke(*args)
+
+        @output(id=saida)
+        @render.ui
+        def _render():
+            try:
+                png = tarefa.result()
+            except SilentException:
+                raise
+            except Exception as e:
+                print(f"Erro ao gerar o gráfico: {e}")
+                return ui.div("Não foi possível gerar o gráfico.")
+            src = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+            return ui.img(src=src, style="width: 100%;")
+
+    saida_png("graficoTemp", "grafico_png", lambda: ("temperatura", input.cidade(), ano()))
+    saida_png("graficoChuva", "grafico_png", lambda: ("chuva", input.cidade(), ano()))
+
+    # panorama: todas as capitais no ano escolhido; tendência: todos os anos da cidade
+    saida_png("capitaisTemp", "panorama_png", lambda: ("temperatura", ano()))
+    saida_png("capitaisChuva", "panorama_png", lambda: ("chuva", ano()))
+    saida_png("tendenciaTemp", "tendencia_png", lambda: ("temperatura", input.cidade()))
+    saida_png("tendenciaChuva", "tendencia_png", lambda: ("chuva", input.cidade()))
+
+    # os mapas são PNGs em cache servidos direto por artefatos.rota_mapa (com ETag);
+    # a sessão só monta a tag <img>, sem passar pelo matplotlib
     @output
-    @render.plot
-    def graficoChuva():
-        df = dados_filtrados()
-        return grafico_chuva(df, input.cidade(), input.ano())
-
-    @output
-    @render.plot
+    @render.ui
     def ventoMapa():
-        cidade = input.cidade()
-        ano = input.ano()
-        fig = mapa_vento(cidade, ano)
-        return fig
+        return ui.img(src=url_mapa("vento", input.cidade(), ano()), style="width: 100%;")
 
     @output
-    @render.plot
+    @render.ui
     def mapaTop():
-        cidade = input.cidade()
-        ano = input.ano()
-        try:
-            fig = gerar_mapa_temperatura(cidade, ano)
-            if fig is None:
-                raise ValueError("Figura não foi gerada")
-            return fig
-        except Exception as e:
-            print(f"Erro ao gerar o mapa: {e}")
-            return fig
+        return ui.img(src=url_mapa("temperatura", input.cidade(), ano()), style="width: 100%;")
+
+def aquecer():
+    # preenche o índice de coordenadas para que nenhum mapa precise geocodificar,
+    # depois rasteriza os mapas base (costa, fronteiras, rios...) de cada capital;
+    # a rasterização vai para o pool, o processo do app não carrega o cartopy
+    indice_geocodificacao.semear()
+    submeter(ClimaAPI.chamar, "aquecer_mapas_base", cidades)
+
+# os processos do pool (spawn) reimportam este módulo; só o processo principal aquece
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=aquecer, daemon=True).start()
+    if ClimaAPI.PRECARREGAR:
+        iniciar_pool()  # os processos sobem já importando os subsistemas (trabalhadores.obter_pool)
 
 from pathlib import Path
-app = App(app_ui, server, static_assets=Path(__file__).parent / "www")
+app_shiny = App(app_ui, server, static_assets=Path(__file__).parent / "www")
+app = Starlette(routes=[*rotas_artefatos, Mount("/api", routes=rotas_api), Mount("/", app=app_shiny)])
 
 if __name__ == "__main__":
     import shiny
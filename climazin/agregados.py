@@ -0,0 +1,95 @@
+import os
+import numpy as np # dados
+import pandas as pd # dados
+from armazenamento import DIRETORIO_DADOS, tabela_existe, ler_tabela, salvar_tabela
+
+MESES = range(1, 13)
+
+
+def arquivo_agregado_mensal(cidade, ano):
+    """a tabela mensal fica ao lado dos dados diários: dados/<Cidade>/<ano>/mensal_<Cidade>_<ano>"""
+    pasta = os.path.join(DIRETORIO_DADOS, cidade.replace(" ", "_"), str(ano))
+    return os.path.join(pasta, f"mensal_{cidade.replace(' ', '_')}_{ano}")
+
+
+def calcular_agregado_mensal(df):
+    """Reduz a série diária a 12 linhas: temperatura média/mínima/máxima e chuva total por mês"""
+    grupos = df.groupby(df['date'].dt.month)
+    tabela = pd.DataFrame({
+        "mes": list(MESES),
+        "temp_media": grupos['temp'].mean().reindex(MESES).values,
+        "temp_min": grupos['temp_min'].min().reindex(MESES).values,
+        "temp_max": grupos['temp_max'].max().reindex(MESES).values,
+    })
+    if 'precipitacao' in df.columns:
+        tabela["precipitacao"] = grupos['precipitacao'].sum().reindex(MESES).values
+    return tabela
+
+
+def salvar_agregado_mensal(df, cidade, ano):
+    tabela = calcular_agregado_mensal(df)
+    salvar_tabela(tabela, arquivo_agregado_mensal(cidade, ano))
+    return tabela
+
+
+def ler_agregado_mensal(cidade, ano):
+    """devolve a tabela mensal já materializada, ou None se ainda não existir"""
+    arquivo = arquivo_agregado_mensal(cidade, ano)
+    if not tabela_existe(arquivo):
+        return None
+    return ler_tabela(arquivo)
+
+
+# setores de direção do vento: 6 fatias de 60°, cada uma só entra no mapa com mais de 300 horas
+GRAUS_SETOR = 60
+NUM_SETORES = 360 // GRAUS_SETOR
+MIN_HORAS_SETOR = 300
+
+
+def somar_setores(velocidade, direcao):
+    """Uma passada vetorizada: soma de u, soma de v e horas por setor (arrays de NUM_SETORES).
+
+    Somas (e não médias) para que dias novos possam ser acrescentados sem reler
+    a série horária. Horas sem velocidade ou direção ficam de fora.
+    """
+    velocidade = np.asarray(velocidade, dtype=np.float32)
+    direcao = np.asarray(direcao, dtype=np.float32)
+    validas = ~(np.isnan(velocidade) | np.isnan(direcao))
+    velocidade, direcao = velocidade[validas], direcao[validas]
+
+    setor = (np.mod(direcao, 360) // GRAUS_SETOR).astype(np.intp)  # 360° é o mesmo setor de 0°
+    angulo = np.deg2rad(direcao)
+    soma_u = np.bincount(setor, weights=-velocidade * np.sin(angulo), minlength=NUM_SETORES)
+    soma_v = np.bincount(setor, weights=-velocidade * np.cos(angulo), minlength=NUM_SETORES)
+    horas = np.bincount(setor, minlength=NUM_SETORES)
+    return pd.DataFrame({
+        "setor": np.arange(NUM_SETORES) * GRAUS_SETOR,
+        "soma_u": soma_u,
+        "soma_v": soma_v,
+        "horas": horas.astype(np.int32),
+    })
+
+
+def juntar_setores(*tabelas):
+    """soma tabelas de setores do mesmo ponto (ex. o cache e os dias que acabaram de chegar)"""
+    tabelas = [t for t in tabelas if t is not None]
+    total = tabelas[0][["soma_u", "soma_v", "horas"]].to_numpy(dtype=np.float64).copy()
+    for tabela in tabelas[1:]:
+        total += tabela[["soma_u", "soma_v", "horas"]].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        "setor": np.arange(NUM_SETORES) * GRAUS_SETOR,
+        "soma_u": total[:, 0],
+        "soma_v": total[:, 1],
+        "horas": total[:, 2].astype(np.int32),
+    })
+
+
+def medias_setores(tabela, lat, lon):
+    """u/v médios dos setores com horas suficientes, no formato usado pelo mapa de vento"""
+    tabela = tabela[tabela["horas"] > MIN_HORAS_SETOR]
+    return pd.DataFrame({
+        "u": (tabela["soma_u"] / tabela["horas"]).to_numpy(dtype=float),
+        "v": (tabela["soma_v"] / tabela["horas"]).to_numpy(dtype=float),
+        "lat": float(lat),
+        "lon": float(lon),
+    })
@@ -0,0 +1,165 @@
+# API HTTP só de leitura montada em /api ao lado do app, para scripts e outros serviços
+# pegarem os dados sem abrir uma sessão do Shiny nem desenhar figura:
+#   /api/serie/<cidade>/<ano>             série diária (date, temp_max, temp_min, precipitacao, temp)
+#   /api/mensal/<cidade>/<ano>            agregado mensal (12 linhas)
+#   /api/grade/<tipo>/<cidade>/<ano>      grade interpolada do mapa (temperatura ou vento u/v)
+#   /api/resumo?cidades=A,B&anos=2000-2020  resumo anual do que já está em cache (conjunto.py)
+#   /api/mapas/<tipo>/<cidade>/<ano>.png  o PNG do mapa, como em /mapas
+# só as capitais de cidades.py e os anos do app; o resto é 404 (nada é buscado nem gravado)
+# ?formato=json (padrão) ou ?formato=npz (arrays tipados, para np.load). As respostas têm
+# ETag (hash do conteúdo) e Cache-Control, para um proxy ou CDN responder as repetidas.
+import io
+import json
+import asyncio
+import numpy as np # dados
+from starlette.responses import Response, PlainTextResponse
+from starlette.routing import Route
+from artefatos import resposta_bytes, rota_mapa, no_catalogo, fora_do_catalogo, _executar_enquanto_conectado
+from cidades import cidades as CAPITAIS, anos as ANOS
+from trabalhadores import executar
+from cobertura import ano_fechado
+import ClimaAPI
+
+FORMATOS = {
+    "json": "application/json",
+    "npz": "application/octet-stream",
+}
+COLUNAS_SERIE = ["date", "temp_max", "temp_min", "precipitacao", "temp"]
+CASAS_DECIMAIS = 2 # as variáveis da API de arquivo vêm com uma casa; float32 sem arredondar vira 32.599998
+
+
+def _para_json(array):
+    """lista JSON do array: datas em ISO, floats arredondados e NaN como null"""
+    array = np.asarray(array)
+    if np.issubdtype(array.dtype, np.datetime64):
+        return np.datetime_as_string(array, unit="D").tolist()
+    if np.issubdtype(array.dtype, np.floating):
+        valores = np.round(array.astype(np.float64), CASAS_DECIMAIS)
+        return np.where(np.isnan(valores), None, valores).tolist()
+    return array.tolist()
+
+
+def codificar(campos, formato, **info):
+    """bytes da resposta: `campos` são arrays ({nome: array}) e `info` são metadados simples"""
+    if formato == "npz":
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **campos, _info=np.array(json.dumps(info, ensure_ascii=False)))
+        return buffer.getvalue()
+    corpo = {**info, **{nome: _para_json(valores) for nome, valores in campos.items()}}
+    return json.dumps(corpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# as funções abaixo rodam no pool de processos (busca, interpolação) e devolvem os bytes
+# prontos, ou None quando não há dados; os subsistemas do ClimaAPI só carregam lá
+
+def serie_diaria(cidade, ano, formato):
+    df = ClimaAPI.buscar_dados_clima(cidade, ano)
+    colunas = [c for c in COLUNAS_SERIE if c in df.columns]
+    return codificar({c: df[c].to_numpy() for c in colunas}, formato, cidade=cidade, ano=ano)
+
+
+def agregado_mensal(cidade, ano, formato):
+    mensal = ClimaAPI.obter_agregado_mensal(cidade, ano)
+    return codificar({c: mensal[c].to_numpy() for c in mensal.columns}, formato, cidade=cidade, ano=ano)
+
+
+def grade(tipo, cidade, ano, formato):
+    """eixos lon/lat (1D) e os campos 2D [lat, lon] da grade regular usada no mapa"""
+    if tipo == "temperatura":
+        resultado = ClimaAPI.calcular_grade_temperatura(cidade, ano)
+        if resultado is None:
+            return None
+        lon_grid, lat_grid, temp_grid, centro = resultado
+        campos = {"temp": temp_grid}
+    else:
+        df_grade = ClimaAPI.coletar_grade_vento(cidade, ano).copy()  # o resultado pode estar compartilhado
+        if df_grade.empty:
+            return None
+        _, lon_grid, lat_grid, u_grid, v_grid = ClimaAPI.calcular_grade_vento(df_grade)
+        centro = ClimaAPI.obter_coordenadas(cidade)
+        campos = {"u": u_grid, "v": v_grid}
+    return codificar({"lon": lon_grid[0, :], "lat": lat_grid[:, 0], **campos}, formato,
+                     cidade=cidade, ano=ano, tipo=tipo, centro=[float(v) for v in centro])
+
+
+def resumo(cidades, anos, formato):
+    tabela = ClimaAPI.resumo_anual(cidades, anos)
+    campos = {c: tabela[c].to_numpy() for c in tabela.columns if c != "cidade"}
+    return codificar({"cidade": tabela["cidade"].astype(str).to_numpy(), **campos}, formato)
+
+
+def _anos(texto):
+    """"2000-2005,2010" -> [2000, ..., 2005, 2010]"""
+    anos = []
+    for parte in texto.split(","):
+        inicio, _, fim = parte.partition("-")
+        anos += range(int(inicio), int(fim or inicio) + 1)
+    return anos
+
+
+async def _responder(request, func, *args, max_age=3600):
+    formato = request.query_params.get("formato", "json")
+    if formato not in FORMATOS:
+        return PlainTextResponse(f"Formato desconhecido (use {', '.join(FORMATOS)}).", status_code=400)
+    try:
+        corpo = await _executar_enquanto_conectado(request, executar(func, *args, formato))
+    except asyncio.CancelledError:
+        return Response(status_code=499)
+    except ValueError as e:
+        return PlainTextResponse(str(e), status_code=404)
+    except Exception as e:
+        print(f"Erro na API de dados: {e}")
+        return PlainTextResponse("Dados não disponíveis.", status_code=503)
+    if corpo is None:
+        return PlainTextResponse("Dados não disponíveis.", status_code=404)
+    return resposta_bytes(request, corpo, FORMATOS[formato], max_age=max_age)
+
+
+def _max_age(ano):
+    # como os mapas: um ano ainda em aberto muda quando entram dias novos
+    return 86400 if ano_fechado(ano) else 3600
+
+
+async def rota_serie(request):
+    cidade, ano = request.path_params["cidade"], request.path_params["ano"]
+    if not no_catalogo(cidade, ano):
+        return fora_do_catalogo()
+    return await _responder(request, serie_diaria, cidade, ano, max_age=_max_age(ano))
+
+
+async def rota_mensal(request):
+    cidade, ano = request.path_params["cidade"], request.path_params["ano"]
+    if not no_catalogo(cidade, ano):
+        return fora_do_catalogo()
+    return await _responder(request, agregado_mensal, cidade, ano, max_age=_max_age(ano))
+
+
+async def rota_grade(request):
+    tipo, cidade, ano = request.path_params["tipo"], request.path_params["cidade"], request.path_params["ano"]
+    if tipo not in ("temperatura", "vento"):
+        return PlainTextResponse("Tipo de grade desconhecido.", status_code=404)
+    if not no_catalogo(cidade, ano):
+        return fora_do_catalogo()
+    return await _responder(request, grade, tipo, cidade, ano, max_age=_max_age(ano))
+
+
+async def rota_resumo(request):
+    try:
+        # tuplas: os argumentos também são a chave dos pedidos iguais em andamento (trabalhadores.executar)
+        cidades = tuple(request.query_params["cidades"].split(",")) if "cidades" in request.query_params else None
+        anos = tuple(_anos(request.query_params["anos"])) if "anos" in request.query_params else None
+    except ValueError:
+        return PlainTextResponse("anos deve ser uma lista como 2000-2010,2015.", status_code=400)
+    if any(c not in CAPITAIS for c in cidades or ()) or any(a not in ANOS for a in anos or ()):
+        return fora_do_catalogo()
+    # só lê o cache; muda quando entram dados novos, então a validade é curta
+    return await _responder(request, resumo, cidades, anos, max_age=600)
+
+
+rotas = [
+    Route("/serie/{cidade}/{ano:int}", rota_serie),
+    Route("/mensal/{cidade}/{ano:int}", rota_mensal),
+    Route("/grade/{tipo}/{cidade}/{ano:int}", rota_grade),
+    Route("/resumo", rota_resumo),
+    Route("/mapas/{tipo}/{cidade}/{ano:int}.png", rota_mapa),
+]
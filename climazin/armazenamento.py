@@ -0,0 +1,438 @@
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np # dados
+import pandas as pd # dados
+from metricas import etapa, cache, metricas
+
+# raiz do cache local; pode ser trocada por variável de ambiente (ex. benchmarks)
+DIRETORIO_DADOS = os.environ.get("CLIMAZIN_DADOS", "dados")
+# tabelas mantidas em memória na frente do disco (total em MB, pelo tamanho dos DataFrames)
+CACHE_MEMORIA_MB = float(os.environ.get("CLIMAZIN_CACHE_MEMORIA_MB", "256"))
+
+
+# fica aqui, e não em coleta, para o processo do app achar um mapa pronto sem importar a coleta
+def arquivo_mapa(cidade, ano, tipo="temperatura"):
+    """caminho do PNG em cache de um mapa (o de temperatura mantém o nome antigo)"""
+    pasta_cache = os.path.join(DIRETORIO_DADOS, cidade.replace(" ", "_"), str(ano), "cache_mapas")
+    prefixo = "" if tipo == "temperatura" else f"{tipo}_"
+    return os.path.join(pasta_cache, f"{prefixo}{cidade.replace(' ', '_')}_{ano}.png")
+
+
+@contextmanager
+def escrita_atomica(caminho):
+    """Entrega um caminho temporário e, se tudo der certo, renomeia para `caminho`.
+
+    Quem lê ao mesmo tempo vê o arquivo antigo ou o novo inteiro, nunca um meio
+    escrito. A extensão é mantida para savefig/np.savez inferirem o formato.
+    """
+    raiz, extensao = os.path.splitext(caminho)
+    temporario = f"{raiz}.tmp-{uuid.uuid4().hex}{extensao}"
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def _versao_arquivo(caminho):
+    """identifica o conteúdo atual do arquivo (muda a cada troca atômica); None se não existir"""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return info.st_ino, info.st_mtime_ns, info.st_size
+
+
+class ArmazenamentoCSV:
+    """Formato antigo: um .csv por tabela, relido como texto a cada acesso"""
+    nome = "csv"
+
+    def caminho(self, base):
+        return base + ".csv"
+
+    def existe(self, base):
+        return os.path.exists(self.caminho(base))
+
+    def versao(self, base):
+        return _versao_arquivo(self.caminho(base))
+
+    def ler(self, base, colunas_data=()):
+        df = pd.read_csv(self.caminho(base))
+        for coluna in colunas_data:
+            if coluna in df.columns:
+                df[coluna] = pd.to_datetime(df[coluna])
+        return df
+
+    def salvar(self, df, base):
+        with escrita_atomica(self.caminho(base)) as temporario:
+            df.to_csv(temporario, index=False)
+
+
+class ArmazenamentoColunar:
+    """Formato binário por colunas: float32/datetime64 tipados.
+
+    Sem compressão cada coluna vira um .npy dentro de `<base>.col/` e pode ser
+    lida com memory-map; com compressão a tabela inteira vai para `<base>.npz`.
+    Uma tabela gravada num formato apaga a cópia que houver no outro.
+    """
+    nome = "colunar"
+    ESQUEMA = "_esquema.json"
+    GRACA_LIMPEZA = 60 # segundos até uma coluna fora dos dois últimos esquemas poder ser apagada
+
+    def __init__(self, comprimir=False, mmap=True):
+        self.comprimir = comprimir
+        self.nome = "colunar_comprimido" if comprimir else "colunar"
+        self.mmap = mmap
+
+    def _pasta(self, base):
+        return base + ".col"
+
+    def _npz(self, base):
+        return base + ".npz"
+
+    def caminho(self, base):
+        return self._npz(base) if self.comprimir else self._pasta(base)
+
+    def existe(self, base):
+        return (os.path.exists(os.path.join(self._pasta(base), self.ESQUEMA))
+                or os.path.exists(self._npz(base)))
+
+    def versao(self, base):
+        # o esquema é trocado por último a cada gravação, então ele identifica a versão da tabela
+        return _versao_arquivo(os.path.join(self._pasta(base), self.ESQUEMA)) or _versao_arquivo(self._npz(base))
+
+    @staticmethod
+    def _coluna_para_array(serie):
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            return serie.to_numpy(dtype="datetime64[ns]")
+        if pd.api.types.is_bool_dtype(serie):
+            return serie.to_numpy(dtype=bool)
+        if pd.api.types.is_integer_dtype(serie):
+            info = np.iinfo(np.int32)
+            cabe = serie.empty or (serie.min() >= info.min and serie.max() <= info.max)
+            return serie.to_numpy(dtype=np.int32 if cabe else np.int64)
+        if pd.api.types.is_numeric_dtype(serie):
+            return serie.to_numpy(dtype=np.float32, na_value=np.nan)
+        return serie.astype(str).to_numpy(dtype=str)
+
+    def _ler_pasta(self, pasta):
+        with open(os.path.join(pasta, self.ESQUEMA), encoding="utf-8") as f:
+            esquema = json.load(f)
+        modo = "c" if self.mmap else None  # copy-on-write: o DataFrame pode ser alterado sem tocar no disco
+        colunas = {
+            c["nome"]: np.load(os.path.join(pasta, c["arquivo"]), mmap_mode=modo)
+            for c in esquema["colunas"]
+        }
+        return pd.DataFrame(colunas, copy=False)
+
+    def ler(self, base, colunas_data=()):
+        pasta = self._pasta(base)
+        for tentativa in range(2):
+            if not os.path.exists(os.path.join(pasta, self.ESQUEMA)):
+                break
+            try:
+                return self._ler_pasta(pasta)
+            except FileNotFoundError:
+                # o esquema lido ficou duas versões para trás (ou a tabela passou para .npz)
+                # e a limpeza levou as colunas dele: relê o esquema atual
+                if tentativa:
+                    raise
+
+        with np.load(self._npz(base)) as npz:
+            nomes = json.loads(str(npz["_nomes"]))
+            return pd.DataFrame({nome: npz[f"c{i}"] for i, nome in enumerate(nomes)})
+
+    def salvar(self, df, base):
+        arrays = [self._coluna_para_array(df[c]) for c in df.columns]
+
+        if self.comprimir:
+            campos = {f"c{i}": a for i, a in enumerate(arrays)}
+            campos["_nomes"] = np.array(json.dumps([str(c) for c in df.columns]))
+            with escrita_atomica(self._npz(base)) as temporario:
+                np.savez_compressed(temporario, **campos)
+            _remover_pasta_colunar(self._pasta(base))
+            return
+
+        # cada gravação usa nomes de coluna novos e troca o esquema por último, de forma
+        # atômica: leitores (inclusive com memory-map aberto) nunca veem uma tabela misturada
+        pasta = self._pasta(base)
+        os.makedirs(pasta, exist_ok=True)
+        arquivo_esquema = os.path.join(pasta, self.ESQUEMA)
+        anteriores = set()
+        try:
+            with open(arquivo_esquema, encoding="utf-8") as f:
+                anteriores = {c["arquivo"] for c in json.load(f)["colunas"]}
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+        versao = uuid.uuid4().hex[:12]
+        esquema = {"colunas": []}
+        for i, (nome, array) in enumerate(zip(df.columns, arrays)):
+            arquivo = f"c{i}-{versao}.npy"
+            np.save(os.path.join(pasta, arquivo), array)
+            esquema["colunas"].append({"nome": str(nome), "arquivo": arquivo, "dtype": str(array.dtype)})
+        with escrita_atomica(arquivo_esquema) as temporario:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(esquema, f)
+
+        self._limpar_versoes(pasta, manter=anteriores | {c["arquivo"] for c in esquema["colunas"]})
+        if os.path.exists(self._npz(base)):
+            os.remove(self._npz(base))
+
+    def _limpar_versoes(self, pasta, manter):
+        """Apaga colunas que nenhum esquema recente usa.
+
+        A versão substituída fica até a próxima gravação, para quem acabou de ler o
+        esquema antigo ainda achar as colunas dele; arquivos recentes também ficam,
+        porque podem ser de outra gravação em andamento (ou de uma que perdeu a troca
+        do esquema, e então são apagados numa gravação seguinte).
+        """
+        limite = time.time() - self.GRACA_LIMPEZA
+        for nome in os.listdir(pasta):
+            if not nome.endswith(".npy") or nome in manter:
+                continue
+            caminho = os.path.join(pasta, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho) # no Linux um mmap aberto continua válido
+            except OSError:
+                pass
+
+
+class MemoriaTabelas:
+    """LRU de DataFrames lidos do disco, limitada pelo total de bytes.
+
+    Cada item guarda a versão do arquivo de onde veio: se outro processo regravar
+    a tabela, a próxima leitura percebe pela versão e relê do disco.
+    """
+
+    def __init__(self, limite_mb=CACHE_MEMORIA_MB):
+        self.limite = int(limite_mb * 2**20)
+        self.usado = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, base, versao):
+        with self._trava:
+            item = self._itens.get(base)
+            if item is None or item[0] != versao:
+                return None
+            self._itens.move_to_end(base)
+            return item[1]
+
+    def guardar(self, base, versao, df):
+        tamanho = int(df.memory_usage(index=True, deep=False).sum())
+        if tamanho > self.limite:
+            return
+        with self._trava:
+            self._descartar(base)
+            self._itens[base] = (versao, df, tamanho)
+            self.usado += tamanho
+            while self.usado > self.limite:
+                _, (_, _, liberado) = self._itens.popitem(last=False)
+                self.usado -= liberado
+
+    def descartar(self, base):
+        with self._trava:
+            self._descartar(base)
+
+    def _descartar(self, base):
+        item = self._itens.pop(base, None)
+        if item is not None:
+            self.usado -= item[2]
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.usado = 0
+
+    def estatisticas(self):
+        with self._trava:
+            return {"tabelas": len(self._itens), "mb": round(self.usado / 2**20, 1), "limite_mb": round(self.limite / 2**20, 1)}
+
+
+BACKENDS = {
+    "csv": lambda: ArmazenamentoCSV(),
+    "colunar": lambda: ArmazenamentoColunar(),
+    "colunar_comprimido": lambda: ArmazenamentoColunar(comprimir=True),
+}
+
+_legado = ArmazenamentoCSV()
+# padrão comprimido: ~7x menor que o .csv (contra ~3x do colunar com memory-map)
+_armazenamento = BACKENDS[os.environ.get("CLIMAZIN_ARMAZENAMENTO", "colunar_comprimido")]()
+
+
+memoria_tabelas = MemoriaTabelas()
+
+
+@metricas.coletor
+def _medidas_memoria():
+    """ocupação da memória de tabelas deste processo (vai para /metricas junto com as métricas dos jobs)"""
+    estatisticas = memoria_tabelas.estatisticas()
+    return {"tabelas_memoria.tabelas": estatisticas["tabelas"], "tabelas_memoria.mb": estatisticas["mb"]}
+
+
+# quem acompanha o uso do disco (gerenciador_cache); recebe acessou, gravou e removeu(caminho)
+_observador = None
+
+
+def observar(observador):
+    global _observador
+    _observador = observador
+
+
+def obter_armazenamento():
+    return _armazenamento
+
+
+def definir_armazenamento(backend):
+    """Troca o backend usado por ler_tabela/salvar_tabela (nome de BACKENDS ou instância)"""
+    global _armazenamento
+    _armazenamento = BACKENDS[backend]() if isinstance(backend, str) else backend
+
+
+def tabela_existe(base):
+    """`base` é o caminho da tabela sem extensão (ex. dados/Recife/2020/dados_Recife_2020)"""
+    return _armazenamento.existe(base) or _legado.existe(base)
+
+
+def ler_tabela(base, colunas_data=()):
+    """Lê a tabela (da memória, se estiver lá e em dia); caches .csv antigos são convertidos no primeiro acesso.
+
+    Devolve uma cópia rasa: quem recebe pode acrescentar ou trocar colunas sem
+    mexer na versão guardada em memória.
+    """
+    versao = _armazenamento.versao(base)
+    if versao is not None:
+        versao = (versao, tuple(colunas_data))
+        df = memoria_tabelas.obter(base, versao)
+        cache("tabelas_memoria", df is not None)
+        if df is None:
+            with etapa("armazenamento.leitura", backend=_armazenamento.nome):
+                df = _armazenamento.ler(base, colunas_data)
+            memoria_tabelas.guardar(base, versao, df)
+        if _observador is not None:
+            _observador.acessou(_armazenamento.caminho(base))
+        return df.copy(deep=False)
+    with etapa("armazenamento.leitura", backend=_legado.nome):
+        df = _legado.ler(base, colunas_data)
+    if _armazenamento.nome != _legado.nome:
+        salvar_tabela(df, base)
+        if _conversao_confere(df, base):
+            os.remove(_legado.caminho(base))
+            _avisar_removidos(base)
+    return df
+
+
+def _conversao_confere(df, base):
+    """a tabela regravada no backend atual tem as mesmas colunas, linhas e valores do .csv lido"""
+    try:
+        novo = _armazenamento.ler(base)
+    except Exception:
+        return False
+    if [str(c) for c in df.columns] != list(novo.columns) or len(df) != len(novo):
+        return False
+    for coluna, valores in zip(novo.columns, df.columns):
+        original, convertido = df[valores], novo[coluna]
+        if pd.api.types.is_float_dtype(original) or pd.api.types.is_float_dtype(convertido):
+            # os números vão para float32: compara com a precisão dele
+            iguais = np.allclose(original.to_numpy(dtype=np.float64, na_value=np.nan),
+                                 convertido.to_numpy(dtype=np.float64, na_value=np.nan),
+                                 rtol=1e-6, atol=1e-4, equal_nan=True)
+        else:
+            iguais = (original.astype(str).to_numpy() == convertido.astype(str).to_numpy()).all()
+        if not iguais:
+            return False
+    return True
+
+
+def salvar_tabela(df, base):
+    os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+    with etapa("armazenamento.escrita", backend=_armazenamento.nome):
+        _armazenamento.salvar(df, base)
+    memoria_tabelas.descartar(base)
+    if _observador is not None:
+        _observador.gravou(_armazenamento.caminho(base))
+        _avisar_removidos(base)  # a cópia no outro formato colunar, se havia, saiu
+
+
+def _avisar_removidos(base):
+    """conta ao observador os formatos de `base` que não estão mais em disco"""
+    if _observador is not None:
+        for sufixo in (".csv", ".col", ".npz"):
+            if not os.path.exists(base + sufixo):
+                _observador.removeu(base + sufixo)
+
+
+def remover_tabela(base):
+    """apaga a tabela em todos os formatos; no colunar o esquema vai primeiro (sem ele a tabela não existe)"""
+    memoria_tabelas.descartar(base)
+    for sufixo in (".csv", ".npz"):
+        if os.path.exists(base + sufixo):
+            os.remove(base + sufixo)
+    _remover_pasta_colunar(base + ".col")
+    _avisar_removidos(base)
+
+
+def _remover_pasta_colunar(pasta):
+    if os.path.isdir(pasta):
+        nomes = sorted(os.listdir(pasta), key=lambda nome: nome != ArmazenamentoColunar.ESQUEMA)
+        for nome in nomes:
+            os.remove(os.path.join(pasta, nome))
+        os.rmdir(pasta)
+
+
+def remover_pastas_vazias(pasta, raiz):
+    """sobe de `pasta` até `raiz` apagando as pastas que ficaram vazias"""
+    while os.path.abspath(pasta) != os.path.abspath(raiz):
+        try:
+            os.rmdir(pasta)
+        except OSError:
+            return
+        pasta = os.path.dirname(pasta)
+
+
+def migrar_csv(raiz=DIRETORIO_DADOS, remover_csv=False):
+    """Converte de uma vez toda a árvore de .csv em `raiz` para o backend atual
+
+    Com `remover_csv`, cada .csv só é apagado se a tabela convertida conferir com ele.
+    """
+    convertidos = 0
+    for pasta, _, arquivos in os.walk(raiz):
+        for nome in arquivos:
+            if not nome.endswith(".csv"):
+                continue
+            base = os.path.join(pasta, nome[:-4])
+            try:
+                df = _legado.ler(base, colunas_data=("date", "hora"))
+                salvar_tabela(df, base)  # pelo caminho normal: a cota de disco vê a tabela nova
+            except Exception as e:
+                print(f"Erro ao migrar {base}.csv: {e}")
+                continue
+            if remover_csv and _conversao_confere(df, base):
+                os.remove(_legado.caminho(base))
+                _avisar_removidos(base)
+            convertidos += 1
+    print(f"{convertidos} tabelas convertidas para '{_armazenamento.nome}'.")
+    return convertidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converte o cache .csv em dados/ para o formato colunar.")
+    parser.add_argument("--raiz", default=DIRETORIO_DADOS)
+    parser.add_argument("--mmap", action="store_true", help="grava um .npy por coluna, sem compressão (lido com memory-map)")
+    parser.add_argument("--remover-csv", action="store_true", help="apaga cada .csv depois de convertido")
+    args = parser.parse_args()
+
+    # como script este arquivo é __main__: a cota de disco observa o módulo armazenamento importado
+    import armazenamento
+    import gerenciador_cache  # noqa: F401
+    armazenamento.definir_armazenamento("colunar" if args.mmap else "colunar_comprimido")
+    armazenamento.migrar_csv(args.raiz, remover_csv=args.remover_csv)
@@ -0,0 +1,120 @@
+import os
+import asyncio
+import hashlib
+from functools import lru_cache
+from urllib.parse import quote
+from starlette.responses import FileResponse, Response, PlainTextResponse, JSONResponse
+from starlette.routing import Route
+from ClimaAPI import chamar
+from cidades import cidades, anos
+from trabalhadores import executar
+from armazenamento import arquivo_mapa
+from cobertura import ano_fechado, em_dia
+from metricas import metricas
+from gerenciador_cache import gerenciador
+
+# nomes em ClimaAPI: o subsistema de cada mapa só é importado no processo do pool
+GERADORES_MAPA = {
+    "temperatura": "caminho_mapa_temperatura",
+    "vento": "caminho_mapa_vento",
+}
+
+
+@lru_cache(maxsize=1024)
+def _hash_conteudo(caminho, mtime_ns, tamanho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloco)
+    return h.hexdigest()[:32]
+
+
+def etag_arquivo(caminho):
+    """ETag forte a partir do conteúdo; só relê o arquivo se mtime/tamanho mudarem"""
+    info = os.stat(caminho)
+    return f'"{_hash_conteudo(caminho, info.st_mtime_ns, info.st_size)}"'
+
+
+def resposta_arquivo(request, caminho, media_type="image/png", max_age=86400):
+    """Entrega o arquivo como está em disco, respondendo 304 quando o cliente já tem a versão"""
+    etag = etag_arquivo(caminho)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(caminho, media_type=media_type, headers=headers)
+
+
+def resposta_bytes(request, corpo, media_type, max_age=3600):
+    """Como resposta_arquivo, para um corpo gerado na hora: a ETag vem do próprio conteúdo"""
+    etag = f'"{hashlib.sha256(corpo).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(corpo, media_type=media_type, headers=headers)
+
+
+async def _executar_enquanto_conectado(request, corrotina, intervalo=0.5):
+    """aguarda a corrotina, mas a cancela se o cliente fechar a conexão antes do fim"""
+    tarefa = asyncio.ensure_future(corrotina)
+    while True:
+        feito, _ = await asyncio.wait({tarefa}, timeout=intervalo)
+        if feito:
+            return tarefa.result()
+        if await request.is_disconnected():
+            tarefa.cancel()
+            raise asyncio.CancelledError()
+
+
+def no_catalogo(cidade, ano):
+    """só as capitais e os anos do app: uma rota não pode geocodificar, buscar e gravar um lugar qualquer"""
+    return cidade in cidades and ano in anos
+
+
+def fora_do_catalogo():
+    return PlainTextResponse("Cidade ou ano fora do catálogo.", status_code=404)
+
+
+async def rota_mapa(request):
+    tipo = request.path_params["tipo"]
+    cidade = request.path_params["cidade"]
+    ano = request.path_params["ano"]
+    if tipo not in GERADORES_MAPA:
+        return PlainTextResponse("Tipo de mapa desconhecido.", status_code=404)
+    if not no_catalogo(cidade, ano):
+        return fora_do_catalogo()
+
+    # um mapa pronto e em dia sai direto do disco, sem esperar na fila do pool atrás de mapas frios
+    caminho = arquivo_mapa(cidade, ano, tipo)
+    if em_dia(caminho, ano):
+        gerenciador.acessou(caminho)
+        return resposta_arquivo(request, caminho, max_age=86400 if ano_fechado(ano) else 3600)
+
+    try:
+        # um mapa frio ainda precisa ser gerado; isso roda no pool de processos
+        caminho = await _executar_enquanto_conectado(request, executar(chamar, GERADORES_MAPA[tipo], cidade, ano))
+    except asyncio.CancelledError:
+        return Response(status_code=499)  # o navegador desistiu (ex. trocou de ano)
+    except Exception as e:
+        print(f"Erro ao gerar o mapa: {e}")
+        caminho = None
+    if caminho is None or not os.path.exists(caminho):
+        return PlainTextResponse("Mapa não disponível.", status_code=404)
+    # o mapa de um ano ainda em aberto muda quando entram dias novos
+    return resposta_arquivo(request, caminho, max_age=86400 if ano_fechado(ano) else 3600)
+
+
+async def rota_metricas(request):
+    """tempos por etapa, contadores e acertos de cache do processo principal (com o que já voltou do pool)"""
+    instantaneo = metricas.instantaneo()
+    return JSONResponse({**instantaneo, "cache": gerenciador.estatisticas(instantaneo)}, headers={"Cache-Control": "no-store"})
+
+
+def url_mapa(tipo, cidade, ano):
+    """endereço (relativo à raiz do app) do PNG servido por rota_mapa"""
+    return f"mapas/{tipo}/{quote(cidade)}/{ano}.png"
+
+
+rotas = [
+    Route("/mapas/{tipo}/{cidade}/{ano:int}.png", rota_mapa),
+    Route("/metricas", rota_metricas),
+]
@@ -0,0 +1,206 @@
+# benchmark offline (rodar dentro de climazin/):
+#   python -m benchmark --cidades Recife Natal --anos 2019 2020 --repeticoes 3
+# sobe o servidor_simulado.py num processo à parte, aponta as URLs da API para ele e
+# usa um cache de dados temporário. Cada operação é medida a frio (cache de dados e
+# memória vazios) e a quente (logo em seguida, com o cache pronto); os fundos do
+# Natural Earth são estáticos e ficam prontos desde o início, como no app.
+# Com --saida o resultado vai para um JSON; com --comparar, um resultado anterior
+# serve de referência e o comando falha se o p50 piorar além da --tolerancia.
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import resource
+import subprocess
+import tracemalloc
+import numpy as np # dados
+import requests # requisições HTTP à API
+
+FOLGA_MS = 5.0 # diferenças menores que isso não contam como regressão (ruído de medição)
+OPERACOES = ["buscar_dados_clima", "grafico_temperatura", "grafico_chuva", "gerar_mapa_temperatura", "mapa_vento"]
+
+
+def _operacoes(ClimaAPI):
+    """nome -> função(cidade, ano); as figuras são liberadas dentro da medição, como no app"""
+    from renderizacao import liberar
+
+    def gerar_mapa_temperatura(cidade, ano):
+        fig = ClimaAPI.gerar_mapa_temperatura(cidade, ano)
+        if fig is not None:
+            liberar(fig)
+
+    return {
+        "buscar_dados_clima": ClimaAPI.buscar_dados_clima,
+        "grafico_temperatura": lambda cidade, ano: ClimaAPI.grafico_png("temperatura", cidade, ano),
+        "grafico_chuva": lambda cidade, ano: ClimaAPI.grafico_png("chuva", cidade, ano),
+        "gerar_mapa_temperatura": gerar_mapa_temperatura,
+        "mapa_vento": lambda cidade, ano: liberar(ClimaAPI.mapa_vento(cidade, ano)),
+    }
+
+
+def subir_servidor(args):
+    """inicia o servidor_simulado.py em outro processo; devolve (processo, url base)"""
+    comando = [sys.executable, "-m", "servidor_simulado", "--porta", "0",
+               "--latencia", str(args.latencia), "--variacao", str(args.variacao),
+               "--taxa-429", str(args.taxa_429), "--semente", "0"]
+    if args.gravacoes:
+        comando += ["--gravacoes", args.gravacoes]
+    processo = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+    porta = int(processo.stdout.readline())
+    return processo, f"http://127.0.0.1:{porta}"
+
+
+def estatisticas_servidor(url, zerar=True):
+    res = requests.get(f"{url}/_estatisticas", params={"zerar": "1" if zerar else "0"}, timeout=10)
+    res.raise_for_status()
+    return res.json()
+
+
+def esfriar(dados, pasta_fundos):
+    """apaga o cache de dados (menos os fundos) e o que está em memória"""
+    from geocodificacao import indice_geocodificacao
+    from interpolacao import interpoladores
+    from armazenamento import memoria_tabelas
+    for nome in os.listdir(dados):
+        caminho = os.path.join(dados, nome)
+        if os.path.abspath(caminho) == os.path.abspath(pasta_fundos):
+            continue
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho)
+        else:
+            os.remove(caminho)
+    indice_geocodificacao.esquecer()
+    interpoladores.limpar()
+    memoria_tabelas.limpar()
+
+
+def medir(funcao, cidade, ano, url):
+    """(segundos, pedidos à API, 429) de uma chamada"""
+    estatisticas_servidor(url)
+    inicio = time.perf_counter()
+    funcao(cidade, ano)
+    duracao = time.perf_counter() - inicio
+    servidor = estatisticas_servidor(url)
+    return duracao, sum(servidor["pedidos"].values()), servidor["429"]
+
+
+def pico_memoria(funcao, cidade, ano):
+    """pico de memória alocada (MB) durante uma chamada; numa passada à parte porque o tracemalloc pesa nos tempos"""
+    tracemalloc.start()
+    try:
+        funcao(cidade, ano)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def resumir(amostras, picos):
+    tempos = np.array([a[0] for a in amostras]) * 1000
+    return {
+        "n": len(amostras),
+        "p50_ms": round(float(np.percentile(tempos, 50)), 1),
+        "p95_ms": round(float(np.percentile(tempos, 95)), 1),
+        "pedidos": round(float(np.mean([a[1] for a in amostras])), 1),
+        "429": int(sum(a[2] for a in amostras)),
+        "pico_mb": round(max(picos), 1) if picos else None,
+    }
+
+
+def comparar(resultado, referencia, tolerancia):
+    """(operação/modo, p50 antes, p50 agora, variação %) do que piorou além da tolerância"""
+    regressoes = []
+    for chave, atual in resultado["operacoes"].items():
+        antes = referencia.get("operacoes", {}).get(chave)
+        if not antes or not antes["p50_ms"]:
+            continue
+        variacao = 100 * (atual["p50_ms"] - antes["p50_ms"]) / antes["p50_ms"]
+        if variacao > tolerancia and atual["p50_ms"] - antes["p50_ms"] > FOLGA_MS:
+            regressoes.append((chave, antes["p50_ms"], atual["p50_ms"], variacao))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede as operações do ClimaAPI contra uma API local simulada.")
+    parser.add_argument("--cidades", nargs="+", default=["Recife", "Natal", "Manaus"])
+    parser.add_argument("--anos", nargs="+", type=int, default=[2019, 2020])
+    parser.add_argument("--operacoes", nargs="+", choices=OPERACOES, default=OPERACOES)
+    parser.add_argument("--repeticoes", type=int, default=1, help="rodadas de todas as cidades e anos")
+    parser.add_argument("--quentes", type=int, default=3, help="medições a quente depois de cada medição a frio")
+    parser.add_argument("--latencia", type=float, default=50.0, help="latência média da API simulada (ms)")
+    parser.add_argument("--variacao", type=float, default=20.0, help="variação da latência (ms)")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="fração dos pedidos respondida com 429")
+    parser.add_argument("--gravacoes", help="pasta de respostas gravadas para o servidor reproduzir")
+    parser.add_argument("--sem-memoria", action="store_true", help="pula a passada extra que mede o pico de memória")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    parser.add_argument("--comparar", help="resultado JSON anterior usado como referência")
+    parser.add_argument("--tolerancia", type=float, default=20.0, help="piora aceita no p50 em relação à referência (%%)")
+    args = parser.parse_args(argv)
+
+    servidor, url = subir_servidor(args)
+    dados = tempfile.mkdtemp(prefix="climazin_benchmark_")
+    # os módulos leem as URLs e a pasta de dados na importação
+    os.environ["CLIMAZIN_URL_ARCHIVE"] = f"{url}/v1/archive"
+    os.environ["CLIMAZIN_URL_GEOCODING"] = f"{url}/v1/search"
+    os.environ["CLIMAZIN_DADOS"] = dados
+    try:
+        import ClimaAPI
+        import mapa_base
+        operacoes = _operacoes(ClimaAPI)
+        ClimaAPI.aquecer_mapas_base(args.cidades)
+
+        amostras = {}
+        picos = {}
+        for repeticao in range(args.repeticoes):
+            for cidade in args.cidades:
+                for ano in args.anos:
+                    for nome in args.operacoes:
+                        funcao = operacoes[nome]
+                        esfriar(dados, mapa_base.PASTA_CACHE)
+                        amostras.setdefault(f"{nome}/frio", []).append(medir(funcao, cidade, ano, url))
+                        for _ in range(args.quentes):
+                            amostras.setdefault(f"{nome}/quente", []).append(medir(funcao, cidade, ano, url))
+                        frio = amostras[f"{nome}/frio"][-1]
+                        print(f"{cidade} {ano} {nome}: frio {frio[0] * 1000:.0f} ms, {frio[1]} pedidos", flush=True)
+
+                        if not args.sem_memoria and repeticao == 0:
+                            picos.setdefault(f"{nome}/quente", []).append(pico_memoria(funcao, cidade, ano))
+                            esfriar(dados, mapa_base.PASTA_CACHE)
+                            picos.setdefault(f"{nome}/frio", []).append(pico_memoria(funcao, cidade, ano))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+        shutil.rmtree(dados, ignore_errors=True)
+
+    resultado = {
+        "cidades": args.cidades,
+        "anos": args.anos,
+        "latencia_ms": args.latencia,
+        "taxa_429": args.taxa_429,
+        "rss_maximo_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10, 1),
+        "operacoes": {chave: resumir(lista, picos.get(chave, [])) for chave, lista in amostras.items()},
+    }
+
+    print(f"\n{'operação':<34}{'n':>4}{'p50 ms':>10}{'p95 ms':>10}{'pedidos':>9}{'429':>5}{'pico MB':>9}")
+    for chave, r in resultado["operacoes"].items():
+        pico = f"{r['pico_mb']:.1f}" if r["pico_mb"] is not None else "-"
+        print(f"{chave:<34}{r['n']:>4}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['pedidos']:>9.1f}{r['429']:>5}{pico:>9}")
+    print(f"RSS máximo do processo: {resultado['rss_maximo_mb']:.0f} MB")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=1)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(resultado, json.load(f), args.tolerancia)
+        for chave, antes, agora, variacao in regressoes:
+            print(f"REGRESSÃO {chave}: p50 {antes:.1f} -> {agora:.1f} ms ({variacao:+.0f}%)")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# tempo de importação do ClimaAPI e de cada subsistema (rodar dentro de climazin/):
+#   python -m benchmark_importacao --repeticoes 5
+#   python -m benchmark_importacao --precarregar tudo --top 15
+# cada medição é um processo Python novo, como um processo do pool recém-criado; com
+# --precarregar mede também `import ClimaAPI; ClimaAPI.precarregar(...)`, o custo de
+# subir um processo já aquecido. --top lista os módulos mais caros (python -X importtime).
+import sys
+import argparse
+import subprocess
+import numpy as np # dados
+
+ALVOS = ["ClimaAPI", "coleta", "graficos", "mapa_temperatura", "mapa_vento", "mapa_base"]
+
+
+def medir(codigo):
+    """segundos de `codigo` num processo novo (sem contar a subida do interpretador)"""
+    programa = f"import time; _t = time.perf_counter(); {codigo}; print(time.perf_counter() - _t)"
+    saida = subprocess.run([sys.executable, "-c", programa], capture_output=True, text=True, check=True)
+    return float(saida.stdout.strip().splitlines()[-1])
+
+
+def _importtime(codigo):
+    """[(módulo, ms acumulados)] de `codigo`, segundo python -X importtime"""
+    saida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], capture_output=True, text=True, check=True)
+    tempos = []
+    for linha in saida.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, modulo = linha[len("import time:"):].split("|")
+        tempos.append((modulo.strip(), int(acumulado) / 1000))
+    return tempos
+
+
+def mais_caros(codigo, n):
+    """os n imports mais caros de `codigo`, fora os que o interpretador já faz ao subir (site, .pth)"""
+    if n <= 0:
+        return []
+    inicio = {modulo for modulo, _ in _importtime("pass")}
+    return sorted((t for t in _importtime(codigo) if t[0] not in inicio), key=lambda t: -t[1])[:n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede quanto custa importar o ClimaAPI e cada subsistema.")
+    parser.add_argument("--alvos", nargs="+", choices=ALVOS, default=ALVOS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--precarregar", help='subsistemas para ClimaAPI.precarregar ("tudo" ou lista separada por vírgula)')
+    parser.add_argument("--top", type=int, default=0, help="lista os N módulos mais caros de cada alvo")
+    args = parser.parse_args(argv)
+
+    codigos = {alvo: f"import {alvo}" for alvo in args.alvos}
+    if args.precarregar:
+        codigos[f"precarregar({args.precarregar})"] = f"import ClimaAPI; ClimaAPI.precarregar({args.precarregar!r})"
+
+    print(f"{'alvo':<34}{'p50 ms':>10}{'mín ms':>10}{'máx ms':>10}")
+    for nome, codigo in codigos.items():
+        tempos = np.array([medir(codigo) for _ in range(args.repeticoes)]) * 1000
+        print(f"{nome:<34}{np.median(tempos):>10.0f}{tempos.min():>10.0f}{tempos.max():>10.0f}", flush=True)
+        for modulo, ms in mais_caros(codigo, args.top):
+            print(f"    {modulo:<30}{ms:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
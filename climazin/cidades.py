@@ -6,4 +6,5 @@ cidades = [
     "Curitiba", "Florianópolis", "Porto Alegre"
 ]
 
-
+# anos do slider em Clima.py; o prefetch e as rotas HTTP aceitam os mesmos
+anos = list(range(2000, 2025))
@@ -0,0 +1,78 @@
+import threading # sessões do Shiny rodam em threads diferentes
+import functools
+from metricas import contar
+
+
+class _Chamada:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class VooUnico:
+    """Single-flight: enquanto uma chave está em andamento, quem chega depois espera a primeira chamada.
+
+    Com `compartilhar=True` todos recebem o mesmo resultado. Com `compartilhar=False`
+    quem esperou roda a função de novo ao final, o que serve para renders que
+    devolvem objetos não compartilháveis (figuras) mas que acertam o cache na
+    segunda vez.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._em_voo = {}
+
+    def executar(self, chave, func, *args, compartilhar=True, **kwargs):
+        with self._trava:
+            chamada = self._em_voo.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_voo[chave] = _Chamada()
+
+        if not lider:
+            contar("coalescencia.espera")  # chamada que pegou carona numa igual em andamento
+            chamada.evento.wait()
+            if not compartilhar:
+                return func(*args, **kwargs)
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = func(*args, **kwargs)
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._trava:
+                del self._em_voo[chave]
+            chamada.evento.set()
+
+    def em_andamento(self):
+        with self._trava:
+            return list(self._em_voo)
+
+
+voo_unico = VooUnico()
+
+
+def _congelar(valor):
+    """listas de pontos viram tuplas para poderem fazer parte da chave"""
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def coalescer(func=None, *, compartilhar=True):
+    """Decorador: chamadas simultâneas com os mesmos argumentos viram uma só (chave = função + argumentos)"""
+    if func is None:
+        return functools.partial(coalescer, compartilhar=compartilhar)
+
+    @functools.wraps(func)
+    def envolvida(*args, **kwargs):
+        chave = (func.__qualname__, _congelar(args), _congelar(tuple(sorted(kwargs.items()))))
+        return voo_unico.executar(chave, func, *args, compartilhar=compartilhar, **kwargs)
+
+    return envolvida
@@ -0,0 +1,203 @@
+import os
+import json
+import datetime as dt
+import pandas as pd # dados
+from armazenamento import escrita_atomica, tabela_existe, ler_tabela, salvar_tabela
+from metricas import cache
+
+# a API de arquivo (ERA5) publica cada dia com alguns dias de atraso
+ATRASO_ARQUIVO = 5
+# um fim de período ainda não publicado só é pedido de novo depois disso
+REVERIFICAR_APOS = dt.timedelta(hours=6)
+# passo de tempo de cada tabela, pela coluna de tempo (define o último dia completo)
+PASSOS = {"date": pd.Timedelta(days=1), "hora": pd.Timedelta(hours=1)}
+
+
+def periodo_ano(ano, hoje=None):
+    """(inicio, fim) do ano que a API de arquivo já pode ter; None para anos ainda sem dados"""
+    hoje = hoje or dt.date.today()
+    inicio = dt.date(ano, 1, 1)
+    fim = min(dt.date(ano, 12, 31), hoje - dt.timedelta(days=ATRASO_ARQUIVO))
+    return (inicio, fim) if fim >= inicio else None
+
+
+def ano_fechado(ano, hoje=None):
+    """o ano inteiro já está publicado na API de arquivo (os dados não mudam mais)"""
+    periodo = periodo_ano(ano, hoje)
+    return periodo is not None and periodo[1] == dt.date(ano, 12, 31)
+
+
+def em_dia(caminho, ano, hoje=None):
+    """um arquivo derivado (ex. PNG de mapa) está em dia se foi gerado depois da publicação do fim do período"""
+    periodo = periodo_ano(ano, hoje)
+    if periodo is None or not os.path.exists(caminho):
+        return False
+    gerado = dt.date.fromtimestamp(os.path.getmtime(caminho))
+    return gerado >= periodo[1] + dt.timedelta(days=ATRASO_ARQUIVO)
+
+
+def arquivo_cobertura(base):
+    """metadados ao lado da tabela: <base>.cobertura.json"""
+    return base + ".cobertura.json"
+
+
+def _com_dados(df, colunas):
+    """máscara das linhas com algum valor nas `colunas` (dias ainda não publicados vêm como null)"""
+    return df[list(colunas)].notna().any(axis=1)
+
+
+def cobertura_de(df, variaveis, coluna_tempo="date", verificado=None):
+    """período (em dias completos) e variáveis que a tabela de fato tem"""
+    presentes = [v for v in variaveis if v in df.columns]
+    if not presentes:
+        return None
+    tempos = df.loc[_com_dados(df, presentes), coluna_tempo]
+    if tempos.empty:
+        return None
+    ultimo = tempos.max() + PASSOS[coluna_tempo]
+    return {
+        "inicio": tempos.min().date(),
+        "fim": ultimo.date() - dt.timedelta(days=1),
+        "variaveis": presentes,
+        "verificado": verificado,
+    }
+
+
+def ler_cobertura(base, df=None, variaveis=(), coluna_tempo="date"):
+    """lê o .cobertura.json; caches anteriores aos metadados têm a cobertura tirada dos próprios dados"""
+    arquivo = arquivo_cobertura(base)
+    if os.path.exists(arquivo):
+        with open(arquivo, encoding="utf-8") as f:
+            bruto = json.load(f)
+        return {
+            "inicio": dt.date.fromisoformat(bruto["inicio"]),
+            "fim": dt.date.fromisoformat(bruto["fim"]),
+            "variaveis": bruto["variaveis"],
+            "verificado": dt.datetime.fromisoformat(bruto["verificado"]) if bruto.get("verificado") else None,
+        }
+    if df is None:
+        return None
+    return cobertura_de(df, variaveis, coluna_tempo)
+
+
+def salvar_cobertura(base, cobertura):
+    bruto = {
+        "inicio": cobertura["inicio"].isoformat(),
+        "fim": cobertura["fim"].isoformat(),
+        "variaveis": list(cobertura["variaveis"]),
+        "verificado": cobertura["verificado"].isoformat() if cobertura.get("verificado") else None,
+    }
+    with escrita_atomica(arquivo_cobertura(base)) as temporario:
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(bruto, f)
+
+
+def pendencias(cobertura, periodo, variaveis, agora=None):
+    """pedidos (inicio, fim, variaveis) que faltam para a tabela cobrir `periodo` com todas as `variaveis`.
+
+    Variáveis novas são pedidas só para o período já coberto; dias que faltam
+    são pedidos com todas as variáveis.
+    """
+    inicio, fim = periodo
+    variaveis = tuple(variaveis)
+    if cobertura is None:
+        return [(inicio, fim, variaveis)]
+
+    pedidos = []
+    novas = tuple(v for v in variaveis if v not in cobertura["variaveis"])
+    comum_inicio, comum_fim = max(inicio, cobertura["inicio"]), min(fim, cobertura["fim"])
+    if novas and comum_inicio <= comum_fim:
+        pedidos.append((comum_inicio, comum_fim, novas))
+    if inicio < cobertura["inicio"]:
+        pedidos.append((inicio, min(fim, cobertura["inicio"] - dt.timedelta(days=1)), variaveis))
+    if cobertura["fim"] < fim:
+        agora = agora or dt.datetime.now()
+        verificado = cobertura.get("verificado")
+        if verificado is None or agora - verificado >= REVERIFICAR_APOS:
+            pedidos.append((max(inicio, cobertura["fim"] + dt.timedelta(days=1)), fim, variaveis))
+    return pedidos
+
+
+def mesclar(df, novo, coluna_tempo="date"):
+    """junta linhas e colunas novas à tabela; valores já existentes têm prioridade"""
+    novo = novo[_com_dados(novo, [c for c in novo.columns if c != coluna_tempo])]
+    if df is None:
+        return novo.reset_index(drop=True)
+    if novo.empty:
+        return df
+    return df.set_index(coluna_tempo).combine_first(novo.set_index(coluna_tempo)).reset_index()
+
+
+def registrar(base, df, variaveis, coluna_tempo="date"):
+    """grava a cobertura atual da tabela, marcando a hora da verificação"""
+    cobertura = cobertura_de(df, variaveis, coluna_tempo, verificado=dt.datetime.now())
+    if cobertura is not None:
+        salvar_cobertura(base, cobertura)
+
+
+def agrupar_pedidos(pedidos, anos_por_pedido=10):
+    """junta pedidos contíguos com as mesmas variáveis (ex. um por ano) em pedidos de até `anos_por_pedido` anos"""
+    grupos = []
+    for inicio, fim, variaveis in sorted(pedidos):
+        if grupos:
+            g_inicio, g_fim, g_variaveis = grupos[-1]
+            if (g_variaveis == variaveis and g_fim + dt.timedelta(days=1) == inicio
+                    and fim.year - g_inicio.year < anos_por_pedido):
+                grupos[-1] = (g_inicio, fim, variaveis)
+                continue
+        grupos.append((inicio, fim, variaveis))
+    return grupos
+
+
+def dividir_por_ano(novo, coluna_tempo="date"):
+    """{ano: parte} de uma resposta que cobre vários anos"""
+    return {int(ano): parte for ano, parte in novo.groupby(novo[coluna_tempo].dt.year)}
+
+
+def completar_anos(bases, variaveis, buscar, derivar=None, coluna_tempo="date", anos_por_pedido=10, nome=None):
+    """Lê as partições anuais da mesma série e busca só o que falta, com poucos pedidos à API.
+
+    `bases` é {ano: base}. O que falta em anos vizinhos é pedido de uma vez
+    (até `anos_por_pedido` anos por pedido) e a resposta é repartida de volta
+    em cada ano. `buscar(inicio, fim, variaveis)` devolve um DataFrame com a
+    coluna de tempo e as variáveis pedidas (ou None); `derivar(df)` recalcula
+    colunas derivadas antes de gravar; com `nome`, cada ano conta como acerto ou
+    falta do cache `nome` nas métricas. Devolve ({ano: df ou None}, anos que mudaram).
+    """
+    tabelas = {}
+    pendentes = []
+    for ano, base in sorted(bases.items()):
+        periodo = periodo_ano(ano)
+        df = ler_tabela(base, colunas_data=[coluna_tempo]) if tabela_existe(base) else None
+        tabelas[ano] = df
+        if periodo is not None:
+            pedidos = pendencias(ler_cobertura(base, df, variaveis, coluna_tempo), periodo, variaveis)
+            if nome:
+                cache(nome, not pedidos)
+            pendentes += pedidos
+
+    consultados = set()
+    mudaram = set()
+    for inicio, fim, pedidas in agrupar_pedidos(pendentes, anos_por_pedido):
+        novo = buscar(inicio, fim, pedidas)
+        consultados.update(range(inicio.year, fim.year + 1))
+        if novo is None or not _com_dados(novo, pedidas).any():
+            continue
+        for ano, parte in dividir_por_ano(novo, coluna_tempo).items():
+            if ano in tabelas and _com_dados(parte, pedidas).any():
+                tabelas[ano] = mesclar(tabelas[ano], parte, coluna_tempo)
+                mudaram.add(ano)
+
+    for ano, df in tabelas.items():
+        if df is None or df.empty:
+            tabelas[ano] = None
+            continue
+        base = bases[ano]
+        if ano in mudaram:
+            if derivar is not None:
+                df = tabelas[ano] = derivar(df)
+            salvar_tabela(df, base)
+        if ano in consultados:
+            registrar(base, df, variaveis, coluna_tempo)
+    return tabelas, mudaram
+
@@ -0,0 +1,413 @@
+import os # manipulação de arquivos e diretórios (ex. cache)
+import datetime as dt
+import numpy as np # dados
+import pandas as pd # dados
+import concurrent.futures # parelização de requisições - serve pra deixar mais rapido o carregamento
+from armazenamento import DIRETORIO_DADOS, tabela_existe, ler_tabela, salvar_tabela, arquivo_mapa
+from coalescencia import coalescer
+from agregados import ler_agregado_mensal, salvar_agregado_mensal, somar_setores, juntar_setores, medias_setores
+from geocodificacao import indice_geocodificacao
+from rede import URL_ARCHIVE, buscar_json
+from malha import ponto_malha, pontos_malha, pontos_centrados, arquivo_ponto
+from metricas import medido, cache
+import gerenciador_cache # registra a cota de disco como observador das tabelas gravadas aqui
+from cobertura import periodo_ano, pendencias, ler_cobertura, salvar_cobertura, mesclar, registrar, agrupar_pedidos, dividir_por_ano, completar_anos
+
+# busca na API de arquivo e cache em disco: dados diários das cidades, pontos da
+# malha dos mapas e setores de vento (sem matplotlib/cartopy/metpy)
+
+def obter_coordenadas(cidade):
+    """Usa o API pra obter a longitude e latitude de 1 cidade (só na primeira vez; depois vem do índice em disco)"""
+    return indice_geocodificacao.coordenadas(cidade)
+
+# nome das colunas do cache -> variável da API de arquivo
+VARIAVEIS_DIARIAS = {
+    "temp_max": "temperature_2m_max",
+    "temp_min": "temperature_2m_min",
+    "precipitacao": "precipitation_sum",
+}
+
+VARIAVEIS_HORARIAS = {
+    "velocidade": "wind_speed_10m",
+    "direcao": "wind_direction_10m",
+}
+
+def _parametros(pontos, inicio, fim, bloco, variaveis):
+    """parâmetros da API de arquivo para um ou vários pontos num intervalo de datas"""
+    nomes = VARIAVEIS_DIARIAS if bloco == "daily" else VARIAVEIS_HORARIAS
+    return {
+        "latitude": ",".join(str(lat) for lat, _ in pontos),
+        "longitude": ",".join(str(lon) for _, lon in pontos),
+        "start_date": inicio.isoformat(),
+        "end_date": fim.isoformat(),
+        bloco: ",".join(nomes[v] for v in variaveis),
+        "timezone": "America/Sao_Paulo",
+        "models": "era5", # fixa a malha de 0.25° assumida em malha.RESOLUCAO
+    }
+
+def _tabela_resposta(dados, bloco, variaveis):
+    """DataFrame (date ou hora + variáveis) a partir do bloco 'daily'/'hourly' de um ponto"""
+    serie = (dados or {}).get(bloco)
+    if not serie or not serie.get('time'):
+        return None
+    nomes = VARIAVEIS_DIARIAS if bloco == "daily" else VARIAVEIS_HORARIAS
+    coluna_tempo = "date" if bloco == "daily" else "hora"
+    tabela = pd.DataFrame({coluna_tempo: pd.to_datetime(serie['time'])})
+    for v in variaveis:
+        tabela[v] = pd.to_numeric(pd.Series(serie.get(nomes[v], [None] * len(tabela))), errors='coerce')
+    return tabela
+
+# anos por requisição ao preencher vários anos de uma vez (o horário pesa ~24x mais)
+ANOS_POR_PEDIDO = {"daily": 10, "hourly": 3}
+
+def _arquivo_clima(cidade, ano):
+    pasta = os.path.join(DIRETORIO_DADOS, cidade.replace(" ", "_"), str(ano))
+    return os.path.join(pasta, f"dados_{cidade.replace(' ', '_')}_{ano}")
+
+@medido()
+@coalescer
+def buscar_dados_clima_anos(cidade, anos):
+    """busca e transforma em cache vários anos da cidade com poucas requisições; devolve {ano: df ou None}
+
+    Os dias que faltam em anos vizinhos vão num pedido só e a resposta é
+    repartida nos arquivos de cada ano; a cidade é geocodificada uma vez.
+    """
+    coordenadas = []
+
+    def buscar(inicio, fim, variaveis):
+        if not coordenadas:
+            coordenadas.append(obter_coordenadas(cidade))  # só geocodifica se for mesmo à API
+        dados = buscar_json(URL_ARCHIVE, _parametros(coordenadas, inicio, fim, "daily", variaveis))
+        return _tabela_resposta(dados, "daily", variaveis)
+
+    def derivar(df):
+        if coordenadas:
+            df['lon'] = coordenadas[0][1]
+        df["temp"] = df[['temp_max', 'temp_min']].mean(axis=1)
+        return df
+
+    bases = {ano: _arquivo_clima(cidade, ano) for ano in anos}
+    tabelas, mudaram = completar_anos(bases, VARIAVEIS_DIARIAS, buscar, derivar, anos_por_pedido=ANOS_POR_PEDIDO["daily"], nome="clima")
+    for ano in mudaram:
+        salvar_agregado_mensal(tabelas[ano], cidade, ano)  # tabela mensal materializada junto com os dados brutos
+    return tabelas
+
+@coalescer
+def buscar_dados_clima(cidade, ano):
+    """busca e transforma em cache os dados da cidade; só os dias e variáveis que faltam vão para a API"""
+    df = buscar_dados_clima_anos(cidade, [ano])[ano]
+    if df is None:
+        raise ValueError("Dados climáticos não encontrados para o ano.")
+    return df
+
+def obter_agregado_mensal(cidade, ano, df=None):
+    """12 linhas por (cidade, ano); caches anteriores aos agregados são completados na primeira leitura"""
+    tabela = ler_agregado_mensal(cidade, ano)
+    if tabela is None:
+        if df is None or 'precipitacao' not in df.columns:
+            df = buscar_dados_clima(cidade, ano)
+        tabela = salvar_agregado_mensal(df, cidade, ano)
+    return tabela
+
+def comparar_anos(cidade, anos):
+    """junta os agregados mensais de vários anos numa tabela só (coluna 'ano')"""
+    faltando = [ano for ano in anos if ler_agregado_mensal(cidade, ano) is None]
+    if faltando:
+        buscar_dados_clima_anos(cidade, faltando)  # anos frios numa requisição só
+    tabelas = [obter_agregado_mensal(cidade, ano).assign(ano=ano) for ano in anos]
+    return pd.concat(tabelas, ignore_index=True)
+
+def _arquivo_ponto(lat, lon, ano):
+    """tabela diária do ponto no armazenamento compartilhado por todas as cidades (malha.py)"""
+    return arquivo_ponto(lat, lon, ano, "diario")
+
+VARIAVEIS_PONTO = ("temp_max", "temp_min")
+
+def _pedidos_pontos(pendentes_por_celula, bloco):
+    """{(inicio, fim, variaveis): [células]} juntando anos vizinhos de cada célula num intervalo só"""
+    pedidos = {}
+    for celula, pendentes in pendentes_por_celula.items():
+        for pedido in agrupar_pedidos(pendentes, ANOS_POR_PEDIDO[bloco]):
+            pedidos.setdefault(pedido, []).append(celula)
+    return pedidos
+
+def _buscar_lotes(pedidos, bloco, tamanho_lote, tentativas):
+    """faz os pedidos em lotes de `tamanho_lote` coordenadas; gera (celula, inicio, fim, variaveis, resposta do ponto)
+
+    Células com o mesmo pedido pendente vão juntas na mesma requisição. Cada
+    resposta é entregue e solta antes da próxima, para o chamador converter e
+    descartar o JSON ponto a ponto.
+    """
+    for (inicio, fim, pedidas), grupo in pedidos.items():
+        for i in range(0, len(grupo), tamanho_lote):
+            lote = grupo[i:i + tamanho_lote]
+            try:
+                dados = buscar_json(URL_ARCHIVE, _parametros(lote, inicio, fim, bloco, pedidas), tentativas=tentativas)
+            except Exception as e:
+                print(f"Erro ao buscar lote de {len(lote)} pontos: {e}")
+                continue
+
+            # com uma coordenada só a API devolve um objeto em vez de uma lista
+            if isinstance(dados, dict):
+                dados = [dados]
+            for j, celula in enumerate(lote[:len(dados)]):
+                dados_ponto, dados[j] = dados[j], None
+                yield celula, inicio, fim, pedidas, dados_ponto
+
+def _completar_pontos(celulas, anos, variaveis, tabela, derivar, tamanho_lote, tentativas):
+    """completar_anos() das tabelas diárias de várias células da malha: devolve {(celula, ano): df ou None}"""
+    tabelas = {}
+    pendentes = {}
+    for celula in dict.fromkeys(celulas):
+        pendentes[celula] = []
+        for ano in anos:
+            base = arquivo_ponto(*celula, ano, tabela)
+            df = ler_tabela(base, colunas_data=['date']) if tabela_existe(base) else None
+            tabelas[celula, ano] = df
+            periodo = periodo_ano(ano)
+            if periodo is not None:
+                pedidos = pendencias(ler_cobertura(base, df, variaveis), periodo, variaveis)
+                cache("pontos", not pedidos)
+                pendentes[celula] += pedidos
+
+    consultados = set()
+    alterados = set()
+    for celula, inicio, fim, pedidas, dados_ponto in _buscar_lotes(_pedidos_pontos(pendentes, "daily"), "daily", tamanho_lote, tentativas):
+        consultados.update((celula, ano) for ano in range(inicio.year, fim.year + 1))
+        novo = _tabela_resposta(dados_ponto, "daily", pedidas)
+        if novo is None:
+            print(f"Dados climáticos não encontrados para o ponto {celula}.")
+            continue
+        for ano, parte in dividir_por_ano(novo).items():
+            if (celula, ano) in tabelas:
+                tabelas[celula, ano] = mesclar(tabelas[celula, ano], parte)
+                alterados.add((celula, ano))
+
+    for (celula, ano), df in tabelas.items():
+        if df is None or df.empty:
+            tabelas[celula, ano] = None
+            continue
+        base = arquivo_ponto(*celula, ano, tabela)
+        if (celula, ano) in alterados:
+            df = tabelas[celula, ano] = derivar(df, celula)
+            salvar_tabela(df, base)
+        if (celula, ano) in consultados:
+            registrar(base, df, variaveis)
+    return tabelas
+
+def _derivar_ponto(df, celula):
+    df["temp"] = df[['temp_max', 'temp_min']].mean(axis=1)
+    return df
+
+@medido()
+@coalescer
+def buscar_dados_pontos_anos(pontos, anos, tamanho_lote=50, tentativas=5):
+    """busca varios pontos da grade em vários anos com poucas requisições; devolve {ano: [resultado por ponto]}
+
+    Cada ponto é levado para a sua célula da malha nativa; o resultado traz a
+    coordenada da célula, que é onde o dado foi de fato amostrado.
+    """
+    celulas = [ponto_malha(lat, lon) for lat, lon in pontos]
+    tabelas = _completar_pontos(celulas, anos, VARIAVEIS_PONTO, "diario", _derivar_ponto, tamanho_lote, tentativas)
+    resultados = {
+        chave: (chave[0], {"temp": df["temp"].mean()})
+        for chave, df in tabelas.items() if df is not None
+    }
+    return {ano: [resultados.get((c, ano)) for c in celulas] for ano in anos}
+
+@coalescer
+def buscar_dados_pontos_lote(pontos, ano, tamanho_lote=50, tentativas=5):
+    """busca varios pontos da grade com poucas requisições (a API aceita listas de latitude/longitude)"""
+    return buscar_dados_pontos_anos(pontos, [ano], tamanho_lote=tamanho_lote, tentativas=tentativas)[ano]
+
+def buscar_dados_ponto(lat, lon, ano, tentativas=5):
+    return buscar_dados_pontos_lote([(lat, lon)], ano, tentativas=tentativas)[0]
+
+def pontos_mapa_temperatura(lat_c, lon_c, passo=1.25):
+    """grade de amostragem (±5°, ~10x10) usada pelo mapa de temperatura, alinhada à malha global"""
+    return pontos_malha(lat_c, lon_c, 5, passo)
+
+def extensao_mapa_temperatura(lat_c, lon_c):
+    return [lon_c - 5, lon_c + 5, lat_c - 5, lat_c + 5]
+
+def extensao_mapa_vento(lat_centro, lon_centro):
+    return [lon_centro - 2, lon_centro + 2, lat_centro - 2, lat_centro + 2]
+
+def calcular_vetor(df_vento):
+    ang_rad = np.deg2rad(df_vento['direcao'])
+    df_vento['u'] = -df_vento['velocidade'] * np.sin(ang_rad)
+    df_vento['v'] = -df_vento['velocidade'] * np.cos(ang_rad)
+    return df_vento
+
+def gerar_grade(lat_centro, lon_centro, n=5, passo=0.5):
+    """os 5 × 5 pontos do mapa de vento (±1° em volta do centro), alinhados à malha global"""
+    return pontos_centrados(lat_centro, lon_centro, n, passo)
+
+def agrupar_por_direcao(df):
+    """u/v médios por setor de 60° de uma série horária (DataFrame com velocidade, direcao, lat, lon)"""
+    if df.empty:
+        return pd.DataFrame(columns=['u', 'v', 'lat', 'lon'])
+    return medias_setores(somar_setores(df['velocidade'], df['direcao']), df['lat'].iloc[0], df['lon'].iloc[0])
+
+# a série horária bruta só é guardada se pedida (ex. para outras análises); o mapa usa só os setores
+GUARDAR_VENTO_HORARIO = os.environ.get("CLIMAZIN_VENTO_HORARIO", "0") == "1"
+
+def _arrays_horarios(dados_ponto):
+    """tempo (datetime64[m]), velocidade e direção (float32) do bloco 'hourly' de um ponto, soltando as listas do JSON"""
+    serie = (dados_ponto or {}).get('hourly')
+    if not serie or not serie.get('time'):
+        return None
+    tempo = np.array(serie.pop('time'), dtype='datetime64[m]')
+    vazio = [None] * len(tempo)
+    velocidade = np.array(serie.pop(VARIAVEIS_HORARIAS['velocidade'], vazio), dtype=np.float32)
+    direcao = np.array(serie.pop(VARIAVEIS_HORARIAS['direcao'], vazio), dtype=np.float32)
+    return tempo, velocidade, direcao
+
+def _ler_setores(celula, ano):
+    """(setores, cobertura) em cache; uma tabela horária antiga vira setores na primeira leitura"""
+    base = arquivo_ponto(*celula, ano, "setores")
+    if tabela_existe(base):
+        return ler_tabela(base), ler_cobertura(base)
+
+    base_horaria = arquivo_ponto(*celula, ano, "vento")
+    if not tabela_existe(base_horaria):
+        return None, None
+    df_vento = ler_tabela(base_horaria, colunas_data=['hora'])
+    cobertura = ler_cobertura(base_horaria, df_vento, VARIAVEIS_HORARIAS, "hora")
+    if cobertura is None:
+        return None, None
+    completas = df_vento['hora'] < pd.Timestamp(cobertura["fim"] + dt.timedelta(days=1))
+    setores = somar_setores(df_vento.loc[completas, 'velocidade'], df_vento.loc[completas, 'direcao'])
+    salvar_tabela(setores, base)
+    salvar_cobertura(base, cobertura)
+    return setores, cobertura
+
+def _guardar_horario(celula, ano, tempo, velocidade, direcao):
+    """acrescenta as horas recebidas à tabela horária bruta do ponto (só com GUARDAR_VENTO_HORARIO)"""
+    base = arquivo_ponto(*celula, ano, "vento")
+    novo = pd.DataFrame({"hora": tempo.astype('datetime64[ns]'), "velocidade": velocidade, "direcao": direcao})
+    df_vento = ler_tabela(base, colunas_data=['hora']) if tabela_existe(base) else None
+    df_vento = mesclar(df_vento, novo, "hora")
+    if df_vento.empty:
+        return
+    df_vento = calcular_vetor(df_vento.assign(lat=celula[0], lon=celula[1]))
+    salvar_tabela(df_vento, base)
+    registrar(base, df_vento, VARIAVEIS_HORARIAS, "hora")
+
+def _completar_setores(celulas, anos, tamanho_lote, tentativas):
+    """setores de vento (somas por direção) de várias células e anos: devolve {(celula, ano): setores ou None}
+
+    O horário de cada resposta vira arrays float32, é reduzido aos setores numa
+    passada e descartado; só os dias completos ainda não somados entram, para
+    que acrescentar dias novos nunca conte a mesma hora duas vezes.
+    """
+    setores = {}
+    coberturas = {}
+    pendentes = {}
+    for celula in dict.fromkeys(celulas):
+        pendentes[celula] = []
+        for ano in anos:
+            setores[celula, ano], coberturas[celula, ano] = _ler_setores(celula, ano)
+            periodo = periodo_ano(ano)
+            if periodo is not None:
+                pedidos = pendencias(coberturas[celula, ano], periodo, VARIAVEIS_HORARIAS)
+                cache("vento", not pedidos)
+                pendentes[celula] += pedidos
+
+    consultados = set()
+    alterados = set()
+    for celula, inicio, fim, _, dados_ponto in _buscar_lotes(_pedidos_pontos(pendentes, "hourly"), "hourly", tamanho_lote, tentativas):
+        consultados.update((celula, ano) for ano in range(inicio.year, fim.year + 1))
+        arrays = _arrays_horarios(dados_ponto)
+        if arrays is None:
+            print(f"Dados de vento não encontrados para o ponto {celula}.")
+            continue
+        tempo, velocidade, direcao = arrays
+        validas = ~(np.isnan(velocidade) | np.isnan(direcao))
+        if not validas.any():
+            continue
+        # último dia completo: a hora seguinte à última válida cai no dia seguinte
+        ultimo_dia = (tempo[validas].max() + np.timedelta64(1, 'h')).astype('datetime64[D]') - np.timedelta64(1, 'D')
+        dias = tempo.astype('datetime64[D]')
+        anos_tempo = tempo.astype('datetime64[Y]').astype(int) + 1970
+
+        for ano in np.unique(anos_tempo).tolist():
+            if (celula, ano) not in setores:
+                continue
+            cobertura = coberturas[celula, ano]
+            novas = (anos_tempo == ano) & validas & (dias <= ultimo_dia)
+            if cobertura is not None:
+                ja_somadas = (dias >= np.datetime64(cobertura["inicio"])) & (dias <= np.datetime64(cobertura["fim"]))
+                novas &= ~ja_somadas
+            if not novas.any():
+                continue
+            if GUARDAR_VENTO_HORARIO:
+                _guardar_horario(celula, ano, tempo[novas], velocidade[novas], direcao[novas])
+
+            setores[celula, ano] = juntar_setores(setores[celula, ano], somar_setores(velocidade[novas], direcao[novas]))
+            inicio_novo = dias[novas].min().astype(object)
+            fim_novo = dias[novas].max().astype(object)
+            coberturas[celula, ano] = {
+                "inicio": min(inicio_novo, cobertura["inicio"]) if cobertura else inicio_novo,
+                "fim": max(fim_novo, cobertura["fim"]) if cobertura else fim_novo,
+                "variaveis": list(VARIAVEIS_HORARIAS),
+                "verificado": None,
+            }
+            alterados.add((celula, ano))
+
+    for (celula, ano), tabela in setores.items():
+        base = arquivo_ponto(*celula, ano, "setores")
+        if (celula, ano) in alterados:
+            salvar_tabela(tabela, base)
+        if (celula, ano) in consultados and coberturas[celula, ano] is not None:
+            salvar_cobertura(base, dict(coberturas[celula, ano], verificado=dt.datetime.now()))
+    return setores
+
+@medido()
+@coalescer
+def buscar_dados_vento_pontos_anos(pontos, anos, tamanho_lote=6, tentativas=5):
+    """setores de vento de várias células em vários anos; devolve {ano: [setores ou None por ponto]}
+
+    O horário é ~24x mais pesado que o diário, então os lotes têm poucas
+    coordenadas e cada pedido cobre no máximo ANOS_POR_PEDIDO['hourly'] anos.
+    Em cache ficam só as somas por setor (6 linhas por ponto e ano).
+    """
+    celulas = [ponto_malha(lat, lon) for lat, lon in pontos]
+    setores = _completar_setores(celulas, anos, tamanho_lote, tentativas)
+    return {
+        ano: [None if setores[c, ano] is None else medias_setores(setores[c, ano], *c) for c in celulas]
+        for ano in anos
+    }
+
+def buscar_dados_vento_ponto(lat, lon, ano):
+    """setores de vento de um ponto da malha; o cache horário é o mesmo para todas as cidades"""
+    return buscar_dados_vento_pontos_anos([(lat, lon)], [ano])[ano][0]
+
+def _juntar_setores(setores):
+    setores = [s for s in setores if s is not None]
+    return pd.concat(setores, ignore_index=True) if setores else pd.DataFrame(columns=['u', 'v', 'lat', 'lon'])
+
+@medido()
+@coalescer
+def coletar_grade_vento_anos(cidade, anos, max_trabalhadores=8):
+    """grade de vento da cidade em vários anos (ex. backfill); devolve {ano: df_grade}"""
+    lat_centro, lon_centro = obter_coordenadas(cidade)
+    pontos = gerar_grade(lat_centro, lon_centro)
+    lotes = [pontos[i:i + 6] for i in range(0, len(pontos), 6)]
+    por_ano = {ano: [] for ano in anos}
+
+    # os lotes de pontos são baixados em paralelo pela sessão compartilhada (rede.sessao);
+    # o limitador de taxa continua valendo para todas as threads
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_trabalhadores) as executor:
+        futuros = {executor.submit(buscar_dados_vento_pontos_anos, lote, anos): lote for lote in lotes}
+        for futuro in concurrent.futures.as_completed(futuros):
+            try:
+                for ano, setores in futuro.result().items():
+                    por_ano[ano] += setores
+            except Exception as e:
+                print(f"Erro nos pontos {futuros[futuro]}: {e}")
+    return {ano: _juntar_setores(setores) for ano, setores in por_ano.items()}
+
+@coalescer
+def coletar_grade_vento(cidade, ano, max_trabalhadores=8):
+    return coletar_grade_vento_anos(cidade, [ano], max_trabalhadores=max_trabalhadores)[ano]
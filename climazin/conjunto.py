@@ -0,0 +1,226 @@
+# o cache diário de todas as cidades visto como uma tabela só, particionada por
+# cidade e ano (dados/<Cidade>/<ano>/dados_<Cidade>_<ano>). Filtros por cidade, ano e
+# data são aplicados antes de abrir as partições, e as contas (médias anuais,
+# extremos, chuva, anomalias) são feitas numa passada vetorizada sobre o resultado.
+# Só lê o que já está em disco: nada aqui vai à API (para isso, prefetch.py).
+import os
+import threading
+from collections import OrderedDict
+import numpy as np # dados
+import pandas as pd # dados
+from cidades import cidades as CAPITAIS
+from armazenamento import DIRETORIO_DADOS, obter_armazenamento, tabela_existe, ler_tabela
+from metricas import etapa, cache
+
+COLUNAS = ("temp", "temp_max", "temp_min", "precipitacao")
+MIN_DIAS_ANO = 330 # anos com menos dias em cache ficam fora das normais e das anomalias
+MM_DIA_CHUVA = 1.0 # dia de chuva: precipitação de pelo menos 1 mm
+MAX_MEMORIA = 16 # resumos anuais guardados em memória
+
+_memoria = OrderedDict()
+_trava = threading.Lock()
+
+
+def _pasta(cidade):
+    return cidade.replace(" ", "_")
+
+
+def _base(cidade, ano):
+    """mesmo caminho de coleta._arquivo_clima"""
+    return os.path.join(DIRETORIO_DADOS, _pasta(cidade), str(ano), f"dados_{_pasta(cidade)}_{ano}")
+
+
+def particoes(cidades=None, anos=None, inicio=None, fim=None):
+    """[(cidade, ano, base)] das tabelas diárias em cache que passam pelos filtros, sem abrir nenhuma
+
+    `inicio`/`fim` (datas) também filtram partições: só entram os anos que tocam o período.
+    """
+    if not os.path.isdir(DIRETORIO_DADOS):
+        return []
+    if cidades is None:
+        nomes = {_pasta(c): c for c in CAPITAIS}
+        cidades = [nomes.get(p, p.replace("_", " ")) for p in sorted(os.listdir(DIRETORIO_DADOS))]
+    anos = set(anos) if anos is not None else None
+    primeiro = pd.Timestamp(inicio).year if inicio is not None else None
+    ultimo = pd.Timestamp(fim).year if fim is not None else None
+
+    encontradas = []
+    for cidade in cidades:
+        pasta = os.path.join(DIRETORIO_DADOS, _pasta(cidade))
+        if not os.path.isdir(pasta):
+            continue
+        for ano in sorted(int(n) for n in os.listdir(pasta) if n.isdigit()):
+            if ((anos is not None and ano not in anos) or (primeiro is not None and ano < primeiro)
+                    or (ultimo is not None and ano > ultimo)):
+                continue
+            base = _base(cidade, ano)
+            if tabela_existe(base):
+                encontradas.append((cidade, ano, base))
+    return encontradas
+
+
+def _ler(encontradas, colunas, inicio=None, fim=None):
+    inicio = pd.Timestamp(inicio) if inicio is not None else None
+    fim = pd.Timestamp(fim) if fim is not None else None
+    for cidade, ano, base in encontradas:
+        df = ler_tabela(base, colunas_data=["date"])
+        df = df[["date", *[c for c in colunas if c in df.columns]]]
+        if inicio is not None or fim is not None:
+            mascara = np.ones(len(df), dtype=bool)
+            if inicio is not None:
+                mascara &= (df["date"] >= inicio).to_numpy()
+            if fim is not None:
+                mascara &= (df["date"] <= fim).to_numpy()
+            df = df[mascara]
+        yield cidade, ano, df
+
+
+def escanear(colunas=COLUNAS, cidades=None, anos=None, inicio=None, fim=None):
+    """gera (cidade, ano, df) partição a partição, só com `date` e as `colunas` pedidas
+
+    Com o backend colunar sem compressão (CLIMAZIN_ARMAZENAMENTO=colunar) as
+    tabelas vêm por memory-map, então colunas que não foram pedidas nunca saem
+    do disco. `inicio`/`fim` cortam as linhas das
+    partições das pontas.
+    """
+    return _ler(particoes(cidades, anos, inicio, fim), colunas, inicio, fim)
+
+
+def _juntar(partes, colunas):
+    nomes, codigos, anos_linhas, datas, valores = {}, [], [], [], {c: [] for c in colunas}
+    for cidade, ano, df in partes:
+        codigo = nomes.setdefault(cidade, len(nomes))
+        codigos.append(np.full(len(df), codigo, dtype=np.int16))
+        anos_linhas.append(np.full(len(df), ano, dtype=np.int16))
+        datas.append(df["date"].to_numpy(dtype="datetime64[ns]"))
+        for c in colunas:
+            # colunas ausentes em caches antigos viram NaN
+            valores[c].append(df[c].to_numpy(dtype=np.float32, na_value=np.nan) if c in df.columns
+                              else np.full(len(df), np.nan, dtype=np.float32))
+    juntar = lambda arrays, dtype: np.concatenate(arrays) if arrays else np.array([], dtype=dtype)
+    return pd.DataFrame({
+        "cidade": pd.Categorical.from_codes(juntar(codigos, np.int16), categories=list(nomes)),
+        "ano": juntar(anos_linhas, np.int16),
+        "date": juntar(datas, "datetime64[ns]"),
+        **{c: juntar(valores[c], np.float32) for c in colunas},
+    })
+
+
+def tabela(colunas=COLUNAS, cidades=None, anos=None, inicio=None, fim=None):
+    """as partições filtradas numa tabela longa: cidade (categórica), ano, date e as colunas pedidas"""
+    return _juntar(escanear(colunas, cidades, anos, inicio, fim), colunas)
+
+
+def _linhas_extremas(df, chaves, coluna, funcao):
+    """rótulo da linha com o máximo ("idxmax") ou mínimo ("idxmin") de `coluna` em cada grupo; grupos sem valor ficam de fora"""
+    validos = df[df[coluna].notna()]
+    return getattr(validos.groupby(chaves, observed=True)[coluna], funcao)()
+
+
+def calcular_resumo_anual(df):
+    """uma linha por (cidade, ano): médias, extremos com a data, chuva total e dias de chuva"""
+    chaves = [df["cidade"], df["ano"]]
+    grupos = df.groupby(chaves, observed=True)
+    resumo = pd.DataFrame({
+        "dias": grupos.size(),
+        "temp_media": grupos["temp"].mean(),
+        "temp_max": grupos["temp_max"].max(),
+        "temp_min": grupos["temp_min"].min(),
+        "precipitacao": grupos["precipitacao"].sum(min_count=1),
+        "dias_chuva": (df["precipitacao"] >= MM_DIA_CHUVA).groupby(chaves, observed=True).sum(),
+    })
+    for coluna, funcao in (("temp_max", "idxmax"), ("temp_min", "idxmin")):
+        linhas = _linhas_extremas(df, ["cidade", "ano"], coluna, funcao)
+        resumo[f"dia_{coluna}"] = df.loc[linhas.to_numpy(), "date"].set_axis(linhas.index)
+    resumo["completo"] = resumo["dias"] >= MIN_DIAS_ANO
+    return resumo.reset_index()
+
+
+def resumo_anual(cidades=None, anos=None):
+    """resumo anual de todas as partições em cache que passam pelos filtros
+
+    O resultado fica em memória e só é recalculado quando alguma partição
+    envolvida for regravada (a chave inclui a versão de cada arquivo).
+    """
+    encontradas = particoes(cidades, anos)
+    armazenamento = obter_armazenamento()
+    chave = tuple((base, armazenamento.versao(base)) for _, _, base in encontradas)
+    with _trava:
+        if chave in _memoria:
+            _memoria.move_to_end(chave)
+            cache("conjunto", True)
+            return _memoria[chave].copy()
+    cache("conjunto", False)
+
+    with etapa("conjunto.resumo_anual", particoes=len(encontradas)):
+        resumo = calcular_resumo_anual(_juntar(_ler(encontradas, COLUNAS), COLUNAS))
+    with _trava:
+        _memoria[chave] = resumo
+        while len(_memoria) > MAX_MEMORIA:
+            _memoria.popitem(last=False)
+    return resumo.copy()
+
+
+def anomalias(resumo, referencia=None):
+    """acrescenta ao resumo a anomalia de temperatura (°C) e a chuva em % da normal de cada cidade
+
+    A normal é a média dos anos completos dentro de `referencia` (anos inicial e
+    final, inclusive; padrão: todos os anos completos do resumo).
+    """
+    base = resumo[resumo["completo"]]
+    if referencia is not None:
+        base = base[base["ano"].between(*referencia)]
+    normais = base.groupby("cidade", observed=True)[["temp_media", "precipitacao"]].mean()
+    normais = normais.reindex(resumo["cidade"]).to_numpy()
+    resumo = resumo.assign(
+        normal_temp=normais[:, 0],
+        normal_precipitacao=normais[:, 1],
+    )
+    resumo["anomalia_temp"] = (resumo["temp_media"] - resumo["normal_temp"]).where(resumo["completo"])
+    resumo["precipitacao_pct_normal"] = (100 * resumo["precipitacao"] / resumo["normal_precipitacao"]).where(resumo["completo"])
+    return resumo
+
+
+def extremos(resumo):
+    """por cidade: recordes diários com a data, anos mais quente e mais frio, mais chuvoso e mais seco"""
+    linhas_max = _linhas_extremas(resumo, "cidade", "temp_max", "idxmax")
+    linhas_min = _linhas_extremas(resumo, "cidade", "temp_min", "idxmin")
+    tabela_extremos = pd.DataFrame({
+        "recorde_max": resumo.loc[linhas_max.to_numpy(), "temp_max"].set_axis(linhas_max.index),
+        "dia_recorde_max": resumo.loc[linhas_max.to_numpy(), "dia_temp_max"].set_axis(linhas_max.index),
+        "recorde_min": resumo.loc[linhas_min.to_numpy(), "temp_min"].set_axis(linhas_min.index),
+        "dia_recorde_min": resumo.loc[linhas_min.to_numpy(), "dia_temp_min"].set_axis(linhas_min.index),
+    })
+    completos = resumo[resumo["completo"]]
+    for coluna, nome, funcao in (("temp_media", "ano_mais_quente", "idxmax"), ("temp_media", "ano_mais_frio", "idxmin"),
+                                 ("precipitacao", "ano_mais_chuvoso", "idxmax"), ("precipitacao", "ano_mais_seco", "idxmin")):
+        linhas = _linhas_extremas(completos, "cidade", coluna, funcao)
+        tabela_extremos[nome] = completos.loc[linhas.to_numpy(), "ano"].set_axis(linhas.index).astype("Int64")
+    return tabela_extremos.reset_index()
+
+
+def tendencia(resumo, coluna="temp_media"):
+    """inclinação por década (mínimos quadrados) de `coluna` nos anos completos de cada cidade"""
+    completos = resumo[resumo["completo"] & resumo[coluna].notna()]
+    x = completos["ano"].astype(float)
+    y = completos[coluna].astype(float)
+    grupos = completos["cidade"]
+    # regressão simples para todas as cidades de uma vez: cov(x, y) / var(x) por grupo
+    dx = x - x.groupby(grupos, observed=True).transform("mean")
+    dy = y - y.groupby(grupos, observed=True).transform("mean")
+    soma_xy = (dx * dy).groupby(grupos, observed=True).sum()
+    soma_xx = (dx * dx).groupby(grupos, observed=True).sum()
+    anos_usados = x.groupby(grupos, observed=True).size()
+    inclinacao = (10 * soma_xy / soma_xx.where(soma_xx > 0)).where(anos_usados >= 3)
+    return pd.DataFrame({"anos": anos_usados, "por_decada": inclinacao}).reset_index()
+
+
+def panorama_capitais(ano, referencia=None):
+    """uma linha por capital com dados no `ano`: resumo e anomalias em relação às normais"""
+    resumo = anomalias(resumo_anual(CAPITAIS), referencia)
+    return resumo[resumo["ano"] == ano].reset_index(drop=True)
+
+
+def serie_anual(cidade, referencia=None):
+    """resumo e anomalias da cidade em todos os anos em cache"""
+    return anomalias(resumo_anual([cidade]), referencia).reset_index(drop=True)
@@ -0,0 +1,94 @@
+import os
+import json
+import threading # várias sessões do Shiny consultam o mesmo índice
+from functools import lru_cache
+from cidades import cidades
+from armazenamento import DIRETORIO_DADOS, escrita_atomica
+from rede import sessao, TIMEOUT
+from metricas import etapa, cache
+
+URL_GEOCODING = os.environ.get("CLIMAZIN_URL_GEOCODING", "https://geocoding-api.open-meteo.com/v1/search")
+ARQUIVO_INDICE = os.path.join(DIRETORIO_DADOS, "geocodificacao.json")
+
+
+class IndiceGeocodificacao:
+    """Índice cidade -> (lat, lon) persistido em disco, com uma LRU em memória na frente.
+
+    A API de geocoding só é chamada na primeira vez que uma cidade aparece;
+    depois disso a coordenada vem do arquivo (entre processos) ou da LRU.
+    """
+
+    def __init__(self, arquivo=ARQUIVO_INDICE, tamanho_lru=256):
+        self.arquivo = arquivo
+        self.consultas_api = 0
+        self._indice = None  # carregado do disco no primeiro uso
+        self._trava = threading.Lock()
+        self._travas_cidade = {}
+        self._lru = lru_cache(maxsize=tamanho_lru)(self._resolver)
+
+    def _carregar(self):
+        if self._indice is None:
+            try:
+                with open(self.arquivo, encoding="utf-8") as f:
+                    self._indice = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._indice = {}
+        return self._indice
+
+    def _salvar(self):
+        os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+        with escrita_atomica(self.arquivo) as temporario:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self._indice, f, ensure_ascii=False, indent=1)
+
+    def _consultar_api(self, cidade):
+        with etapa("geocodificacao.api", cidade=cidade):
+            res = sessao.get(URL_GEOCODING, params={"name": cidade, "count": 1}, timeout=TIMEOUT)
+        res.raise_for_status()
+        dados = res.json()
+        if not dados.get('results'):
+            raise ValueError("Nenhuma coordenada encontrada para a cidade.")
+        self.consultas_api += 1
+        return dados['results'][0]['latitude'], dados['results'][0]['longitude']
+
+    def _resolver(self, cidade):
+        with self._trava:
+            coordenada = self._carregar().get(cidade)
+            if coordenada is not None:
+                cache("geocodificacao", True)  # conta só o índice; os acertos da LRU em memória não passam por aqui
+                return tuple(coordenada)
+            trava_cidade = self._travas_cidade.setdefault(cidade, threading.Lock())
+
+        # só uma thread consulta a API por cidade; as outras esperam e leem o índice
+        with trava_cidade:
+            with self._trava:
+                coordenada = self._carregar().get(cidade)
+            if coordenada is not None:
+                return tuple(coordenada)
+
+            cache("geocodificacao", False)
+            lat, lon = self._consultar_api(cidade)
+            with self._trava:
+                self._carregar()[cidade] = [lat, lon]
+                self._salvar()
+            return lat, lon
+
+    def coordenadas(self, cidade):
+        return self._lru(cidade)
+
+    def esquecer(self):
+        """descarta o que está em memória (LRU e índice carregado); o arquivo não é tocado"""
+        with self._trava:
+            self._lru.cache_clear()
+            self._indice = None
+
+    def semear(self, lista_cidades=cidades):
+        """Preenche o índice com todas as capitais de cidades.py (só consulta as que faltam)"""
+        for cidade in lista_cidades:
+            try:
+                self.coordenadas(cidade)
+            except Exception as e:
+                print(f"Erro ao geocodificar {cidade}: {e}")
+
+
+indice_geocodificacao = IndiceGeocodificacao()
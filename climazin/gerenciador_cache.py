@@ -0,0 +1,353 @@
+# cota de disco para o cache em dados/ (rodar dentro de climazin/ para uma limpeza avulsa):
+#   python -m gerenciador_cache --cota 2048 --simular
+# o cache tem três camadas: dados brutos (tabelas diárias, pontos, setores de vento),
+# agregados (tabelas mensais, derivadas dos diários da cidade) e PNGs dos mapas
+# (derivados das tabelas de pontos, listadas em <png>.dependencias.json). Quando o
+# uso passa da cota, as entradas menos usadas (LRU pelo último acesso, ou LFU pela
+# contagem de acessos) são apagadas até sobrar folga; uma fonte conta como usada
+# enquanto algo derivado dela for usado, e leva junto o que deriva dela ao sair.
+import os
+import json
+import time
+import atexit
+import argparse
+import threading
+from armazenamento import DIRETORIO_DADOS, escrita_atomica, observar, remover_tabela, remover_pastas_vazias, memoria_tabelas
+from metricas import contar, metricas
+
+COTA_MB = float(os.environ.get("CLIMAZIN_COTA_CACHE_MB", "2048")) # 0 = sem limite
+POLITICA = os.environ.get("CLIMAZIN_POLITICA_CACHE", "lru") # "lru" ou "lfu"
+MARCA_BAIXA = 0.9 # a limpeza vai até 90% da cota, para não rodar a cada gravação
+PROTECAO = 600 # entradas acessadas nos últimos 10 min nunca saem (podem estar em uso)
+INTERVALO_ACESSO = 60 # o último acesso em disco é atualizado no máximo uma vez por minuto por entrada
+
+CAMADAS = ("png", "agregado", "bruto") # ordem de saída em caso de empate: o derivado sai antes da fonte
+# fora da cota: fundos do Natural Earth, índices e estado do app
+PROTEGIDOS = {"cache_mapas_base", "geocodificacao.json", "prefetch_estado.json", "cache_frequencia.json"}
+SUFIXO_COBERTURA = ".cobertura.json"
+SUFIXO_DEPENDENCIAS = ".dependencias.json"
+
+
+class Entrada:
+    """uma tabela ou PNG do cache com os arquivos que saem junto com ela"""
+
+    def __init__(self, chave, camada):
+        self.chave = chave # base da tabela (sem extensão) ou caminho do PNG
+        self.camada = camada
+        self.arquivos = [] # arquivos e pastas .col, sidecars incluídos
+        self.bytes = 0
+        self.tamanhos = {} # arquivo -> bytes na varredura
+        self.acesso = 0.0
+        self.fontes = []
+
+
+def _tamanho(caminho):
+    if os.path.isdir(caminho):
+        return sum(e.stat().st_size for e in os.scandir(caminho) if e.is_file())
+    return os.path.getsize(caminho)
+
+
+def _marcador(caminho):
+    """arquivo cujo horário de acesso representa a entrada (numa .col, o esquema)"""
+    if caminho.endswith(".col"):
+        return os.path.join(caminho, "_esquema.json")
+    return caminho
+
+
+def _chave(caminho):
+    """entrada a que um arquivo pertence, ou None se não for do cache"""
+    for sufixo in (".col", ".npz", ".csv", SUFIXO_COBERTURA):
+        if caminho.endswith(sufixo):
+            return caminho[:-len(sufixo)]
+    if caminho.endswith(SUFIXO_DEPENDENCIAS):
+        return caminho[:-len(SUFIXO_DEPENDENCIAS)]
+    if caminho.endswith(".png"):
+        return caminho
+    return None
+
+
+def _camada(chave):
+    if chave.endswith(".png"):
+        return "png"
+    if os.path.basename(chave).startswith("mensal_"):
+        return "agregado"
+    return "bruto"
+
+
+class GerenciadorCache:
+    """Cota de disco do cache com saída por LRU/LFU ciente das dependências.
+
+    O uso é estimado a cada gravação (sem varrer a árvore); só quando passa da
+    cota a árvore é varrida de verdade e a limpeza roda, numa thread à parte.
+    O último acesso fica no atime do arquivo (os processos do pool veem o mesmo);
+    as contagens do LFU são somadas em cache_frequencia.json a cada limpeza.
+    """
+
+    def __init__(self, raiz=DIRETORIO_DADOS, cota_mb=COTA_MB, politica=POLITICA):
+        self.raiz = raiz
+        self.cota = int(cota_mb * 2**20)
+        self.politica = politica
+        self.arquivo_frequencia = os.path.join(raiz, "cache_frequencia.json")
+        self._estimativa = None # bytes em uso, conhecido depois da primeira varredura
+        self._tamanhos = {} # caminho gravado -> bytes que ele já soma na estimativa
+        self._ultimo_acesso = {}
+        self._frequencia = {} # acessos deste processo ainda não somados ao arquivo
+        self._trava = threading.Lock()
+        self._trava_limpeza = threading.Lock()
+        self.ultima_limpeza = None
+
+    # chamados por armazenamento.ler_tabela/salvar_tabela e pelos geradores de PNG
+
+    def acessou(self, caminho):
+        agora = time.time()
+        with self._trava:
+            if self.politica == "lfu":
+                self._frequencia[caminho] = self._frequencia.get(caminho, 0) + 1
+            if agora - self._ultimo_acesso.get(caminho, 0) < INTERVALO_ACESSO:
+                return
+            self._ultimo_acesso[caminho] = agora
+        try:
+            # só o atime: o mtime diz quando o dado foi gerado (cobertura.em_dia)
+            os.utime(_marcador(caminho), (agora, os.stat(_marcador(caminho)).st_mtime))
+        except OSError:
+            pass
+
+    def gravou(self, caminho):
+        if self.cota <= 0:
+            return
+        try:
+            tamanho = _tamanho(caminho)
+        except OSError:
+            return
+        with self._trava:
+            self._ultimo_acesso[caminho] = time.time()
+            # uma regravação soma só a diferença para a versão que ela substituiu
+            anterior = self._tamanhos.get(caminho, 0)
+            self._tamanhos[caminho] = tamanho
+            if self._estimativa is not None:
+                self._estimativa += tamanho - anterior
+            passou = self._estimativa is None or self._estimativa > self.cota
+        if passou and not self._trava_limpeza.locked():
+            threading.Thread(target=self.limpar, daemon=True).start()
+
+    def removeu(self, caminho):
+        """o arquivo saiu do disco fora da limpeza (ex. tabela apagada ou convertida): deixa de contar no uso"""
+        with self._trava:
+            tamanho = self._tamanhos.pop(caminho, 0)
+            if self._estimativa is not None:
+                self._estimativa -= tamanho
+            self._ultimo_acesso.pop(caminho, None)
+            self._frequencia.pop(caminho, None)
+
+    def registrar_derivado(self, caminho, fontes):
+        """grava as fontes (bases de tabela) de um arquivo derivado e conta o arquivo na cota"""
+        relativas = sorted({os.path.relpath(f, self.raiz) for f in fontes})
+        with escrita_atomica(caminho + SUFIXO_DEPENDENCIAS) as temporario:
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(relativas, f)
+        self.gravou(caminho)
+
+    # varredura e limpeza
+
+    def varrer(self):
+        """{chave: Entrada} de tudo que está sob a cota"""
+        entradas = {}
+        for pasta, subpastas, arquivos in os.walk(self.raiz):
+            if os.path.abspath(pasta) == os.path.abspath(self.raiz):
+                subpastas[:] = [p for p in subpastas if p not in PROTEGIDOS]
+                arquivos = [a for a in arquivos if a not in PROTEGIDOS]
+            colunares = [p for p in subpastas if p.endswith(".col")]
+            subpastas[:] = [p for p in subpastas if not p.endswith(".col")]
+            for nome in colunares + arquivos:
+                if ".tmp-" in nome:
+                    continue
+                caminho = os.path.join(pasta, nome)
+                chave = _chave(caminho)
+                if chave is None:
+                    continue
+                entrada = entradas.get(chave)
+                if entrada is None:
+                    entrada = entradas[chave] = Entrada(chave, _camada(chave))
+                try:
+                    tamanho = _tamanho(caminho)
+                    entrada.bytes += tamanho
+                    entrada.tamanhos[caminho] = tamanho
+                    entrada.arquivos.append(caminho)
+                    if not caminho.endswith((SUFIXO_COBERTURA, SUFIXO_DEPENDENCIAS)):
+                        entrada.acesso = max(entrada.acesso, os.stat(_marcador(caminho)).st_atime)
+                except OSError:
+                    pass  # sumiu durante a varredura ou ficou sem esquema; sai como se nunca tivesse sido lida
+
+        for entrada in entradas.values():
+            if entrada.camada == "agregado":
+                pasta, nome = os.path.split(entrada.chave)
+                entrada.fontes = [os.path.join(pasta, "dados_" + nome[len("mensal_"):])]
+            elif entrada.camada == "png" and os.path.exists(entrada.chave + SUFIXO_DEPENDENCIAS):
+                try:
+                    with open(entrada.chave + SUFIXO_DEPENDENCIAS, encoding="utf-8") as f:
+                        entrada.fontes = [os.path.join(self.raiz, r) for r in json.load(f)]
+                except (OSError, json.JSONDecodeError):
+                    pass
+        return entradas
+
+    def _somar_frequencias(self, entradas, gravar=True):
+        """junta as contagens deste processo ao arquivo, envelhece (metade a cada limpeza) e devolve {chave: acessos}"""
+        if self.politica != "lfu":
+            return {}
+        with self._trava:
+            locais, self._frequencia = self._frequencia, {}
+        try:
+            with open(self.arquivo_frequencia, encoding="utf-8") as f:
+                salvas = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            salvas = {}
+        for caminho, n in locais.items():
+            chave = _chave(caminho)
+            if chave is not None:
+                relativa = os.path.relpath(chave, self.raiz)
+                salvas[relativa] = salvas.get(relativa, 0) + n
+        existentes = {os.path.relpath(chave, self.raiz) for chave in entradas}
+        if gravar:
+            frequencias = {r: n / 2 for r, n in salvas.items() if r in existentes and n >= 1}
+            os.makedirs(self.raiz, exist_ok=True)
+            with escrita_atomica(self.arquivo_frequencia) as temporario:
+                with open(temporario, "w", encoding="utf-8") as f:
+                    json.dump(frequencias, f)
+        return {os.path.join(self.raiz, r): n for r, n in salvas.items()}
+
+    def _valor(self, entrada, frequencias):
+        if self.politica == "lfu":
+            return (frequencias.get(entrada.chave, 0), entrada.acesso)
+        return (entrada.acesso,)
+
+    def limpar(self, cota=None, simular=False):
+        """apaga entradas até o uso ficar abaixo de MARCA_BAIXA da cota; devolve as entradas apagadas"""
+        cota = self.cota if cota is None else int(cota)
+        with self._trava_limpeza:
+            entradas = self.varrer()
+            uso = sum(e.bytes for e in entradas.values())
+            frequencias = self._somar_frequencias(entradas, gravar=not simular)
+            apagadas = []
+            if 0 < cota < uso:
+                dependentes = {}
+                for entrada in entradas.values():
+                    for fonte in entrada.fontes:
+                        dependentes.setdefault(fonte, []).append(entrada)
+
+                # uma fonte vale o mesmo que o seu derivado mais usado
+                valores = {}
+                for chave, entrada in entradas.items():
+                    valores[chave] = max([self._valor(entrada, frequencias)]
+                                         + [self._valor(d, frequencias) for d in dependentes.get(chave, [])])
+                # uma fonte também fica protegida enquanto algo derivado dela estiver (sairia junto)
+                limite_protecao = time.time() - PROTECAO
+                ultimo_uso = {chave: max([e.acesso] + [d.acesso for d in dependentes.get(chave, [])])
+                              for chave, e in entradas.items()}
+                candidatas = sorted(
+                    (e for e in entradas.values() if ultimo_uso[e.chave] < limite_protecao),
+                    key=lambda e: (valores[e.chave], CAMADAS.index(e.camada)),
+                )
+
+                alvo = int(cota * MARCA_BAIXA)
+                saiu = set()
+                for entrada in candidatas:
+                    if uso <= alvo:
+                        break
+                    if entrada.chave in saiu:
+                        continue
+                    for item in [entrada] + dependentes.get(entrada.chave, []):
+                        if item.chave in saiu:
+                            continue
+                        saiu.add(item.chave)
+                        apagadas.append(item)
+                        uso -= item.bytes
+                        if not simular:
+                            self._apagar(item)
+
+            if not simular:
+                with self._trava:
+                    self._estimativa = uso
+                    # a partir da varredura, cada arquivo regravado troca o tamanho conhecido pelo novo
+                    restantes = [e for e in entradas.values() if e not in apagadas]
+                    self._tamanhos = {caminho: tamanho for e in restantes for caminho, tamanho in e.tamanhos.items()}
+            self.ultima_limpeza = time.time()
+            return apagadas
+
+    def _apagar(self, entrada):
+        if entrada.camada == "png":
+            for caminho in (entrada.chave, entrada.chave + SUFIXO_DEPENDENCIAS):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        else:
+            remover_tabela(entrada.chave)  # o esquema sai primeiro: quem lê ao mesmo tempo vê a tabela como ausente
+            if os.path.exists(entrada.chave + SUFIXO_COBERTURA):
+                os.remove(entrada.chave + SUFIXO_COBERTURA)
+        remover_pastas_vazias(os.path.dirname(entrada.chave), self.raiz)
+        contar("cache_disco.despejos")
+        contar("cache_disco.bytes_liberados", entrada.bytes)
+
+    def medidas(self):
+        """estado deste processo, enviado junto com as métricas de cada job do pool"""
+        return {
+            "cache_disco.uso_estimado_mb": None if self._estimativa is None else round(self._estimativa / 2**20, 1),
+            "cache_disco.ultima_limpeza": self.ultima_limpeza,
+        }
+
+    def estatisticas(self, instantaneo=None):
+        """cota, uso e despejos somando todos os processos (a partir de metricas.instantaneo())
+
+        As tabelas são lidas e gravadas nos processos do pool; o processo do app só
+        vê o que eles mandam de volta junto com as métricas de cada job.
+        """
+        if instantaneo is None:
+            instantaneo = metricas.instantaneo()
+        medidas = list(instantaneo["medidas"].values()) # da mais antiga para a mais recente
+        contadores = instantaneo["contadores"]
+        usos = [m["cache_disco.uso_estimado_mb"] for m in medidas if m.get("cache_disco.uso_estimado_mb") is not None]
+        limpezas = [m["cache_disco.ultima_limpeza"] for m in medidas if m.get("cache_disco.ultima_limpeza")]
+        return {
+            "cota_mb": round(self.cota / 2**20, 1),
+            "uso_estimado_mb": usos[-1] if usos else None,
+            "politica": self.politica,
+            "despejos": contadores.get("cache_disco.despejos", 0),
+            "mb_liberados": round(contadores.get("cache_disco.bytes_liberados", 0) / 2**20, 1),
+            "ultima_limpeza": max(limpezas) if limpezas else None,
+            "memoria": {
+                "processos": sum(1 for m in medidas if "tabelas_memoria.tabelas" in m),
+                "tabelas": sum(m.get("tabelas_memoria.tabelas", 0) for m in medidas),
+                "mb": round(sum(m.get("tabelas_memoria.mb", 0) for m in medidas), 1),
+                "limite_mb_por_processo": round(memoria_tabelas.limite / 2**20, 1),
+            },
+        }
+
+    def salvar_frequencias(self):
+        """chamado na saída do processo, para as contagens do LFU não se perderem"""
+        if self._frequencia and os.path.isdir(self.raiz):
+            try:
+                self._somar_frequencias(self.varrer())
+            except OSError:
+                pass
+
+
+gerenciador = GerenciadorCache()
+observar(gerenciador)
+metricas.coletor(gerenciador.medidas)
+if POLITICA == "lfu":
+    atexit.register(gerenciador.salvar_frequencias)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica a cota de disco ao cache em dados/.")
+    parser.add_argument("--raiz", default=DIRETORIO_DADOS)
+    parser.add_argument("--cota", type=float, default=COTA_MB, help="cota em MB")
+    parser.add_argument("--politica", choices=["lru", "lfu"], default=POLITICA)
+    parser.add_argument("--simular", action="store_true", help="só lista o que sairia")
+    args = parser.parse_args()
+
+    gerenciador_avulso = GerenciadorCache(args.raiz, args.cota, args.politica)
+    entradas = gerenciador_avulso.varrer()
+    print(f"{len(entradas)} entradas, {sum(e.bytes for e in entradas.values()) / 2**20:.1f} MB")
+    apagadas = gerenciador_avulso.limpar(simular=args.simular)
+    for entrada in apagadas:
+        print(f"{'sairia' if args.simular else 'saiu'}: [{entrada.camada}] {entrada.chave} ({entrada.bytes / 2**10:.0f} KB)")
+    print(f"{len(apagadas)} entradas, {sum(e.bytes for e in apagadas) / 2**20:.1f} MB liberados")
@@ -0,0 +1,156 @@
+from matplotlib import cm 
+from renderizacao import nova_figura, liberar, figura_png
+from metricas import medido
+from coleta import buscar_dados_clima, obter_agregado_mensal
+from conjunto import panorama_capitais, serie_anual, tendencia
+
+def grafico_temperatura(df, cidade, ano):
+    """Gera gráfico de temperatura média mensal a partir da tabela de agregados (12 linhas)"""
+    mensal = obter_agregado_mensal(cidade, ano, df)
+    medias = mensal.set_index('mes')['temp_media'] # médias por mês já calculadas na ingestão
+    return desenhar_grafico_temperatura(medias, cidade, ano)
+
+@medido()
+def desenhar_grafico_temperatura(medias, cidade, ano):
+    """barras das médias mensais (índice = mês); quem recebe a figura chama liberar(fig)"""
+    # PROJECAO GRÁFICA -----
+    fig, ax = nova_figura(figsize=(6, 6)) # tamanho do gráfico de barra
+    colors = cm.coolwarm((medias - medias.min()) / (medias.max() - medias.min()))
+    ax.bar(medias.index, medias.values, color=colors) # define cores para as barras baseada na temperatura relativa pelo colormap coolwarm
+    ax.set_xticks(medias.index)  
+    ax.set_xticklabels(['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']) # no eixo x, vai ter os nomes dos meses (ticks)
+    ax.set_xlabel("Mês") # no eixo x, vai ter o nome mes
+    ax.set_ylabel("Temperatura Média (°C)") 
+    ax.set_title(f"Temperatura média mensal em {cidade} ({ano})")
+    ax.grid(axis='y')
+
+    return fig
+
+def grafico_chuva(df, cidade, ano):
+    """gera gráfico de precipitacao mensal a partir da tabela de agregados"""
+    mensal = obter_agregado_mensal(cidade, ano, df)
+
+    if 'precipitacao' not in mensal.columns:
+        raise ValueError("A coluna 'precipitacao' não está presente no DataFrame retornado.")
+    
+    return desenhar_grafico_chuva(mensal.set_index('mes')['precipitacao'], cidade, ano)
+
+@medido()
+def desenhar_grafico_chuva(soma_mensal, cidade, ano):
+    """barras da precipitação mensal (índice = mês); quem recebe a figura chama liberar(fig)"""
+    data_set = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+    # criar a figura
+    fig, ax = nova_figura(figsize=(6,6))
+    # desenhar o grafico
+    bars = ax.bar(soma_mensal.index, soma_mensal.values, color='skyblue', width = 0.5)
+
+    # eixo x
+    ax.set_xticks(soma_mensal.index)
+    ax.set_xticklabels(data_set)
+    ax.set_xlabel("Mês") #nome do eixo x
+
+    # eixo precipitacao
+    ax.grid(False)
+    ax.set_ylabel("Precipitação Total (mm)") # nome do eixo y (esquerdo)
+    ax.set_ylim(0,450)
+    ax.set_title(f"Precipitação mensal de {cidade} em {ano}")
+
+    return fig
+
+GRAFICOS = {
+    "temperatura": grafico_temperatura,
+    "chuva": grafico_chuva,
+}
+
+@medido()
+def grafico_png(tipo, cidade, ano):
+    """busca os dados e desenha o gráfico, devolvendo o PNG em bytes (usado pelo pool de processos)"""
+    df = buscar_dados_clima(cidade, ano)
+    fig = GRAFICOS[tipo](df, cidade, ano)
+    try:
+        return figura_png(fig)
+    finally:
+        liberar(fig)
+
+# visões de várias cidades e anos, a partir do que já está em cache (conjunto.py);
+# o desvio é a anomalia menos o valor "normal" (0 °C ou 100% da chuva normal)
+VISOES_ANUAIS = {
+    "temperatura": {"coluna": "temp_media", "anomalia": "anomalia_temp", "normal": 0, "paleta": cm.coolwarm,
+                    "nome": "Temperatura", "rotulo": "Anomalia de temperatura (°C)", "eixo": "Temperatura média anual (°C)", "unidade": "°C"},
+    "chuva": {"coluna": "precipitacao", "anomalia": "precipitacao_pct_normal", "normal": 100, "paleta": cm.BrBG,
+              "nome": "Precipitação", "rotulo": "Precipitação (% da normal)", "eixo": "Precipitação anual (mm)", "unidade": "mm"},
+}
+
+def _cores_desvio(paleta, desvio):
+    """cor de cada desvio na paleta divergente, com o zero no meio"""
+    limite = max(float(desvio.abs().max()), 1e-6)
+    return paleta(0.5 + desvio.fillna(0).to_numpy() / (2 * limite))
+
+@medido()
+def desenhar_panorama_capitais(panorama, tipo, ano):
+    """barras horizontais do desvio de cada capital em relação à própria normal; quem recebe a figura chama liberar(fig)"""
+    visao = VISOES_ANUAIS[tipo]
+    dados = panorama.dropna(subset=[visao["anomalia"]]).sort_values(visao["anomalia"])
+    desvio = dados[visao["anomalia"]] - visao["normal"]
+
+    fig, ax = nova_figura(figsize=(6, max(3, 0.3 * len(dados) + 1)))
+    ax.barh(dados["cidade"].astype(str), desvio, color=_cores_desvio(visao["paleta"], desvio))
+    ax.axvline(0, color="black", linewidth=0.8)
+    limite = max(float(desvio.abs().max()), 1e-6) * 1.1
+    ax.set_xlim(-limite, limite)
+    ax.xaxis.set_major_formatter(lambda x, _: f"{x + visao['normal']:g}")
+    ax.set_xlabel(visao["rotulo"])
+    ax.set_title(f"{visao['nome']} nas capitais em {ano}, em relação à normal")
+    ax.grid(axis='x')
+    fig.tight_layout()
+    return fig
+
+@medido()
+def desenhar_tendencia(serie, inclinacao, tipo, cidade):
+    """valor anual (barras coloridas pelo desvio; anos incompletos em cinza) e reta de tendência por década"""
+    visao = VISOES_ANUAIS[tipo]
+    coluna = visao["coluna"]
+    cores = _cores_desvio(visao["paleta"], serie[visao["anomalia"]] - visao["normal"])
+    cores[~serie["completo"].to_numpy()] = (0.8, 0.8, 0.8, 1.0)
+
+    fig, ax = nova_figura(figsize=(6, 6))
+    ax.bar(serie["ano"], serie[coluna], color=cores)
+    if inclinacao is not None:
+        completos = serie[serie["completo"]]
+        x = serie["ano"].to_numpy(dtype=float)
+        y = completos[coluna].mean() + inclinacao / 10 * (x - completos["ano"].mean())
+        ax.plot(x, y, color="black", linestyle="--", label=f"tendência: {inclinacao:+.2f} {visao['unidade']}/década")
+        ax.legend()
+    if tipo == "temperatura":
+        ax.set_ylim(serie[coluna].min() - 1, serie[coluna].max() + 1)
+    ax.set_xlabel("Ano")
+    ax.set_ylabel(visao["eixo"])
+    ax.set_title(f"{visao['nome']} ano a ano em {cidade}")
+    ax.grid(axis='y')
+    return fig
+
+@medido()
+def panorama_png(tipo, ano):
+    """PNG do panorama das capitais no ano (só dados em cache)"""
+    panorama = panorama_capitais(ano)
+    if panorama[VISOES_ANUAIS[tipo]["anomalia"]].notna().sum() == 0:
+        raise ValueError(f"Nenhuma capital com o ano {ano} completo em cache.")
+    fig = desenhar_panorama_capitais(panorama, tipo, ano)
+    try:
+        return figura_png(fig)
+    finally:
+        liberar(fig)
+
+@medido()
+def tendencia_png(tipo, cidade):
+    """PNG da série anual da cidade com a tendência (só dados em cache)"""
+    serie = serie_anual(cidade)
+    if serie.empty:
+        raise ValueError(f"Nenhum ano de {cidade} em cache.")
+    inclinacao = tendencia(serie, VISOES_ANUAIS[tipo]["coluna"])["por_decada"]
+    fig = desenhar_tendencia(serie, float(inclinacao.iloc[0]) if inclinacao.notna().any() else None, tipo, cidade)
+    try:
+        return figura_png(fig)
+    finally:
+        liberar(fig)
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+import numpy as np # dados
+from scipy.spatial import Delaunay, QhullError, cKDTree # triangulação e vizinho mais próximo
+from metricas import etapa, cache
+
+
+def grade_regular(x_min, x_max, y_min, y_max, n=100):
+    """meshgrid n×n usado pelos mapas (x = longitude, y = latitude)"""
+    return np.meshgrid(np.linspace(x_min, x_max, n), np.linspace(y_min, y_max, n))
+
+
+class Interpolador:
+    """Interpolação linear de vários campos sobre uma grade, com a triangulação feita uma só vez.
+
+    A triangulação de Delaunay e os pesos baricêntricos de cada nó da grade só
+    dependem da posição dos pontos amostrados, então são calculados aqui e
+    reaproveitados para qualquer variável (temperatura, u, v...) e qualquer ano.
+    """
+
+    def __init__(self, pontos_xy, grade_x, grade_y):
+        with etapa("interpolacao.triangulacao"):
+            self._preparar(pontos_xy, grade_x, grade_y)
+
+    def _preparar(self, pontos_xy, grade_x, grade_y):
+        pontos = np.asarray(pontos_xy, dtype=float)
+        alvo = np.column_stack([np.ravel(grade_x), np.ravel(grade_y)])
+        self.forma = np.shape(grade_x)
+        self.n_pontos = len(pontos)
+
+        try:
+            tri = Delaunay(pontos)
+        except QhullError:
+            # pontos colineares/poucos demais: não há triângulos, só o vizinho mais próximo
+            self.dentro = np.zeros(len(alvo), dtype=bool)
+            self.pesos = np.empty((0, 3))
+            self.vertices = np.empty((0, 3), dtype=int)
+        else:
+            simplex = tri.find_simplex(alvo)
+            self.dentro = simplex >= 0
+            s = simplex[self.dentro]
+            transformacao = tri.transform[s]
+            bary = np.einsum('ijk,ik->ij', transformacao[:, :2], alvo[self.dentro] - transformacao[:, 2])
+            self.pesos = np.column_stack([bary, 1 - bary.sum(axis=1)])
+            self.vertices = tri.simplices[s]
+
+        # para os nós fora do fecho convexo (usado só quando preencher=True)
+        self.mais_proximo = cKDTree(pontos).query(alvo[~self.dentro])[1]
+
+    def aplicar(self, *campos, preencher=False):
+        """Interpola todos os campos numa passada; com preencher=True, fora do fecho usa o vizinho mais próximo"""
+        with etapa("interpolacao.aplicar"):
+            return self._aplicar(campos, preencher)
+
+    def _aplicar(self, campos, preencher):
+        valores = np.column_stack([np.asarray(c, dtype=float) for c in campos])
+        saida = np.full((self.dentro.size, valores.shape[1]), np.nan)
+        saida[self.dentro] = np.einsum('mj,mjk->mk', self.pesos, valores[self.vertices])
+        if preencher:
+            saida[~self.dentro] = valores[self.mais_proximo]
+        return [saida[:, i].reshape(self.forma) for i in range(valores.shape[1])]
+
+
+class CacheInterpoladores:
+    """LRU de interpoladores indexada pela geometria (pontos amostrados + definição da grade)"""
+
+    def __init__(self, tamanho=64):
+        self.tamanho = tamanho
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def chave(pontos_xy, limites, n):
+        pontos = tuple(map(tuple, np.round(np.asarray(pontos_xy, dtype=float), 6)))
+        return pontos, tuple(np.round(limites, 6)), n
+
+    def obter(self, pontos_xy, limites, n=100):
+        """`limites` = (x_min, x_max, y_min, y_max); devolve (interpolador, grade_x, grade_y)"""
+        chave = self.chave(pontos_xy, limites, n)
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                cache("interpolador", True)
+                return self._itens[chave]
+        cache("interpolador", False)
+
+        grade_x, grade_y = grade_regular(*limites, n=n)
+        item = (Interpolador(pontos_xy, grade_x, grade_y), grade_x, grade_y)
+        with self._trava:
+            self._itens[chave] = item
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+        return item
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+
+interpoladores = CacheInterpoladores()
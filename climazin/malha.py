@@ -0,0 +1,127 @@
+# malha global dos pontos amostrados pelos mapas; para apagar o cache antigo
+# (dados/cache_pontos e os vento_* de cada cidade), que a malha não reaproveita:
+#   python -m malha
+import os
+import re
+import math
+import argparse
+from armazenamento import DIRETORIO_DADOS, remover_tabela, remover_pastas_vazias
+
+# resolução nativa do ERA5, o modelo pedido à API de arquivo (coleta._parametros): a API
+# responde com a célula mais próxima, então coordenadas dentro da mesma célula trazem os mesmos dados
+RESOLUCAO = 0.25
+PASTA_PONTOS = os.path.join(DIRETORIO_DADOS, "pontos")
+
+
+def ajustar(valor, passo=RESOLUCAO):
+    """múltiplo de `passo` mais próximo (sem -0.0, para as chaves não duplicarem)"""
+    return round(round(valor / passo) * passo, 4) + 0.0
+
+
+def ponto_malha(lat, lon):
+    """célula da malha nativa que contém (lat, lon)"""
+    return ajustar(lat), ajustar(lon)
+
+
+def _eixo(inicio, fim, passo):
+    """múltiplos de `passo` que cobrem [inicio, fim]"""
+    primeiro = math.floor(inicio / passo + 1e-9)
+    ultimo = math.ceil(fim / passo - 1e-9)
+    return [round(i * passo, 4) + 0.0 for i in range(primeiro, ultimo + 1)]
+
+
+def pontos_malha(lat_c, lon_c, raio, passo):
+    """pontos (lat, lon) espaçados de `passo` graus que cobrem o quadrado centro ± raio.
+
+    Os pontos são múltiplos de `passo` (que é múltiplo de RESOLUCAO), e não
+    deslocamentos a partir do centro: cidades próximas pedem os mesmos pontos
+    e leem o mesmo cache.
+    """
+    lats = _eixo(lat_c - raio, lat_c + raio, passo)
+    lons = _eixo(lon_c - raio, lon_c + raio, passo)
+    return [(lat, lon) for lat in lats for lon in lons]
+
+
+def pontos_centrados(lat_c, lon_c, n, passo):
+    """n × n pontos espaçados de `passo` em volta do múltiplo de `passo` mais próximo do centro.
+
+    Diferente de pontos_malha, a quantidade de pontos não depende de onde o
+    centro cai entre as linhas da malha.
+    """
+    lat0, lon0 = ajustar(lat_c, passo), ajustar(lon_c, passo)
+    deslocamentos = [(i - (n - 1) / 2) * passo for i in range(n)]
+    return [(round(lat0 + dlat, 4) + 0.0, round(lon0 + dlon, 4) + 0.0)
+            for dlat in deslocamentos for dlon in deslocamentos]
+
+
+def chave_ponto(lat, lon):
+    lat, lon = ponto_malha(lat, lon)
+    return f"{lat:.2f}_{lon:.2f}"
+
+
+def arquivo_ponto(lat, lon, ano, tabela, raiz=DIRETORIO_DADOS):
+    """base da tabela ('diario', 'vento') de um ponto em dados/pontos/<lat>_<lon>/<ano>/"""
+    return os.path.join(raiz, "pontos", chave_ponto(lat, lon), str(ano), tabela)
+
+
+_PONTO_ANTIGO = re.compile(r"^(-?\d+(?:\.\d+)?)_(-?\d+(?:\.\d+)?)$")
+_VENTO_ANTIGO = re.compile(r"^vento_(-?\d+\.\d+)_(-?\d+\.\d+)(?:\.csv|\.col|\.npz)$")
+
+
+def _tabelas_antigas(raiz):
+    """(base antiga, lat, lon, ano, tabela) de cada tabela de ponto no formato anterior"""
+    # mapa de temperatura: cache_pontos/<lat>_<lon>/<ano>/dados, com as coordenadas cruas do linspace
+    pasta_pontos = os.path.join(raiz, "cache_pontos")
+    if os.path.isdir(pasta_pontos):
+        for nome in sorted(os.listdir(pasta_pontos)):
+            achado = _PONTO_ANTIGO.match(nome)
+            if not achado:
+                continue
+            for ano in sorted(os.listdir(os.path.join(pasta_pontos, nome))):
+                base = os.path.join(pasta_pontos, nome, ano, "dados")
+                yield base, float(achado[1]), float(achado[2]), ano, "diario"
+
+    # vento: <Cidade>/<ano>/vento_<lat>_<lon>, um conjunto por cidade
+    for cidade in sorted(os.listdir(raiz)):
+        pasta_cidade = os.path.join(raiz, cidade)
+        if cidade in ("cache_pontos", "pontos") or not os.path.isdir(pasta_cidade):
+            continue
+        for ano in sorted(os.listdir(pasta_cidade)):
+            pasta_ano = os.path.join(pasta_cidade, ano)
+            if not ano.isdigit() or not os.path.isdir(pasta_ano):
+                continue
+            vistas = set()
+            for nome in sorted(os.listdir(pasta_ano)):
+                achado = _VENTO_ANTIGO.match(nome)
+                base = os.path.join(pasta_ano, os.path.splitext(nome)[0])
+                if achado and base not in vistas:  # a mesma tabela pode estar em .csv e .col
+                    vistas.add(base)
+                    yield base, float(achado[1]), float(achado[2]), ano, "vento"
+
+
+def descartar_cache_antigo(raiz=DIRETORIO_DADOS, simular=False):
+    """Apaga as tabelas de pontos no formato anterior à malha.
+
+    Elas foram buscadas sem models=era5, com o modelo escolhido pela API, e não
+    valem para as células ERA5 da malha; como a cobertura vem dos próprios dados,
+    movê-las para lá faria a célula nunca mais ser buscada. Os pontos são pedidos
+    de novo, já na malha, quando um mapa precisar deles.
+    """
+    antigas = [base for base, *_ in _tabelas_antigas(raiz)]
+    for base in antigas:
+        if simular:
+            print(base)
+            continue
+        remover_tabela(base)
+        remover_pastas_vazias(os.path.dirname(base), raiz)
+    print(f"{len(antigas)} tabelas de pontos antigas {'seriam apagadas' if simular else 'apagadas'}.")
+    return len(antigas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apaga o cache de pontos anterior à malha global (dados/cache_pontos e vento_*).")
+    parser.add_argument("--raiz", default=DIRETORIO_DADOS)
+    parser.add_argument("--simular", action="store_true", help="só lista o que seria apagado")
+    args = parser.parse_args()
+
+    descartar_cache_antigo(args.raiz, simular=args.simular)
@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np # dados
+import cartopy.crs as ccrs # plotagem de mapa e gráficos
+import cartopy.feature as cfeature # plotagem de mapa e gráficos
+import matplotlib.image as mpimg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from armazenamento import DIRETORIO_DADOS, escrita_atomica
+from coalescencia import coalescer
+from renderizacao import figura_png, liberar
+from metricas import etapa, cache, contar
+from coleta import obter_coordenadas, extensao_mapa_temperatura, extensao_mapa_vento
+
+# camadas do Natural Earth de cada mapa; não dependem do ano nem da variável,
+# então são rasterizadas uma vez por extensão e coladas como imagem de fundo
+CAMADAS = {
+    "temperatura": (ccrs.PlateCarree, [
+        (cfeature.COASTLINE, {}),
+        (cfeature.BORDERS, {'linestyle': ':'}),
+    ]),
+    "vento": (ccrs.Mercator, [
+        (cfeature.LAND.with_scale('50m'), {'facecolor': 'lightgray'}),
+        (cfeature.OCEAN.with_scale('50m'), {}),
+        (cfeature.COASTLINE.with_scale('50m'), {}),
+        (cfeature.BORDERS.with_scale('50m'), {'linestyle': ':'}),
+        (cfeature.LAKES.with_scale('50m'), {'alpha': 0.5}),
+        (cfeature.RIVERS.with_scale('50m'), {}),
+    ]),
+}
+LADO_PX = 800 # resolução do lado maior do fundo (o eixo dos mapas tem ~600 px)
+MAX_MEMORIA = 32 # fundos RGBA uint8 mantidos em memória (~2.5 MB cada)
+ZORDER_CAMADAS = 1.5 # mesma ordem que o cartopy dá às features: acima de preenchimentos, abaixo de linhas
+
+PASTA_CACHE = os.path.join(DIRETORIO_DADOS, "cache_mapas_base")
+_memoria = OrderedDict()
+_trava = threading.Lock()
+
+
+def _extensao_projetada(projecao, extensao):
+    """cantos de [lon0, lon1, lat0, lat1] na projeção do mapa"""
+    lon0, lon1, lat0, lat1 = extensao
+    pontos = projecao.transform_points(
+        ccrs.PlateCarree(), np.array([lon0, lon1, lon0, lon1]), np.array([lat0, lat0, lat1, lat1])
+    )
+    return pontos[:, 0].min(), pontos[:, 0].max(), pontos[:, 1].min(), pontos[:, 1].max()
+
+
+def _arquivo(tipo, extensao):
+    nome = "_".join(f"{v:.3f}" for v in extensao)
+    return os.path.join(PASTA_CACHE, f"{tipo}_{nome}.png")
+
+
+def _rasterizar(tipo, extensao):
+    classe_projecao, camadas = CAMADAS[tipo]
+    projecao = classe_projecao()
+    x0, x1, y0, y1 = _extensao_projetada(projecao, extensao)
+    razao = (x1 - x0) / (y1 - y0)
+    largura, altura = (LADO_PX, LADO_PX / razao) if razao >= 1 else (LADO_PX * razao, LADO_PX)
+
+    fig = Figure(figsize=(largura / 100, altura / 100), dpi=100)
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_axes([0, 0, 1, 1], projection=projecao)
+        ax.set_extent(extensao, crs=ccrs.PlateCarree())
+        for feature, estilo in camadas:
+            ax.add_feature(feature, **estilo)
+        ax.set_axis_off()
+        return figura_png(fig, dpi=100, transparent=True)
+    finally:
+        liberar(fig)
+
+
+@coalescer
+def fundo(tipo, extensao):
+    """RGBA do fundo (memória -> PNG em dados/cache_mapas_base -> rasterização)"""
+    extensao = tuple(round(float(v), 3) for v in extensao)
+    chave = (tipo, extensao)
+    with _trava:
+        if chave in _memoria:
+            _memoria.move_to_end(chave)
+            cache("mapa_base", True)
+            return _memoria[chave]
+    cache("mapa_base", False)
+
+    arquivo = _arquivo(tipo, extensao)
+    if os.path.exists(arquivo):
+        contar("mapa_base.disco")
+    else:
+        with etapa("mapa_base.rasterizacao", tipo=tipo):
+            png = _rasterizar(tipo, extensao)
+        os.makedirs(PASTA_CACHE, exist_ok=True)
+        with escrita_atomica(arquivo) as temporario:
+            with open(temporario, "wb") as f:
+                f.write(png)
+    imagem = (mpimg.imread(arquivo) * 255).astype(np.uint8)
+
+    with _trava:
+        _memoria[chave] = imagem
+        while len(_memoria) > MAX_MEMORIA:
+            _memoria.popitem(last=False)
+    return imagem
+
+
+def desenhar_fundo(ax, tipo, extensao):
+    """cola o fundo pré-rasterizado no GeoAxes e mantém a extensão pedida"""
+    imagem = fundo(tipo, extensao)
+    ax.imshow(
+        imagem, origin='upper', extent=_extensao_projetada(ax.projection, extensao),
+        transform=ax.projection, zorder=ZORDER_CAMADAS, interpolation='bilinear'
+    )
+    ax.set_extent(extensao, crs=ccrs.PlateCarree())
+
+
+def aquecer_mapas_base(lista_cidades):
+    """rasteriza os fundos dos dois mapas de cada cidade (roda no início do app, em segundo plano)"""
+    for cidade in lista_cidades:
+        try:
+            lat_c, lon_c = obter_coordenadas(cidade)
+            fundo("temperatura", extensao_mapa_temperatura(lat_c, lon_c))
+            fundo("vento", extensao_mapa_vento(lat_c, lon_c))
+        except Exception as e:
+            print(f"Erro ao preparar o mapa base de {cidade}: {e}")
@@ -0,0 +1,98 @@
+import numpy as np # dados
+import cartopy.crs as ccrs # plotagem de mapa e gráficos
+from interpolacao import interpoladores # interpolação de dados espaciais
+from mapa_base import desenhar_fundo
+from renderizacao import nova_figura, liberar, salvar_figura
+from coalescencia import coalescer
+from cobertura import em_dia
+from gerenciador_cache import gerenciador
+from malha import ponto_malha, arquivo_ponto
+from metricas import medido
+from coleta import obter_coordenadas, arquivo_mapa, pontos_mapa_temperatura, extensao_mapa_temperatura, buscar_dados_pontos_lote
+
+@coalescer
+def caminho_mapa_temperatura(cidade, ano):
+    """devolve o PNG do mapa de temperatura, gerando só se ainda não estiver em cache"""
+    nome_arquivo = arquivo_mapa(cidade, ano)
+    if not em_dia(nome_arquivo, ano):  # o mapa do ano corrente é refeito quando entram dias novos
+        fig = gerar_mapa_temperatura(cidade, ano)
+        if fig is None:
+            return None
+        liberar(fig)
+    else:
+        gerenciador.acessou(nome_arquivo)
+    return nome_arquivo
+
+@medido()
+def calcular_grade_temperatura(cidade, ano):
+    """amostra a grade de pontos e interpola a temperatura média anual; devolve (lon_grid, lat_grid, temp_grid, centro)"""
+    try:
+        lat_c, lon_c = obter_coordenadas(cidade)
+    except Exception as e:
+        print("Erro ao obter coordenadas:", e)
+        return None
+
+    lista_pontos = pontos_mapa_temperatura(lat_c, lon_c)
+    pontos = []
+    temperaturas = []
+
+    resultados = buscar_dados_pontos_lote(lista_pontos, ano)
+
+    for resultado in resultados:
+        if resultado is not None:
+            ponto, dados = resultado
+            if dados and 'temp' in dados and dados['temp'] is not None and not np.isnan(dados['temp']):
+                pontos.append(ponto)
+                temperaturas.append(dados['temp'])
+
+    if not pontos or not temperaturas:
+        print("ERRO: Nenhum dado de temperatura válido foi encontrado.")
+        return None
+
+    if len(pontos) < 4:
+        print("ERRO: Pontos insuficientes para interpolação (mínimo 4).")
+        return None
+
+    # os pontos são (lat, lon) mas a grade é (x=lon, y=lat); a triangulação é reaproveitada
+    # entre anos enquanto o conjunto de pontos válidos for o mesmo
+    pontos_xy = [(lon, lat) for lat, lon in pontos]
+    interpolador, lon_grid, lat_grid = interpoladores.obter(pontos_xy, (lon_c - 5, lon_c + 5, lat_c - 5, lat_c + 5))
+    temp_grid, = interpolador.aplicar(temperaturas, preencher=True)
+
+    if np.isnan(temp_grid).all():
+        print("ERRO: a interpolação falhou.")
+        return None
+
+    return lon_grid, lat_grid, temp_grid, (lat_c, lon_c)
+
+@medido()
+def gerar_mapa_temperatura(cidade, ano):   
+    nome_arquivo = arquivo_mapa(cidade, ano)
+
+    print("Gerando novo mapa...")
+
+    grade = calcular_grade_temperatura(cidade, ano)
+    if grade is None:
+        return None
+    fig = desenhar_mapa_temperatura(*grade, cidade, ano)
+
+    print(f"Salvando imagem em: {nome_arquivo}")
+    salvar_figura(fig, nome_arquivo)
+    # o PNG deriva das tabelas de pontos da grade: se elas saírem do cache, ele sai junto
+    lat_c, lon_c = grade[3]
+    gerenciador.registrar_derivado(nome_arquivo, [
+        arquivo_ponto(*ponto_malha(lat, lon), ano, "diario") for lat, lon in pontos_mapa_temperatura(lat_c, lon_c)
+    ])
+ 
+    return fig
+
+@medido()
+def desenhar_mapa_temperatura(lon_grid, lat_grid, temp_grid, centro, cidade, ano):
+    """contorno da grade interpolada sobre o fundo da cidade; quem recebe a figura chama liberar(fig)"""
+    lat_c, lon_c = centro
+    fig, ax = nova_figura(figsize=(8, 8), projecao=ccrs.PlateCarree())
+    desenhar_fundo(ax, "temperatura", extensao_mapa_temperatura(lat_c, lon_c))
+    cont = ax.contourf(lon_grid, lat_grid, temp_grid, cmap='coolwarm', transform=ccrs.PlateCarree())
+    fig.colorbar(cont, ax=ax, label='Temperatura Média Anual (°C)')
+    ax.set_title(f"Mapa de Temperatura em {cidade} ({ano})")
+    return fig
@@ -0,0 +1,123 @@
+import numpy as np # dados
+import pandas as pd # dados
+import cartopy.crs as ccrs # plotagem de mapa e gráficos
+from metpy.interpolate import interpolate_to_grid
+from interpolacao import interpoladores # interpolação de dados espaciais
+from mapa_base import desenhar_fundo
+from renderizacao import nova_figura, liberar, salvar_figura
+from coalescencia import coalescer
+from cobertura import em_dia
+from gerenciador_cache import gerenciador
+from malha import arquivo_ponto
+from metricas import medido
+from coleta import obter_coordenadas, arquivo_mapa, extensao_mapa_vento, coletar_grade_vento
+
+def plotar_isobaras(ax, df_grade):
+    if 'pressao' not in df_grade.columns:
+        df_grade['pressao'] = 1013 - (df_grade['v'] + df_grade['u']) * 2
+
+    xi, yi, zi = interpolate_to_grid(df_grade['lon'], df_grade['lat'], df_grade['pressao'], hres=0.1)
+
+    cs = ax.contour(xi, yi, zi, levels=range(990, 1030, 4), colors='black', linewidths=1, transform=ccrs.PlateCarree())
+    ax.clabel(cs, inline=True, fontsize=8, fmt='%d hPa')
+
+def marcar_centros_pressao(ax, df_grade):
+    if 'pressao' not in df_grade.columns:
+        return
+    max_ponto = df_grade.loc[df_grade['pressao'].idxmax()]
+    min_ponto = df_grade.loc[df_grade['pressao'].idxmin()]
+    for ponto, label, cor in [(max_ponto, 'H', 'blue'), (min_ponto, 'L', 'red')]:
+        ax.text(ponto['lon'], ponto['lat'], label, fontsize=20, weight='bold', color=cor,
+                ha='center', va='center', transform=ccrs.PlateCarree())
+
+def calcular_grade_vento(df_grade):
+    """interpola u e v numa grade 100x100 sobre os pontos coletados (uma triangulação para os dois campos)"""
+    df_grade['u'] = pd.to_numeric(df_grade['u'], errors='coerce')
+    df_grade['v'] = pd.to_numeric(df_grade['v'], errors='coerce')
+    df_grade = df_grade.dropna(subset=['u', 'v'])
+
+    lon_vals = df_grade['lon'].values.astype(float)
+    lat_vals = df_grade['lat'].values.astype(float)
+
+    interpolador, lon_grid, lat_grid = interpoladores.obter(
+        np.column_stack([lon_vals, lat_vals]),
+        (lon_vals.min(), lon_vals.max(), lat_vals.min(), lat_vals.max())
+    )
+    u_grid, v_grid = interpolador.aplicar(df_grade['u'].values, df_grade['v'].values)
+    return df_grade, lon_grid, lat_grid, u_grid, v_grid
+
+@coalescer
+def caminho_mapa_vento(cidade, ano):
+    """devolve o PNG do mapa de vento, gerando só se ainda não estiver em cache"""
+    nome_arquivo = arquivo_mapa(cidade, ano, "vento")
+    if not em_dia(nome_arquivo, ano):  # o mapa do ano corrente é refeito quando entram dias novos
+        liberar(mapa_vento(cidade, ano))
+    else:
+        gerenciador.acessou(nome_arquivo)
+    return nome_arquivo
+
+@medido()
+def mapa_vento(cidade, ano):
+    df_grade = coletar_grade_vento(cidade, ano).copy()  # o resultado pode estar sendo compartilhado com outra sessão
+    fig = desenhar_mapa_vento(df_grade, obter_coordenadas(cidade), cidade, ano)
+    nome_arquivo = arquivo_mapa(cidade, ano, "vento")
+    salvar_figura(fig, nome_arquivo)
+    gerenciador.registrar_derivado(nome_arquivo, [
+        arquivo_ponto(lat, lon, ano, "setores") for lat, lon in zip(df_grade['lat'], df_grade['lon'])
+    ])
+    return fig
+
+@medido()
+def desenhar_mapa_vento(df_grade, centro, cidade, ano):
+    """linhas de corrente, isóbaras e rosa dos ventos a partir dos setores de cada ponto; quem recebe a figura chama liberar(fig)"""
+    lat_centro, lon_centro = centro
+    df_grade, lon_grid, lat_grid, u_grid, v_grid = calcular_grade_vento(df_grade)
+    intensidade_grid = np.sqrt(u_grid**2 + v_grid**2)
+
+    fig, ax = nova_figura(figsize=(12, 8), projecao=ccrs.Mercator())
+    # terra, oceano, costa, fronteiras, lagos e rios vêm de um fundo já rasterizado para a cidade
+    desenhar_fundo(ax, "vento", extensao_mapa_vento(lat_centro, lon_centro))
+
+    sc = ax.scatter(
+        df_grade['lon'], df_grade['lat'],
+        c=np.sqrt(df_grade['u']**2 + df_grade['v']**2),
+        cmap='plasma', s=30, alpha=0.8,
+        transform=ccrs.PlateCarree()
+    )
+    fig.colorbar(sc, ax=ax, orientation='vertical', label='Velocidade do vento (m/s)')
+
+    ax.streamplot(
+        lon_grid, lat_grid, u_grid, v_grid,
+        color=intensidade_grid,
+        cmap='plasma',
+        linewidth=1.5,
+        density=2,
+        transform=ccrs.PlateCarree()
+    )
+
+    plotar_isobaras(ax, df_grade)
+    marcar_centros_pressao(ax, df_grade)
+
+    lon_leg, lat_leg = lon_centro + 1.5, lat_centro - 1.5
+    legenda = pd.DataFrame({'direcao': [0, 90, 180, 270], 'label': ['N', 'E', 'S', 'O']})
+    ang_rad = np.deg2rad(legenda['direcao'])
+    legenda['u'] = -np.sin(ang_rad)
+    legenda['v'] = -np.cos(ang_rad)
+    legenda['lat'] = lat_leg
+    legenda['lon'] = lon_leg
+
+    ax.quiver(
+        legenda['lon'], legenda['lat'],
+        legenda['u'], legenda['v'],
+        transform=ccrs.PlateCarree(),
+        color='black', scale=10, width=0.005
+    )
+
+    offset = 0.15
+    for _, row in legenda.iterrows():
+        ax.text(row['lon'] + row['u'] * offset, row['lat'] + row['v'] * offset,
+                row['label'], transform=ccrs.PlateCarree(),
+                ha='center', va='center', fontsize=10, weight='bold')
+
+    ax.set_title(f'Mapa de vento médio anual em {cidade} em {ano}')
+    return fig
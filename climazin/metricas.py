@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+# tempos e contadores por etapa (geocodificação, API, cache, leitura, interpolação,
+# rasterização). Cada registro é uma soma sob uma trava, barato o bastante para ficar
+# ligado em produção; o log estruturado (uma linha JSON por etapa) só com
+# CLIMAZIN_LOG_METRICAS=1 (stderr) ou =<arquivo>
+LOG_METRICAS = os.environ.get("CLIMAZIN_LOG_METRICAS", "")
+LIMITES_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 30000) # faixas do histograma de cada etapa
+
+_etapa_atual = contextvars.ContextVar("etapa_atual", default=None)
+
+
+class Metricas:
+    """Registro de etapas (n, total, máximo, histograma) e contadores do processo"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.inicio = time.time()
+        self.etapas = {}
+        self.contadores = {}
+        self._coletores = []
+        self._medidas_outros = {} # pid -> (quando, {nome: valor}) vindos dos processos do pool
+        self._log = None
+        self._trava_log = threading.Lock()
+
+    def contar(self, nome, n=1):
+        with self._trava:
+            self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def coletor(self, func):
+        """registra func() -> {nome: valor}: medidas do estado atual (ex. uso do cache), lidas a cada extração"""
+        self._coletores.append(func)
+        return func
+
+    def _medir(self):
+        medidas = {}
+        for func in self._coletores:
+            medidas.update(func())
+        return medidas
+
+    def registrar(self, nome, segundos):
+        ms = segundos * 1000
+        faixa = next((i for i, limite in enumerate(LIMITES_MS) if ms <= limite), len(LIMITES_MS))
+        with self._trava:
+            etapa = self.etapas.get(nome)
+            if etapa is None:
+                etapa = self.etapas[nome] = {"n": 0, "total_ms": 0.0, "max_ms": 0.0, "faixas": [0] * (len(LIMITES_MS) + 1)}
+            etapa["n"] += 1
+            etapa["total_ms"] += ms
+            etapa["max_ms"] = max(etapa["max_ms"], ms)
+            etapa["faixas"][faixa] += 1
+
+    @contextmanager
+    def etapa(self, nome, **atributos):
+        """cronometra o bloco como etapa `nome`; etapas aninhadas levam o nome da etapa de fora no log"""
+        pai = _etapa_atual.get()
+        token = _etapa_atual.set(nome)
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            yield
+        except BaseException as e:
+            erro = type(e).__name__
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            _etapa_atual.reset(token)
+            self.registrar(nome, duracao)
+            if erro:
+                self.contar(f"{nome}.erro")
+            if LOG_METRICAS:
+                self._escrever({"etapa": nome, "pai": pai, "ms": round(duracao * 1000, 3), "erro": erro, **atributos})
+
+    def _escrever(self, registro):
+        registro = {"ts": round(time.time(), 3), "pid": os.getpid(), **registro}
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        with self._trava_log:
+            if self._log is None:
+                self._log = sys.stderr if LOG_METRICAS == "1" else open(LOG_METRICAS, "a", encoding="utf-8")
+            self._log.write(linha + "\n")
+            self._log.flush()
+
+    def extrair(self):
+        """devolve o que foi registrado desde a última extração e zera (usado pelos processos do pool)"""
+        medidas = self._medir()
+        with self._trava:
+            bruto = {"etapas": self.etapas, "contadores": self.contadores, "pid": os.getpid(), "medidas": medidas}
+            self.etapas, self.contadores = {}, {}
+        return bruto
+
+    def incorporar(self, bruto):
+        """soma ao registro o que outro processo extraiu; as medidas desse processo substituem as anteriores"""
+        with self._trava:
+            if bruto.get("medidas"):
+                self._medidas_outros[bruto["pid"]] = (time.time(), bruto["medidas"])
+            for nome, n in bruto["contadores"].items():
+                self.contadores[nome] = self.contadores.get(nome, 0) + n
+            for nome, outra in bruto["etapas"].items():
+                etapa = self.etapas.get(nome)
+                if etapa is None:
+                    self.etapas[nome] = {**outra, "faixas": list(outra["faixas"])}
+                    continue
+                etapa["n"] += outra["n"]
+                etapa["total_ms"] += outra["total_ms"]
+                etapa["max_ms"] = max(etapa["max_ms"], outra["max_ms"])
+                etapa["faixas"] = [a + b for a, b in zip(etapa["faixas"], outra["faixas"])]
+
+    def instantaneo(self):
+        """estado atual em JSON: etapas com média/p50/p95 (pelo histograma), contadores e taxas de acerto de cache"""
+        proprias = self._medir()
+        with self._trava:
+            etapas = {nome: {**e, "faixas": list(e["faixas"])} for nome, e in self.etapas.items()}
+            contadores = dict(self.contadores)
+            medidas = {pid: dict(m) for pid, (_, m) in sorted(self._medidas_outros.items(), key=lambda i: i[1][0])}
+        if proprias:
+            medidas[os.getpid()] = proprias
+
+        for etapa in etapas.values():
+            etapa["media_ms"] = round(etapa["total_ms"] / etapa["n"], 3)
+            etapa["p50_ms"] = _percentil(etapa["faixas"], etapa["n"], 0.50, etapa["max_ms"])
+            etapa["p95_ms"] = _percentil(etapa["faixas"], etapa["n"], 0.95, etapa["max_ms"])
+            etapa["total_ms"] = round(etapa["total_ms"], 3)
+            etapa["max_ms"] = round(etapa["max_ms"], 3)
+            etapa["faixas"] = dict(zip([f"<={l}" for l in LIMITES_MS] + ["mais"], etapa["faixas"]))
+
+        acertos = {}
+        for nome, n in contadores.items():
+            if nome.startswith("cache.") and nome.endswith(".acerto"):
+                cache = nome[len("cache."):-len(".acerto")]
+                faltas = contadores.get(f"cache.{cache}.falta", 0)
+                acertos[cache] = round(n / (n + faltas), 4)
+        return {
+            "pid": os.getpid(),
+            "ativo_s": round(time.time() - self.inicio, 1),
+            "etapas": dict(sorted(etapas.items())),
+            "contadores": dict(sorted(contadores.items())),
+            "taxa_acerto_cache": dict(sorted(acertos.items())),
+            "medidas": medidas, # por processo, da medição mais antiga para a mais recente
+        }
+
+
+def _percentil(faixas, n, q, maximo):
+    """limite superior da faixa do histograma onde cai o quantil q (aproximado, em ms)"""
+    alvo = q * n
+    acumulado = 0
+    for limite, quantidade in zip(LIMITES_MS + (maximo,), faixas):
+        acumulado += quantidade
+        if acumulado >= alvo:
+            return min(limite, round(maximo, 3))
+    return round(maximo, 3)
+
+
+metricas = Metricas()
+
+
+def etapa(nome, **atributos):
+    """atalho para metricas.etapa(...)"""
+    return metricas.etapa(nome, **atributos)
+
+
+def contar(nome, n=1):
+    metricas.contar(nome, n)
+
+
+def cache(nome, acerto):
+    """conta um acerto ou uma falta do cache `nome` (a taxa aparece em /metricas)"""
+    metricas.contar(f"cache.{nome}.{'acerto' if acerto else 'falta'}")
+
+
+def medido(nome=None):
+    """decorador: cada chamada da função vira uma etapa (nome padrão: módulo.função)"""
+    def decorador(func):
+        rotulo = nome or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def envolvida(*args, **kwargs):
+            with metricas.etapa(rotulo):
+                return func(*args, **kwargs)
+        return envolvida
+    return decorador
@@ -0,0 +1,177 @@
+# aquecimento offline do cache (rodar dentro de climazin/, como o Clima.py):
+#   python -m prefetch --cidades Recife Natal --anos 2010-2024 --tipos clima pontos vento
+# o progresso fica em dados/prefetch_estado.json; rodar de novo continua de onde parou
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import concurrent.futures # as tarefas (tipo, cidade, anos) rodam em threads
+from cidades import cidades, anos
+from armazenamento import DIRETORIO_DADOS, escrita_atomica
+from geocodificacao import indice_geocodificacao
+from rede import limitador
+from cobertura import ano_fechado
+import gerenciador_cache # o prefetch é quem mais grava: a cota de disco vale aqui também
+import ClimaAPI
+
+ANOS = anos # mesmo intervalo do slider em Clima.py
+TIPOS = ["clima", "pontos", "vento", "mapas"]
+ARQUIVO_ESTADO = os.path.join(DIRETORIO_DADOS, "prefetch_estado.json")
+
+
+def _preencher_clima(cidade, anos):
+    tabelas = ClimaAPI.buscar_dados_clima_anos(cidade, anos)
+    return [ano for ano in anos if tabelas[ano] is None]
+
+
+def _preencher_pontos(cidade, anos):
+    lat_c, lon_c = ClimaAPI.obter_coordenadas(cidade)
+    resultados = ClimaAPI.buscar_dados_pontos_anos(ClimaAPI.pontos_mapa_temperatura(lat_c, lon_c), anos)
+    return [ano for ano in anos if any(r is None for r in resultados[ano])]
+
+
+def _preencher_vento(cidade, anos):
+    grades = ClimaAPI.coletar_grade_vento_anos(cidade, anos)
+    return [ano for ano in anos if grades[ano].empty]
+
+
+def _aquecer_mapas(cidade, anos):
+    falhas = []
+    for ano in anos:
+        if ClimaAPI.caminho_mapa_temperatura(cidade, ano) is None:
+            falhas.append(ano)
+            continue
+        ClimaAPI.caminho_mapa_vento(cidade, ano)
+    return falhas
+
+
+# cada tarefa recebe (cidade, anos) e devolve os anos que falharam; os dados vêm
+# de vários anos por requisição, os mapas são desenhados um ano por vez
+TAREFAS = {
+    "clima": _preencher_clima,
+    "pontos": _preencher_pontos,
+    "vento": _preencher_vento,
+    "mapas": _aquecer_mapas,
+}
+POR_PERIODO = {"clima", "pontos", "vento"}
+
+
+class EstadoPrefetch:
+    """Conjunto de tarefas já concluídas, gravado em disco a cada conclusão (permite retomar)"""
+
+    def __init__(self, arquivo=ARQUIVO_ESTADO, reiniciar=False):
+        self.arquivo = arquivo
+        self._trava = threading.Lock()
+        self.concluidas = set()
+        if not reiniciar and os.path.exists(arquivo):
+            with open(arquivo, encoding="utf-8") as f:
+                self.concluidas = set(json.load(f).get("concluidas", []))
+
+    @staticmethod
+    def chave(tipo, cidade, ano):
+        return f"{tipo}|{cidade}|{ano}"
+
+    def marcar(self, chave):
+        with self._trava:
+            self.concluidas.add(chave)
+            os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+            with escrita_atomica(self.arquivo) as temporario:
+                with open(temporario, "w", encoding="utf-8") as f:
+                    json.dump({"concluidas": sorted(self.concluidas)}, f, ensure_ascii=False)
+
+
+def intervalo_anos(texto):
+    """'2010-2014' -> [2010, ..., 2014]; '2020' -> [2020]"""
+    if "-" in texto:
+        inicio, fim = texto.split("-", 1)
+        return list(range(int(inicio), int(fim) + 1))
+    return [int(texto)]
+
+
+def executar_prefetch(lista_cidades, anos, tipos, trabalhadores=4, estado=None):
+    estado = estado or EstadoPrefetch()
+
+    # as coordenadas entram no índice antes, para as threads não geocodificarem em paralelo
+    indice_geocodificacao.semear(lista_cidades)
+
+    pendentes = {}
+    for cidade in lista_cidades:
+        for tipo in tipos:
+            for ano in anos:
+                if EstadoPrefetch.chave(tipo, cidade, ano) not in estado.concluidas:
+                    pendentes.setdefault((tipo, cidade), []).append(ano)
+    # tipos de dados: um trabalho por cidade com todos os anos; mapas: um por ano
+    tarefas = []
+    for (tipo, cidade), anos_pendentes in pendentes.items():
+        if tipo in POR_PERIODO:
+            tarefas.append((tipo, cidade, anos_pendentes))
+        else:
+            tarefas += [(tipo, cidade, [ano]) for ano in anos_pendentes]
+    total = len(tarefas)
+    puladas = len(lista_cidades) * len(anos) * len(tipos) - sum(len(a) for a in pendentes.values())
+    print(f"{total} tarefas a executar ({puladas} anos já concluídos anteriormente).")
+
+    falhas = []
+    feitas = 0
+    inicio = time.monotonic()
+
+    def executar(tarefa):
+        tipo, cidade, anos_tarefa = tarefa
+        t0 = time.monotonic()
+        anos_falhos = TAREFAS[tipo](cidade, anos_tarefa)
+        return anos_falhos, time.monotonic() - t0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+        futuros = {executor.submit(executar, t): t for t in tarefas}
+        for futuro in concurrent.futures.as_completed(futuros):
+            tipo, cidade, anos_tarefa = futuros[futuro]
+            feitas += 1
+            try:
+                anos_falhos, duracao = futuro.result()
+            except Exception as e:
+                anos_falhos, duracao, erro = anos_tarefa, None, str(e)
+            else:
+                erro = "sem dados"
+            for ano in anos_tarefa:
+                if ano in anos_falhos:
+                    falhas.append((tipo, cidade, ano, erro))
+                elif ano_fechado(ano):
+                    # o ano corrente nunca fica concluído: a cobertura decide o que falta buscar
+                    estado.marcar(EstadoPrefetch.chave(tipo, cidade, ano))
+            rotulo = f"{anos_tarefa[0]}" if len(anos_tarefa) == 1 else f"{anos_tarefa[0]}-{anos_tarefa[-1]}"
+            if duracao is None:
+                situacao = f"ERRO: {erro}"
+            elif anos_falhos:
+                situacao = f"{len(anos_falhos)} anos com ERRO ({erro}); {duracao:.1f}s"
+            else:
+                situacao = f"ok ({duracao:.1f}s)"
+            print(f"[{feitas}/{total}] {tipo:<6} {cidade} {rotulo} {situacao}", flush=True)
+
+    print(f"Concluído em {time.monotonic() - inicio:.0f}s; {len(falhas)} falhas.")
+    return falhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aquece o cache de dados/ para cidades × anos.")
+    parser.add_argument("--cidades", nargs="+", default=cidades, help="padrão: todas as capitais de cidades.py")
+    parser.add_argument("--anos", default=f"{ANOS[0]}-{ANOS[-1]}", help="ano ou intervalo, ex. 2010-2024")
+    parser.add_argument("--tipos", nargs="+", choices=TIPOS, default=["clima", "pontos", "vento"])
+    parser.add_argument("--trabalhadores", type=int, default=4, help="tarefas simultâneas")
+    parser.add_argument("--taxa", type=float, help="requisições por segundo à API de arquivo")
+    parser.add_argument("--reiniciar", action="store_true", help="ignora o progresso salvo")
+    args = parser.parse_args(argv)
+
+    if args.taxa:
+        limitador.taxa = limitador.taxa_maxima = args.taxa
+
+    falhas = executar_prefetch(
+        args.cidades, intervalo_anos(args.anos), args.tipos,
+        trabalhadores=args.trabalhadores, estado=EstadoPrefetch(reiniciar=args.reiniciar),
+    )
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import time
+from shiny import reactive, req
+
+
+def debounce(atraso):
+    """Decorador para uma função reativa: só repassa o valor depois de `atraso` segundos sem mudanças.
+
+    Arrastar o slider de ano invalida a entrada a cada ano intermediário; com o
+    debounce as saídas só veem o ano em que o usuário parou.
+    """
+    def decorador(func):
+        prazo = reactive.value(None)
+        disparo = reactive.value(0)
+        primeira_vez = [True]
+
+        @reactive.calc
+        def atual():
+            return func()
+
+        @reactive.effect(priority=102)
+        def _rearmar():
+            atual()
+            if primeira_vez[0]:
+                primeira_vez[0] = False  # o valor inicial já sai direto em estabilizado()
+                return
+            prazo.set(time.monotonic() + atraso)
+
+        @reactive.effect(priority=101)
+        def _cronometro():
+            limite = prazo()
+            if limite is None:
+                return
+            restante = limite - time.monotonic()
+            if restante > 0:
+                reactive.invalidate_later(restante)
+                return
+            with reactive.isolate():
+                prazo.set(None)
+                disparo.set(disparo() + 1)
+
+        @reactive.calc
+        @reactive.event(disparo, ignore_none=False)
+        def estabilizado():
+            with reactive.isolate():
+                return atual()
+
+        return estabilizado
+    return decorador
+
+
+class TarefaRecente(reactive.ExtendedTask):
+    """ExtendedTask que só guarda o pedido mais recente: invocar de novo cancela o anterior.
+
+    O pedido que estava rodando (ou esperando na fila da tarefa) é cancelado;
+    trabalhadores.executar então desiste do job se ninguém mais o aguarda. Usar
+    como decorador de uma função async, igual a reactive.extended_task.
+    """
+
+    def invoke(self, *args, **kwargs):
+        self.cancel()
+        super().invoke(*args, **kwargs)
+
+    def result(self):
+        if self.status() == "cancelled":
+            # o pedido cancelado deu lugar a um mais novo: a saída segue como "em andamento"
+            # (mostrando o conteúdo anterior) em vez de ficar em branco
+            req(False, cancel_output="progress")
+        return super().result()
@@ -0,0 +1,103 @@
+import os
+import time
+import random
+import threading # o limitador é compartilhado por todas as threads/sessões
+import requests # requisições HTTP à API
+from requests.adapters import HTTPAdapter
+from metricas import etapa, contar
+
+# os endereços podem ser trocados por variável de ambiente (ex. servidor_simulado.py nos benchmarks)
+URL_ARCHIVE = os.environ.get("CLIMAZIN_URL_ARCHIVE", "https://archive-api.open-meteo.com/v1/archive")
+TAMANHO_POOL = 16 # conexões keep-alive por host; acima do número de threads que buscam pontos
+# (conexão, leitura) em segundos; pedidos de vários anos na API de arquivo demoram a responder
+TIMEOUT = (10, 120)
+
+
+def criar_sessao(tamanho_pool=TAMANHO_POOL):
+    """Sessão HTTP com pool de conexões reaproveitadas (evita um handshake TLS por requisição)"""
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+
+sessao = criar_sessao()
+
+
+class LimitadorTaxa:
+    """Token bucket adaptativo para a API de arquivo.
+
+    Cada requisição consome uma ficha; as fichas voltam a `taxa` por segundo.
+    Um 429 pausa todo mundo por um backoff exponencial com jitter e reduz a
+    taxa pela metade; cada sucesso devolve um pouco da taxa (AIMD).
+    """
+
+    def __init__(self, taxa=5.0, capacidade=10, taxa_minima=0.5, backoff_base=0.5, backoff_max=20.0):
+        self.taxa_maxima = taxa
+        self.taxa = taxa
+        self.taxa_minima = taxa_minima
+        self.capacidade = capacidade
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._fichas = float(capacidade)
+        self._ultimo = time.monotonic()
+        self._pausa_ate = 0.0
+        self._trava = threading.Lock()
+
+    def _repor(self, agora):
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def aguardar(self):
+        """Bloqueia até haver uma ficha disponível (e nenhuma pausa de 429 em curso)"""
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._repor(agora)
+                if agora >= self._pausa_ate and self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = max(self._pausa_ate - agora, (1 - self._fichas) / self.taxa)
+            time.sleep(espera)
+
+    def registrar_429(self, tentativa, retry_after=None):
+        with self._trava:
+            espera = min(self.backoff_max, self.backoff_base * 2 ** tentativa)
+            espera = random.uniform(espera / 2, espera)  # jitter: as threads não voltam todas juntas
+            if retry_after:
+                try:
+                    espera = max(espera, float(retry_after))
+                except ValueError:
+                    pass
+            self._pausa_ate = max(self._pausa_ate, time.monotonic() + espera)
+            self.taxa = max(self.taxa_minima, self.taxa / 2)
+            return espera
+
+    def registrar_sucesso(self):
+        with self._trava:
+            self.taxa = min(self.taxa_maxima, self.taxa + 0.1)
+
+
+limitador = LimitadorTaxa()
+
+
+def buscar_json(url, params=None, tentativas=5):
+    """GET com o limitador compartilhado; repete apenas em caso de 429"""
+    if tentativas < 1:
+        raise ValueError(f"tentativas deve ser pelo menos 1 (recebido {tentativas})")
+    for tentativa in range(tentativas):
+        with etapa("rede.espera_limitador"):
+            limitador.aguardar()
+        with etapa("rede.requisicao", url=url, tentativa=tentativa):
+            res = sessao.get(url, params=params, timeout=TIMEOUT)
+        contar(f"rede.status.{res.status_code}")
+        if res.status_code == 429:
+            espera = limitador.registrar_429(tentativa, res.headers.get("Retry-After"))
+            print(f"Erro 429 - pausando {espera:.1f}s (tentativa {tentativa+1}/{tentativas})")
+            continue
+        res.raise_for_status()
+        limitador.registrar_sucesso()
+        with etapa("rede.decodificacao"):
+            return res.json()
+    res.raise_for_status() # o último 429 vira HTTPError
@@ -0,0 +1,56 @@
+import io
+import os
+import threading
+from contextlib import contextmanager
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from armazenamento import escrita_atomica
+from metricas import etapa
+
+# as figuras são criadas direto com Figure + canvas Agg: nada passa pelo gerenciador
+# global do pyplot, então uma figura some da memória assim que deixa de ser referenciada
+# e threads diferentes não mexem na mesma "figura atual"
+
+# a rasterização usa caches de fontes do matplotlib compartilhados entre threads;
+# só essa etapa é serializada, a montagem das figuras roda em paralelo
+_trava_raster = threading.Lock()
+
+
+def nova_figura(figsize, projecao=None):
+    """(fig, ax) com um eixo só; `projecao` é uma projeção do cartopy para mapas"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(projection=projecao)
+    return fig, ax
+
+
+def liberar(fig):
+    """desmonta a figura (eixos, artistas, canvas) para não depender do coletor de ciclos"""
+    fig.clear()
+    fig.canvas = None
+
+
+@contextmanager
+def figura(figsize, projecao=None):
+    """nova_figura como gerenciador de contexto: a figura é liberada na saída do bloco"""
+    fig, ax = nova_figura(figsize, projecao)
+    try:
+        yield fig, ax
+    finally:
+        liberar(fig)
+
+
+def figura_png(fig, **kwargs):
+    """PNG da figura em bytes"""
+    buffer = io.BytesIO()
+    with _trava_raster, etapa("renderizacao.rasterizacao"):
+        fig.savefig(buffer, format='png', **kwargs)
+    return buffer.getvalue()
+
+
+def salvar_figura(fig, caminho, **kwargs):
+    """grava a figura em `caminho` de forma atômica (quem lê nunca vê um PNG pela metade)"""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with escrita_atomica(caminho) as temporario:
+        with _trava_raster, etapa("renderizacao.rasterizacao"):
+            fig.savefig(temporario, **kwargs)
@@ -0,0 +1,231 @@
+# substituto local das APIs do Open-Meteo (arquivo e geocoding), para medir sem rede:
+#   python -m servidor_simulado --porta 8765 --latencia 80 --taxa-429 0.02
+#   CLIMAZIN_URL_ARCHIVE=http://127.0.0.1:8765/v1/archive \
+#   CLIMAZIN_URL_GEOCODING=http://127.0.0.1:8765/v1/search python Clima.py
+# com --gravacoes PASTA as respostas gravadas lá são reproduzidas (e com --gravar, o que
+# faltar é buscado na API real e gravado); sem gravação, os dados são sintéticos mas
+# determinísticos (mesma coordenada e dia -> mesmo valor, em qualquer pedido)
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np # dados
+import pandas as pd # dados
+import requests # requisições HTTP à API
+
+URLS_REAIS = {
+    "/v1/archive": "https://archive-api.open-meteo.com/v1/archive",
+    "/v1/search": "https://geocoding-api.open-meteo.com/v1/search",
+}
+
+
+def _ruido(*campos):
+    """pseudoaleatório em [0, 1) que só depende dos argumentos (arrays numpy ou números)"""
+    x = sum((i + 1) * 12.9898 * np.asarray(c, dtype=float) for i, c in enumerate(campos))
+    return np.mod(np.sin(x) * 43758.5453, 1.0)
+
+
+def _serie_diaria(lat, lon, datas, variaveis):
+    dia = datas.dayofyear.to_numpy()
+    ordinal = (datas - pd.Timestamp("2000-01-01")).days.to_numpy()
+    # mais quente perto do equador e no verão do hemisfério sul
+    media = 27 - 0.35 * abs(lat) + 0.12 * abs(lat) * np.cos(2 * np.pi * dia / 365) + 2 * (_ruido(lat, lon, ordinal) - 0.5)
+    valores = {
+        "temperature_2m_max": media + 4 + _ruido(lon, ordinal),
+        "temperature_2m_min": media - 4 - _ruido(lat, ordinal),
+        "precipitation_sum": np.where(_ruido(ordinal, lat, lon) < 0.4, 30 * _ruido(lon, lat, ordinal) ** 2, 0.0),
+    }
+    return {v: np.round(valores[v], 1).tolist() for v in variaveis if v in valores}
+
+
+def _serie_horaria(lat, lon, horas, variaveis):
+    ordinal = ((horas - pd.Timestamp("2000-01-01")) // pd.Timedelta(hours=1)).to_numpy()
+    predominante = 90 + 60 * np.sin(2 * np.pi * ordinal / (24 * 365)) + lon  # alísios de leste, variando no ano
+    valores = {
+        "wind_speed_10m": 3 + 8 * _ruido(lat, lon, ordinal),
+        "wind_direction_10m": np.mod(predominante + 120 * (_ruido(ordinal, lat) - 0.5), 360),
+    }
+    return {v: np.round(valores[v], 1).tolist() for v in variaveis if v in valores}
+
+
+def resposta_arquivo(params):
+    """resposta no formato da API de arquivo (um objeto por coordenada; lista se houver várias)"""
+    lats = [float(v) for v in params["latitude"].split(",")]
+    lons = [float(v) for v in params["longitude"].split(",")]
+    inicio, fim = pd.Timestamp(params["start_date"]), pd.Timestamp(params["end_date"])
+    respostas = []
+    for lat, lon in zip(lats, lons):
+        resposta = {"latitude": lat, "longitude": lon, "timezone": params.get("timezone", "GMT")}
+        if params.get("daily"):
+            datas = pd.date_range(inicio, fim, freq="D")
+            resposta["daily"] = {"time": datas.strftime("%Y-%m-%d").tolist(),
+                                 **_serie_diaria(lat, lon, datas, params["daily"].split(","))}
+        if params.get("hourly"):
+            horas = pd.date_range(inicio, fim + pd.Timedelta(hours=23), freq="h")
+            resposta["hourly"] = {"time": horas.strftime("%Y-%m-%dT%H:%M").tolist(),
+                                  **_serie_horaria(lat, lon, horas, params["hourly"].split(","))}
+        respostas.append(resposta)
+    return respostas[0] if len(respostas) == 1 else respostas
+
+
+def resposta_geocoding(params):
+    """uma coordenada fixa por nome, dentro do Brasil"""
+    nome = params.get("name", "")
+    semente = int(hashlib.sha1(nome.encode("utf-8")).hexdigest()[:8], 16)
+    lat = round(-30 + 30 * (semente % 1000) / 1000, 4)
+    lon = round(-60 + 25 * (semente // 1000 % 1000) / 1000, 4)
+    return {"results": [{"name": nome, "latitude": lat, "longitude": lon, "country_code": "BR"}]}
+
+
+GERADORES = {
+    "/v1/archive": resposta_arquivo,
+    "/v1/search": resposta_geocoding,
+}
+
+
+class Gravacoes:
+    """respostas gravadas em PASTA/<endpoint>/<hash dos parâmetros>.json"""
+
+    def __init__(self, pasta, gravar=False):
+        self.pasta = pasta
+        self.gravar = gravar
+
+    def _arquivo(self, caminho, params):
+        chave = json.dumps(sorted(params.items()), ensure_ascii=False)
+        nome = hashlib.sha1(chave.encode("utf-8")).hexdigest()
+        return os.path.join(self.pasta, caminho.strip("/").replace("/", "_"), nome + ".json")
+
+    def obter(self, caminho, params):
+        """corpo gravado (bytes) ou None; com gravar=True busca na API real o que não estiver gravado"""
+        arquivo = self._arquivo(caminho, params)
+        if os.path.exists(arquivo):
+            with open(arquivo, "rb") as f:
+                return f.read()
+        if not self.gravar:
+            return None
+        res = requests.get(URLS_REAIS[caminho], params=params, timeout=120)
+        res.raise_for_status()
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        with open(arquivo, "wb") as f:
+            f.write(res.content)
+        return res.content
+
+
+class ServidorSimulado(ThreadingHTTPServer):
+    """HTTP local com latência e 429 configuráveis; conta os pedidos por endpoint"""
+    daemon_threads = True
+
+    def __init__(self, endereco, latencia_ms=0.0, variacao_ms=0.0, taxa_429=0.0, retry_after=1, gravacoes=None, semente=None):
+        super().__init__(endereco, _Manipulador)
+        self.latencia_ms = latencia_ms
+        self.variacao_ms = variacao_ms
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.gravacoes = gravacoes
+        self.aleatorio = random.Random(semente)
+        self._trava = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        with self._trava:
+            self.estatisticas = {"pedidos": {}, "429": 0, "gravados": 0, "sinteticos": 0, "bytes": 0}
+
+    def contar(self, campo, n=1):
+        with self._trava:
+            self.estatisticas[campo] += n
+
+    def contar_pedido(self, endpoint):
+        with self._trava:
+            self.estatisticas["pedidos"][endpoint] = self.estatisticas["pedidos"].get(endpoint, 0) + 1
+
+    def sortear(self):
+        """(atraso em s, responder com 429?) de um pedido"""
+        with self._trava:
+            atraso = max(0.0, self.aleatorio.uniform(self.latencia_ms - self.variacao_ms, self.latencia_ms + self.variacao_ms))
+            return atraso / 1000, self.aleatorio.random() < self.taxa_429
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como a API real
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, corpo, cabecalhos=()):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        servidor = self.server
+        partes = urlsplit(self.path)
+        params = dict(parse_qsl(partes.query))
+
+        if partes.path == "/_estatisticas":
+            with servidor._trava:
+                corpo = json.dumps(servidor.estatisticas).encode("utf-8")
+            if params.get("zerar") == "1":
+                servidor.zerar()
+            return self._responder(200, corpo)
+        if partes.path not in GERADORES:
+            return self._responder(404, b'{"error": true, "reason": "endpoint desconhecido"}')
+
+        servidor.contar_pedido(partes.path)
+        atraso, limitar = servidor.sortear()
+        time.sleep(atraso)
+        if limitar and partes.path == "/v1/archive":  # só a API de arquivo tem limite de taxa no app (rede.limitador)
+            servidor.contar("429")
+            return self._responder(429, b'{"error": true, "reason": "Too many requests"}',
+                                   [("Retry-After", str(servidor.retry_after))])
+
+        try:
+            corpo = servidor.gravacoes.obter(partes.path, params) if servidor.gravacoes else None
+            if corpo is not None:
+                servidor.contar("gravados")
+            else:
+                corpo = json.dumps(GERADORES[partes.path](params)).encode("utf-8")
+                servidor.contar("sinteticos")
+        except (KeyError, ValueError) as e:
+            return self._responder(400, json.dumps({"error": True, "reason": str(e)}).encode("utf-8"))
+        servidor.contar("bytes", len(corpo))
+        self._responder(200, corpo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local no lugar das APIs do Open-Meteo.")
+    parser.add_argument("--porta", type=int, default=8765, help="0 = porta livre qualquer")
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso médio por pedido (ms)")
+    parser.add_argument("--variacao", type=float, default=0.0, help="variação do atraso, para mais ou para menos (ms)")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="fração dos pedidos à API de arquivo respondida com 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After (s) dos 429")
+    parser.add_argument("--gravacoes", help="pasta com respostas gravadas para reproduzir")
+    parser.add_argument("--gravar", action="store_true", help="busca na API real e grava o que faltar em --gravacoes")
+    parser.add_argument("--semente", type=int, help="semente da latência e dos 429 (repetível)")
+    args = parser.parse_args(argv)
+
+    gravacoes = Gravacoes(args.gravacoes, args.gravar) if args.gravacoes else None
+    servidor = ServidorSimulado(("127.0.0.1", args.porta), args.latencia, args.variacao,
+                                args.taxa_429, args.retry_after, gravacoes, args.semente)
+    # a primeira linha é a porta, para quem sobe o servidor com --porta 0 (ex. benchmark.py)
+    print(servidor.server_address[1], flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
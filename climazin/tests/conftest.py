@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# os módulos do app usam imports planos (rodam de dentro de climazin/) e leem
+# CLIMAZIN_DADOS na importação: cada sessão de testes usa um cache vazio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CLIMAZIN_DADOS", tempfile.mkdtemp(prefix="climazin_testes_"))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--lentos", action="store_true", help="roda também os testes marcados como slow")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: testes de resistência, de minutos; só rodam com --lentos")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--lentos"):
+        return
+    pular = pytest.mark.skip(reason="teste lento: rodar com --lentos")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(pular)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from agregados import GRAUS_SETOR, NUM_SETORES, MIN_HORAS_SETOR, somar_setores, juntar_setores, medias_setores
+
+
+def horas_de_vento(n=2000, semente=0):
+    rng = np.random.default_rng(semente)
+    velocidade = rng.uniform(0, 15, n)
+    direcao = rng.uniform(0, 360, n)
+    direcao[:5] = 360.0  # norte escrito como 360°
+    velocidade[10:15] = np.nan
+    direcao[20:25] = np.nan
+    return velocidade, direcao
+
+
+def test_somas_iguais_ao_groupby_do_pandas():
+    velocidade, direcao = horas_de_vento()
+    df = pd.DataFrame({"velocidade": velocidade, "direcao": direcao}).dropna()
+    angulo = np.deg2rad(df["direcao"])
+    df["u"] = -df["velocidade"] * np.sin(angulo)
+    df["v"] = -df["velocidade"] * np.cos(angulo)
+    df["setor"] = (df["direcao"] % 360 // GRAUS_SETOR * GRAUS_SETOR).astype(int)
+    esperado = df.groupby("setor").agg(soma_u=("u", "sum"), soma_v=("v", "sum"), horas=("u", "size"))
+    esperado = esperado.reindex(np.arange(NUM_SETORES) * GRAUS_SETOR, fill_value=0)
+
+    obtido = somar_setores(velocidade, direcao).set_index("setor")
+    assert obtido["horas"].tolist() == esperado["horas"].tolist()
+    assert obtido["horas"].sum() == len(velocidade) - 10
+    # as contas são em float32
+    assert np.allclose(obtido["soma_u"], esperado["soma_u"], rtol=1e-4, atol=1e-2)
+    assert np.allclose(obtido["soma_v"], esperado["soma_v"], rtol=1e-4, atol=1e-2)
+
+
+def test_360_graus_entra_no_setor_zero():
+    obtido = somar_setores([10.0, 10.0, 10.0], [360.0, 0.0, 359.9])
+    assert obtido["horas"].tolist() == [2, 0, 0, 0, 0, 1]
+    # vento vindo do norte sopra para o sul
+    assert np.isclose(obtido["soma_v"][0], -20.0) and np.isclose(obtido["soma_u"][0], 0.0, atol=1e-5)
+
+
+def test_juntar_equivale_a_somar_tudo_de_uma_vez():
+    velocidade, direcao = horas_de_vento()
+    partes = juntar_setores(somar_setores(velocidade[:700], direcao[:700]), None,
+                            somar_setores(velocidade[700:], direcao[700:]))
+    inteiro = somar_setores(velocidade, direcao)
+    assert partes["horas"].tolist() == inteiro["horas"].tolist()
+    assert np.allclose(partes[["soma_u", "soma_v"]], inteiro[["soma_u", "soma_v"]], rtol=1e-4, atol=1e-2)
+
+
+def test_medias_so_dos_setores_com_horas_suficientes():
+    tabela = pd.DataFrame({
+        "setor": np.arange(NUM_SETORES) * GRAUS_SETOR,
+        "soma_u": np.full(NUM_SETORES, 600.0),
+        "soma_v": np.full(NUM_SETORES, -300.0),
+        "horas": [MIN_HORAS_SETOR, MIN_HORAS_SETOR + 1, 600, 0, 0, 0],
+    })
+    medias = medias_setores(tabela, -8.05, -34.9)
+    assert len(medias) == 2
+    assert np.allclose(medias["u"], [600 / (MIN_HORAS_SETOR + 1), 1.0])
+    assert (medias["lat"] == -8.05).all() and (medias["lon"] == -34.9).all()
@@ -0,0 +1,32 @@
+import os
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+import api_dados
+import artefatos
+from armazenamento import DIRETORIO_DADOS
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    async def sem_pool(*args):
+        raise AssertionError("pedido fora do catálogo não deveria chegar ao pool")
+    monkeypatch.setattr(api_dados, "executar", sem_pool)
+    monkeypatch.setattr(artefatos, "executar", sem_pool)
+    return TestClient(Starlette(routes=[Mount("/api", routes=api_dados.rotas)]))
+
+
+@pytest.mark.parametrize("caminho", [
+    "/api/serie/Paris/2020",
+    "/api/mensal/Paris/2020",
+    "/api/grade/temperatura/Paris/2020",
+    "/api/mapas/vento/Paris/2020.png",
+    "/api/serie/Recife/1990",
+    "/api/resumo?cidades=Recife,Paris",
+    "/api/resumo?cidades=..&anos=2000-2010",
+    "/api/resumo?anos=1990-2000",
+])
+def test_fora_do_catalogo_e_404_sem_buscar_nada(cliente, caminho):
+    assert cliente.get(caminho).status_code == 404
+    assert not os.path.exists(os.path.join(DIRETORIO_DADOS, "Paris"))
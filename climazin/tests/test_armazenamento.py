@@ -0,0 +1,77 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from armazenamento import ArmazenamentoColunar
+
+GRAVACOES = 200
+
+
+def _tabela(valor, linhas=500):
+    return pd.DataFrame({"date": pd.date_range("2020-01-01", periods=linhas, freq="h"),
+                         "temp": np.full(linhas, valor, dtype=np.float32),
+                         "vento": np.full(linhas, valor, dtype=np.float32)})
+
+
+def test_leitura_durante_regravacoes(tmp_path):
+    """quem lê enquanto outra thread regrava vê sempre uma versão inteira, sem FileNotFoundError"""
+    armazenamento = ArmazenamentoColunar()
+    base = str(tmp_path / "tabela")
+    armazenamento.salvar(_tabela(0), base)
+    erros = []
+    parar = threading.Event()
+
+    def gravar():
+        for valor in range(1, GRAVACOES + 1):
+            armazenamento.salvar(_tabela(valor), base)
+        parar.set()
+
+    def ler():
+        while not parar.is_set():
+            try:
+                df = armazenamento.ler(base)
+                valores = set(df["temp"]) | set(df["vento"])
+                if len(df) != 500 or len(valores) != 1:
+                    erros.append(f"tabela misturada: {sorted(valores)}")
+            except Exception as e:
+                erros.append(repr(e))
+
+    threads = [threading.Thread(target=gravar)] + [threading.Thread(target=ler) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
+    assert armazenamento.ler(base)["temp"].iloc[0] == GRAVACOES
+
+
+def test_gravacoes_concorrentes_nao_deixam_colunas_orfas(tmp_path):
+    armazenamento = ArmazenamentoColunar()
+    base = str(tmp_path / "tabela")
+    threads = [threading.Thread(target=lambda v=v: [armazenamento.salvar(_tabela(v), base) for _ in range(20)])
+               for v in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # passada a carência, a próxima gravação só deixa a versão nova e a substituída
+    armazenamento.GRACA_LIMPEZA = 0
+    armazenamento.salvar(_tabela(9), base)
+    colunas = [n for n in os.listdir(base + ".col") if n.endswith(".npy")]
+    assert len(colunas) == 2 * 3
+    assert set(armazenamento.ler(base)["temp"]) == {9}
+
+
+def test_csv_antigo_convertido_e_apagado(tmp_path):
+    import armazenamento
+    base = str(tmp_path / "dados_Recife_2020")
+    original = _tabela(1.5, linhas=48)
+    original.to_csv(base + ".csv", index=False)
+
+    df = armazenamento.ler_tabela(base, colunas_data=["date"])
+    assert not os.path.exists(base + ".csv")
+    assert os.path.exists(armazenamento.obter_armazenamento().caminho(base))
+    relida = armazenamento.ler_tabela(base, colunas_data=["date"])
+    assert list(relida.columns) == list(df.columns) and len(relida) == 48
+    assert (relida["date"] == original["date"]).all()
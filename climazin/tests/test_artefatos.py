@@ -0,0 +1,22 @@
+import os
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+import artefatos
+from armazenamento import arquivo_mapa
+
+
+def test_mapa_em_cache_nao_passa_pelo_pool(monkeypatch):
+    caminho = arquivo_mapa("Recife", 2020)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as f:
+        f.write(b"\x89PNG em cache")
+
+    async def pool_ocupado(*args):
+        raise AssertionError("um mapa em dia não deveria ir para o pool")
+    monkeypatch.setattr(artefatos, "executar", pool_ocupado)
+
+    cliente = TestClient(Starlette(routes=artefatos.rotas))
+    resposta = cliente.get("/mapas/temperatura/Recife/2020.png")
+    assert resposta.status_code == 200
+    assert resposta.content == b"\x89PNG em cache"
+    assert cliente.get("/mapas/temperatura/Recife/2020.png", headers={"If-None-Match": resposta.headers["etag"]}).status_code == 304
@@ -0,0 +1,115 @@
+import datetime as dt
+import numpy as np
+import pandas as pd
+import pytest
+import armazenamento
+from cobertura import (ATRASO_ARQUIVO, REVERIFICAR_APOS, periodo_ano, ano_fechado, cobertura_de,
+                       pendencias, agrupar_pedidos, dividir_por_ano, completar_anos, ler_cobertura)
+
+D = dt.date
+AGORA = dt.datetime(2025, 6, 1, 12)
+
+
+def test_periodo_e_ano_fechado_respeitam_o_atraso_do_arquivo():
+    hoje = D(2025, 6, 1)
+    assert periodo_ano(2025, hoje) == (D(2025, 1, 1), hoje - dt.timedelta(days=ATRASO_ARQUIVO))
+    assert not ano_fechado(2025, hoje)
+    assert periodo_ano(2026, hoje) is None and not ano_fechado(2026, hoje)
+
+    # o ano anterior só fecha quando 31/12 já foi publicado
+    assert not ano_fechado(2024, D(2024, 12, 31) + dt.timedelta(days=ATRASO_ARQUIVO - 1))
+    assert ano_fechado(2024, D(2024, 12, 31) + dt.timedelta(days=ATRASO_ARQUIVO))
+
+
+def test_cobertura_ignora_dias_ainda_nao_publicados():
+    df = pd.DataFrame({
+        "date": pd.date_range("2025-01-01", periods=10),
+        "temp": [20.0] * 7 + [None] * 3,
+        "precipitacao": [0.0] * 7 + [None] * 3,
+    })
+    cobertura = cobertura_de(df, ["temp", "precipitacao", "vento"])
+    assert (cobertura["inicio"], cobertura["fim"]) == (D(2025, 1, 1), D(2025, 1, 7))
+    assert cobertura["variaveis"] == ["temp", "precipitacao"]
+
+
+def test_sem_cobertura_pede_tudo():
+    periodo = (D(2020, 1, 1), D(2020, 12, 31))
+    assert pendencias(None, periodo, ["temp"]) == [(D(2020, 1, 1), D(2020, 12, 31), ("temp",))]
+
+
+def test_pede_so_variaveis_novas_e_dias_que_faltam():
+    cobertura = {"inicio": D(2020, 3, 1), "fim": D(2020, 12, 31), "variaveis": ["temp"], "verificado": None}
+    pedidos = pendencias(cobertura, (D(2020, 1, 1), D(2020, 12, 31)), ["temp", "precipitacao"], AGORA)
+    assert sorted(pedidos) == [
+        (D(2020, 1, 1), D(2020, 2, 29), ("temp", "precipitacao")),
+        (D(2020, 3, 1), D(2020, 12, 31), ("precipitacao",)),
+    ]
+    assert pendencias(cobertura, (D(2020, 3, 1), D(2020, 12, 31)), ["temp"], AGORA) == []
+
+
+def test_fim_do_ano_corrente_so_e_reverificado_depois_do_intervalo():
+    periodo = periodo_ano(2025, AGORA.date())
+    cobertura = {"inicio": D(2025, 1, 1), "fim": periodo[1] - dt.timedelta(days=2), "variaveis": ["temp"],
+                 "verificado": AGORA - REVERIFICAR_APOS / 2}
+    assert pendencias(cobertura, periodo, ["temp"], AGORA) == []
+
+    cobertura["verificado"] = AGORA - REVERIFICAR_APOS
+    assert pendencias(cobertura, periodo, ["temp"], AGORA) == [
+        (cobertura["fim"] + dt.timedelta(days=1), periodo[1], ("temp",))
+    ]
+    # cache sem a hora da verificação: pede de novo
+    cobertura["verificado"] = None
+    assert len(pendencias(cobertura, periodo, ["temp"], AGORA)) == 1
+
+
+def test_dividir_por_ano_na_virada():
+    novo = pd.DataFrame({"date": pd.date_range("2019-12-30", "2020-01-02"), "temp": [1.0, 2.0, 3.0, 4.0]})
+    partes = dividir_por_ano(novo)
+    assert sorted(partes) == [2019, 2020]
+    assert partes[2019]["temp"].tolist() == [1.0, 2.0]
+    assert partes[2020]["date"].min() == pd.Timestamp("2020-01-01")
+
+    horario = pd.DataFrame({"hora": pd.date_range("2019-12-31 22:00", periods=4, freq="h"), "vento": 1.0})
+    assert {ano: len(p) for ano, p in dividir_por_ano(horario, "hora").items()} == {2019: 2, 2020: 2}
+
+
+def test_agrupar_pedidos_contiguos_ate_o_limite():
+    pedidos = [(D(ano, 1, 1), D(ano, 12, 31), ("temp",)) for ano in range(2000, 2013)]
+    assert agrupar_pedidos(pedidos, anos_por_pedido=10) == [
+        (D(2000, 1, 1), D(2009, 12, 31), ("temp",)),
+        (D(2010, 1, 1), D(2012, 12, 31), ("temp",)),
+    ]
+    # variáveis diferentes ou um buraco entre os anos separam os pedidos
+    separados = [(D(2000, 1, 1), D(2000, 12, 31), ("temp",)), (D(2001, 1, 1), D(2001, 12, 31), ("chuva",)),
+                 (D(2003, 1, 1), D(2003, 12, 31), ("chuva",))]
+    assert agrupar_pedidos(separados) == separados
+
+
+@pytest.fixture
+def sem_observador(monkeypatch):
+    monkeypatch.setattr(armazenamento, "_observador", None)
+
+
+def test_completar_anos_busca_uma_vez_e_reparte(tmp_path, sem_observador):
+    bases = {ano: str(tmp_path / str(ano) / f"dados_{ano}") for ano in (2018, 2019, 2020)}
+    pedidos = []
+
+    def buscar(inicio, fim, variaveis):
+        pedidos.append((inicio, fim, variaveis))
+        datas = pd.date_range(inicio, fim)
+        return pd.DataFrame({"date": datas, **{v: np.arange(len(datas), dtype=float) for v in variaveis}})
+
+    tabelas, mudaram = completar_anos(bases, ["temp"], buscar)
+    assert pedidos == [(D(2018, 1, 1), D(2020, 12, 31), ("temp",))]
+    assert mudaram == {2018, 2019, 2020}
+    assert len(tabelas[2020]) == 366 and tabelas[2019]["date"].dt.year.eq(2019).all()
+    assert ler_cobertura(bases[2019])["fim"] == D(2019, 12, 31)
+
+    # tudo em cache: nenhum pedido; variável nova: só ela, para os três anos juntos
+    pedidos.clear()
+    tabelas, mudaram = completar_anos(bases, ["temp"], buscar)
+    assert pedidos == [] and mudaram == set()
+    tabelas, mudaram = completar_anos(bases, ["temp", "precipitacao"], buscar)
+    assert pedidos == [(D(2018, 1, 1), D(2020, 12, 31), ("precipitacao",))]
+    assert tabelas[2018][["temp", "precipitacao"]].notna().all().all()
+    assert armazenamento.tabela_existe(bases[2020])
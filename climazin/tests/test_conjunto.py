@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+import armazenamento
+import conjunto
+
+ANOS = range(2015, 2021)
+
+
+def salvar_ano(cidade, ano, temp, dias=None):
+    datas = pd.date_range(f"{ano}-01-01", f"{ano}-12-31")[:dias]
+    chuva = np.where(np.arange(len(datas)) % 4 == 0, 5.0, 0.0)
+    df = pd.DataFrame({
+        "date": datas, "temp": temp, "temp_max": temp + 5, "temp_min": temp - 5, "precipitacao": chuva,
+    })
+    armazenamento.salvar_tabela(df, conjunto._base(cidade, ano))
+    return df
+
+
+@pytest.fixture
+def dados(tmp_path, monkeypatch):
+    """Recife esquenta 0,03 °C por ano; Natal tem um ano incompleto (2020)"""
+    monkeypatch.setattr(conjunto, "DIRETORIO_DADOS", str(tmp_path))
+    monkeypatch.setattr(armazenamento, "_observador", None)
+    conjunto._memoria.clear()
+    for ano in ANOS:
+        salvar_ano("Recife", ano, 26.0 + 0.03 * (ano - 2015))
+        salvar_ano("Natal", ano, 27.0, dias=100 if ano == 2020 else None)
+    yield
+    conjunto._memoria.clear()
+
+
+def test_particoes_filtram_sem_abrir(dados):
+    assert [(c, a) for c, a, _ in conjunto.particoes(["Natal"], anos=[2016, 2017, 2030])] == [("Natal", 2016), ("Natal", 2017)]
+    datas = conjunto.particoes(["Recife"], inicio="2019-06-01", fim="2020-02-01")
+    assert [a for _, a, _ in datas] == [2019, 2020]
+    assert conjunto.tabela(["temp"], ["Recife"], inicio="2019-12-30", fim="2020-01-02")["date"].dt.year.tolist() == [2019, 2019, 2020, 2020]
+
+
+def test_resumo_anual_igual_ao_groupby(dados):
+    resumo = conjunto.resumo_anual(["Recife", "Natal"]).set_index(["cidade", "ano"])
+    bruto = conjunto.tabela(cidades=["Recife", "Natal"])
+    esperado = bruto.groupby(["cidade", "ano"], observed=True).agg(
+        dias=("temp", "size"), temp_media=("temp", "mean"), precipitacao=("precipitacao", "sum"))
+    assert resumo["dias"].tolist() == esperado["dias"].tolist()
+    assert np.allclose(resumo["temp_media"], esperado["temp_media"])
+    assert np.allclose(resumo["precipitacao"], esperado["precipitacao"])
+    assert resumo.loc[("Natal", 2020), "dias"] == 100 and not resumo.loc[("Natal", 2020), "completo"]
+    assert resumo.loc[("Recife", 2016), "dias_chuva"] == 92
+    assert resumo.loc[("Recife", 2016), "dia_temp_max"] == pd.Timestamp("2016-01-01")
+
+
+def test_resumo_anual_fica_em_memoria_ate_a_particao_mudar(dados, monkeypatch):
+    calculos = []
+    original = conjunto.calcular_resumo_anual
+    monkeypatch.setattr(conjunto, "calcular_resumo_anual", lambda df: calculos.append(1) or original(df))
+
+    primeiro = conjunto.resumo_anual(["Recife"])
+    primeiro.loc[0, "temp_media"] = -99  # a cópia devolvida não altera a memória
+    segundo = conjunto.resumo_anual(["Recife"])
+    assert len(calculos) == 1 and segundo.loc[0, "temp_media"] != -99
+
+    salvar_ano("Recife", 2018, 30.0)
+    terceiro = conjunto.resumo_anual(["Recife"]).set_index("ano")
+    assert len(calculos) == 2
+    assert np.isclose(terceiro.loc[2018, "temp_media"], 30.0)
+
+
+def test_tendencia_por_decada_so_com_anos_completos(dados):
+    tendencia = conjunto.tendencia(conjunto.resumo_anual(["Recife", "Natal"])).set_index("cidade")
+    assert np.isclose(tendencia.loc["Recife", "por_decada"], 0.3, atol=1e-4)
+    assert tendencia.loc["Natal", "anos"] == len(ANOS) - 1
+    assert np.isclose(tendencia.loc["Natal", "por_decada"], 0.0, atol=1e-4)
+
+
+def test_anomalias_em_relacao_a_normal_da_cidade(dados):
+    resumo = conjunto.anomalias(conjunto.resumo_anual(["Recife", "Natal"]), referencia=(2015, 2017))
+    recife = resumo[resumo["cidade"] == "Recife"].set_index("ano")
+    # normal de 2015–2017 = 26,03 °C
+    assert np.isclose(recife.loc[2020, "anomalia_temp"], 0.12, atol=1e-4)
+    assert np.isclose(recife.loc[2016, "precipitacao_pct_normal"], 100.0)  # 92 dias de 5 mm em todo ano
+    natal = resumo[resumo["cidade"] == "Natal"].set_index("ano")
+    assert np.isnan(natal.loc[2020, "anomalia_temp"]) and np.isclose(natal.loc[2019, "anomalia_temp"], 0.0)
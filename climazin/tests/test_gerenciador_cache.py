@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import armazenamento
+from gerenciador_cache import GerenciadorCache, SUFIXO_DEPENDENCIAS, PROTECAO
+
+KB = 1024
+AGORA = time.time()
+
+
+def test_observador_registrado_ao_importar_coleta():
+    import coleta  # noqa: F401
+    import gerenciador_cache
+    assert armazenamento._observador is gerenciador_cache.gerenciador
+
+
+@pytest.fixture
+def observado(tmp_path, monkeypatch):
+    """um gerenciador só do teste no lugar do global, com a estimativa já conhecida (sem varredura)"""
+    gerenciador = GerenciadorCache(str(tmp_path), cota_mb=100)
+    gerenciador._estimativa = 0
+    monkeypatch.setattr(armazenamento, "_observador", gerenciador)
+    return gerenciador
+
+
+def _tabela(linhas=100):
+    return pd.DataFrame({"date": pd.date_range("2020-01-01", periods=linhas), "temp": np.arange(linhas, dtype=float)})
+
+
+def test_salvar_e_remover_atualizam_o_uso(tmp_path, observado):
+    base = str(tmp_path / "Recife" / "2020" / "dados_Recife_2020")
+    armazenamento.salvar_tabela(_tabela(), base)
+    caminho = armazenamento.obter_armazenamento().caminho(base)
+    tamanho = os.path.getsize(caminho)
+    assert observado._tamanhos[caminho] == tamanho
+    assert observado._estimativa == tamanho
+    assert caminho in observado._ultimo_acesso
+
+    # regravar troca o tamanho, não soma de novo
+    armazenamento.salvar_tabela(_tabela(200), base)
+    assert observado._estimativa == os.path.getsize(caminho)
+
+    armazenamento.remover_tabela(base)
+    assert caminho not in observado._tamanhos and caminho not in observado._ultimo_acesso
+    assert observado._estimativa == 0
+
+
+def test_ler_registra_o_acesso(tmp_path, observado):
+    base = str(tmp_path / "Recife" / "2020" / "dados_Recife_2020")
+    armazenamento.salvar_tabela(_tabela(), base)
+    caminho = armazenamento.obter_armazenamento().caminho(base)
+    os.utime(caminho, (AGORA - 5000, os.stat(caminho).st_mtime))
+    observado._ultimo_acesso.clear()
+
+    armazenamento.ler_tabela(base)
+    assert os.stat(caminho).st_atime > AGORA - 60
+    assert caminho in observado._ultimo_acesso
+
+
+def test_migrar_csv_passa_pela_cota(tmp_path, observado):
+    base = str(tmp_path / "Recife" / "2020" / "dados_Recife_2020")
+    os.makedirs(os.path.dirname(base))
+    _tabela().to_csv(base + ".csv", index=False)
+    assert armazenamento.migrar_csv(str(tmp_path), remover_csv=True) == 1
+
+    caminho = armazenamento.obter_armazenamento().caminho(base)
+    assert not os.path.exists(base + ".csv")
+    assert observado._tamanhos == {caminho: os.path.getsize(caminho)}
+
+
+
+def _entrada(raiz, relativo, idade, kb=100):
+    """arquivo de `kb` KB acessado há `idade` segundos (o atime é o último acesso da entrada)"""
+    caminho = os.path.join(raiz, relativo)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, "wb") as f:
+        f.write(b"\0" * kb * KB)
+    os.utime(caminho, (AGORA - idade, AGORA - idade))
+    return caminho
+
+
+def _tabelas(raiz, idades):
+    """uma tabela .npz por idade: dados_T<i> em <raiz>/Cidade/2020"""
+    return [_entrada(raiz, f"Cidade/2020/dados_T{i}.npz", idade) for i, idade in enumerate(idades)]
+
+
+# 8 entradas de 100 KB numa cota de 500 KB: a limpeza vai até 90% (450 KB), então saem 4
+COTA_MB = 500 / 1024
+
+
+def test_lru_apaga_as_menos_recentes(tmp_path):
+    raiz = str(tmp_path)
+    caminhos = _tabelas(raiz, [8000, 1000, 7000, 2000, 6000, 3000, 5000, 4000])
+    apagadas = GerenciadorCache(raiz, COTA_MB, "lru").limpar()
+
+    assert len(apagadas) == 4
+    restantes = [os.path.basename(c) for c in caminhos if os.path.exists(c)]
+    assert restantes == ["dados_T1.npz", "dados_T3.npz", "dados_T5.npz", "dados_T7.npz"]
+
+
+def test_lfu_apaga_as_menos_acessadas(tmp_path):
+    raiz = str(tmp_path)
+    caminhos = _tabelas(raiz, [1000 + i for i in range(8)])
+    acessos = {f"Cidade/2020/dados_T{i}": n for i, n in enumerate([9, 1, 8, 2, 7, 3, 6, 4])}
+    with open(os.path.join(raiz, "cache_frequencia.json"), "w", encoding="utf-8") as f:
+        json.dump(acessos, f)
+    GerenciadorCache(raiz, COTA_MB, "lfu").limpar()
+
+    restantes = [os.path.basename(c) for c in caminhos if os.path.exists(c)]
+    assert restantes == ["dados_T0.npz", "dados_T2.npz", "dados_T4.npz", "dados_T6.npz"]
+
+
+def test_acessadas_na_janela_de_protecao_ficam(tmp_path):
+    raiz = str(tmp_path)
+    recentes = [PROTECAO - 60] * 6
+    caminhos = _tabelas(raiz, [PROTECAO + 60, PROTECAO + 120] + recentes)
+    apagadas = GerenciadorCache(raiz, COTA_MB, "lru").limpar()
+
+    # mesmo acima da cota, só as duas fora da janela saem
+    assert len(apagadas) == 2
+    assert [os.path.exists(c) for c in caminhos] == [False, False] + [True] * 6
+
+
+def _mapa(raiz, relativo, idade, fontes):
+    png = _entrada(raiz, relativo, idade)
+    with open(png + SUFIXO_DEPENDENCIAS, "w", encoding="utf-8") as f:
+        json.dump(fontes, f)
+    return png
+
+
+def test_fonte_vale_o_derivado_mais_usado(tmp_path):
+    raiz = str(tmp_path)
+    # a fonte é a mais antiga, mas o mapa que deriva dela foi visto há pouco (fora da proteção)
+    fonte = _entrada(raiz, "pontos/-8.00_-35.00/2020/setores.npz", 9000)
+    png = _mapa(raiz, "Recife/2020/cache_mapas/Recife_2020.png", PROTECAO + 10, ["pontos/-8.00_-35.00/2020/setores"])
+    outras = _tabelas(raiz, [5000, 6000, 7000, 8000, 4000, 3000])
+    GerenciadorCache(raiz, COTA_MB, "lru").limpar()
+
+    assert os.path.exists(fonte) and os.path.exists(png)
+    assert [os.path.exists(c) for c in outras] == [False, False, False, False, True, True]
+
+
+def test_derivados_saem_com_a_fonte(tmp_path):
+    raiz = str(tmp_path)
+    fonte = _entrada(raiz, "pontos/-8.00_-35.00/2020/setores.npz", 9000)
+    png = _mapa(raiz, "Recife/2020/cache_mapas/Recife_2020.png", 8500, ["pontos/-8.00_-35.00/2020/setores"])
+    diario = _entrada(raiz, "Recife/2020/dados_Recife_2020.npz", 8000)
+    mensal = _entrada(raiz, "Recife/2020/mensal_Recife_2020.npz", 7000)
+    outras = _tabelas(raiz, [1000, 2000, 3000, 4000])
+    apagadas = GerenciadorCache(raiz, COTA_MB, "lru").limpar()
+
+    assert {os.path.basename(e.chave) for e in apagadas} == {"setores", "Recife_2020.png", "dados_Recife_2020", "mensal_Recife_2020"}
+    for caminho in (fonte, png, png + SUFIXO_DEPENDENCIAS, diario, mensal):
+        assert not os.path.exists(caminho)
+    assert all(os.path.exists(c) for c in outras)
+
+
+def test_fonte_de_derivado_protegido_fica(tmp_path):
+    raiz = str(tmp_path)
+    fonte = _entrada(raiz, "pontos/-8.00_-35.00/2020/setores.npz", 9000)
+    png = _mapa(raiz, "Recife/2020/cache_mapas/Recife_2020.png", 30, ["pontos/-8.00_-35.00/2020/setores"])
+    outras = _tabelas(raiz, [1000, 2000, 3000, 4000, 5000, 6000])
+    # cota minúscula: tudo que pode sair sai, mas o mapa em uso e a fonte dele ficam
+    GerenciadorCache(raiz, 0.01, "lru").limpar()
+
+    assert os.path.exists(png) and os.path.exists(fonte)
+    assert not any(os.path.exists(c) for c in outras)
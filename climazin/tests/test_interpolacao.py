@@ -0,0 +1,70 @@
+import numpy as np
+from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator
+from interpolacao import Interpolador, CacheInterpoladores, grade_regular
+
+
+def amostra(semente=0, n=40):
+    rng = np.random.default_rng(semente)
+    pontos = rng.uniform(-5, 5, size=(n, 2))
+    return pontos, rng.normal(25, 3, n), rng.normal(0, 5, n)
+
+
+def test_pesos_baricentricos_iguais_aos_do_scipy():
+    pontos, temp, u = amostra()
+    grade_x, grade_y = grade_regular(-6, 6, -6, 6, n=50)
+    interpolador = Interpolador(pontos, grade_x, grade_y)
+
+    # pesos de cada nó somam 1 e, dentro do fecho, não são negativos
+    assert np.allclose(interpolador.pesos.sum(axis=1), 1)
+    assert (interpolador.pesos > -1e-9).all()
+
+    obtidos = interpolador.aplicar(temp, u)
+    for campo, obtido in zip((temp, u), obtidos):
+        esperado = LinearNDInterpolator(pontos, campo)(grade_x, grade_y)
+        assert obtido.shape == grade_x.shape
+        assert np.array_equal(np.isnan(obtido), np.isnan(esperado))
+        assert np.allclose(obtido, esperado, equal_nan=True)
+
+
+def test_preencher_usa_o_vizinho_mais_proximo_fora_do_fecho():
+    pontos, temp, _ = amostra(semente=1)
+    grade_x, grade_y = grade_regular(-6, 6, -6, 6, n=30)
+    interpolador = Interpolador(pontos, grade_x, grade_y)
+
+    obtido, = interpolador.aplicar(temp, preencher=True)
+    fora = np.isnan(LinearNDInterpolator(pontos, temp)(grade_x, grade_y))
+    assert fora.any() and not np.isnan(obtido).any()
+    vizinho = NearestNDInterpolator(pontos, temp)(grade_x, grade_y)
+    assert np.allclose(obtido[fora], vizinho[fora])
+
+
+def test_pontos_colineares_sem_triangulacao():
+    pontos = [(x, 0.0) for x in range(5)]
+    grade_x, grade_y = grade_regular(0, 4, -1, 1, n=5)
+    interpolador = Interpolador(pontos, grade_x, grade_y)
+    assert not interpolador.dentro.any()
+    obtido, = interpolador.aplicar(np.arange(5.0), preencher=True)
+    assert np.allclose(obtido[0], np.arange(5.0))
+
+
+def test_cache_reaproveita_pela_geometria():
+    pontos, _, _ = amostra()
+    cache = CacheInterpoladores(tamanho=2)
+    limites = (-6, 6, -6, 6)
+
+    primeiro = cache.obter(pontos, limites, n=20)
+    # diferenças abaixo do arredondamento da chave não geram outra triangulação
+    assert cache.obter(pontos + 1e-9, limites, n=20) is primeiro
+    assert cache.chave(pontos, limites, 20) == cache.chave(pontos + 1e-9, limites, 20)
+    assert cache.chave(pontos, limites, 20) != cache.chave(pontos, limites, 30)
+    assert cache.chave(pontos, limites, 20) != cache.chave(pontos, (-5, 5, -5, 5), 20)
+
+    outro = cache.obter(pontos, limites, n=30)
+    assert outro is not primeiro
+    assert outro[1].shape == (30, 30)
+
+    # LRU: o primeiro foi usado por último antes de entrar um terceiro
+    cache.obter(pontos, limites, n=20)
+    cache.obter(pontos[:-1], limites, n=20)
+    assert cache.obter(pontos, limites, n=20) is primeiro
+    assert len(cache._itens) == 2
@@ -0,0 +1,34 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import armazenamento
+from malha import descartar_cache_antigo, ponto_malha, pontos_centrados, arquivo_ponto
+
+
+def test_ponto_malha_na_celula_era5():
+    assert ponto_malha(-8.05, -34.9) == (-8.0, -35.0)
+    assert ponto_malha(-0.1, 0.1) == (0.0, 0.0)  # sem -0.0
+    assert len(pontos_centrados(-8.05, -34.9, 5, 0.5)) == 25
+
+
+@pytest.fixture
+def raiz(tmp_path, monkeypatch):
+    monkeypatch.setattr(armazenamento, "_observador", None)
+    df = pd.DataFrame({"date": pd.date_range("2020-01-01", periods=3), "temp": np.ones(3)})
+    for base in ("cache_pontos/-8.05_-34.9/2020/dados", "Recife/2020/vento_-8.00_-35.00",
+                 "Recife/2020/dados_Recife_2020"):
+        armazenamento.salvar_tabela(df, str(tmp_path / base))
+    return tmp_path
+
+
+def test_cache_antigo_nao_vai_para_a_malha(raiz):
+    # sem models=era5 os dados não são os da célula: nada é movido, o ponto é buscado de novo
+    assert descartar_cache_antigo(str(raiz), simular=True) == 2
+    assert armazenamento.tabela_existe(str(raiz / "cache_pontos/-8.05_-34.9/2020/dados"))
+
+    assert descartar_cache_antigo(str(raiz)) == 2
+    assert not os.path.exists(raiz / "cache_pontos")
+    assert not armazenamento.tabela_existe(str(raiz / "Recife/2020/vento_-8.00_-35.00"))
+    assert not armazenamento.tabela_existe(arquivo_ponto(-8.05, -34.9, 2020, "diario", str(raiz)))
+    assert armazenamento.tabela_existe(str(raiz / "Recife/2020/dados_Recife_2020"))
@@ -0,0 +1,27 @@
+import asyncio
+from shiny import reactive
+from reativo import TarefaRecente
+
+
+def test_tarefa_recente_cancela_o_pedido_anterior():
+    canceladas = []
+
+    async def cenario():
+        @TarefaRecente
+        async def tarefa(n):
+            try:
+                await asyncio.sleep(0.2 if n == 1 else 0)
+            except asyncio.CancelledError:
+                canceladas.append(n)
+                raise
+            return n
+
+        tarefa.invoke(1)
+        await asyncio.sleep(0.05)
+        tarefa.invoke(2)
+        await asyncio.sleep(0.1)
+        with reactive.isolate():
+            return tarefa.status(), tarefa.value()
+
+    assert asyncio.run(cenario()) == ("success", 2)
+    assert canceladas == [1]
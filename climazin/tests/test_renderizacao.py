@@ -0,0 +1,80 @@
+# resistência da renderização: muitas rodadas dos gráficos com dados sintéticos (sem
+# rede, sem cartopy) e o RSS do processo não pode crescer depois do aquecimento; roda
+# com `python -m pytest tests --lentos`
+import sys
+import resource
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import pytest
+from graficos import (desenhar_grafico_temperatura, desenhar_grafico_chuva,
+                      desenhar_panorama_capitais, desenhar_tendencia)
+from renderizacao import figura_png, liberar
+
+AQUECIMENTO = 20 # rodadas antes da medição de base (caches de fonte, glifos, etc.)
+RODADAS = 100
+THREADS = 4
+TOLERANCIA_MB = 30.0
+
+
+def rss_mb():
+    """RSS atual (Linux: /proc/self/statm); em outros sistemas, o pico do processo"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+def _dados_sinteticos(semente):
+    rng = np.random.default_rng(semente)
+    meses = pd.Index(range(1, 13), name="mes")
+    medias = pd.Series(26 + 2 * np.sin(np.arange(12) / 2) + rng.normal(0, 0.3, 12), index=meses)
+    chuva = pd.Series(rng.uniform(0, 400, 12), index=meses)
+    panorama = pd.DataFrame({
+        "cidade": [f"Capital {i}" for i in range(27)],
+        "anomalia_temp": rng.normal(0, 0.8, 27),
+        "precipitacao_pct_normal": rng.uniform(50, 150, 27),
+    })
+    anos = np.arange(2000, 2025)
+    serie = pd.DataFrame({
+        "ano": anos,
+        "temp_media": 26 + 0.02 * (anos - 2000) + rng.normal(0, 0.3, len(anos)),
+        "precipitacao": rng.uniform(1000, 2000, len(anos)),
+        "completo": anos < 2024,
+    })
+    serie["anomalia_temp"] = serie["temp_media"] - serie["temp_media"].mean()
+    serie["precipitacao_pct_normal"] = 100 * serie["precipitacao"] / serie["precipitacao"].mean()
+    return medias, chuva, panorama, serie
+
+
+def renderizar_todos(semente):
+    """uma rodada dos gráficos do app; devolve o total de bytes de PNG gerados"""
+    medias, chuva, panorama, serie = _dados_sinteticos(semente)
+    figuras = [
+        lambda: desenhar_grafico_temperatura(medias, "Recife", 2020),
+        lambda: desenhar_grafico_chuva(chuva, "Recife", 2020),
+        lambda: desenhar_panorama_capitais(panorama, "temperatura", 2020),
+        lambda: desenhar_panorama_capitais(panorama, "chuva", 2020),
+        lambda: desenhar_tendencia(serie, 0.2, "temperatura", "Recife"),
+        lambda: desenhar_tendencia(serie, None, "chuva", "Recife"),
+    ]
+    total = 0
+    for desenhar in figuras:
+        fig = desenhar()
+        try:
+            total += len(figura_png(fig))
+        finally:
+            liberar(fig)
+    return total
+
+
+@pytest.mark.slow
+def test_rss_estavel_ao_renderizar_graficos():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=THREADS) as executor:
+        assert all(list(executor.map(renderizar_todos, range(AQUECIMENTO))))
+        base = rss_mb()
+        assert all(list(executor.map(renderizar_todos, range(AQUECIMENTO, AQUECIMENTO + RODADAS))))
+    crescimento = rss_mb() - base
+    assert crescimento < TOLERANCIA_MB, f"RSS cresceu {crescimento:.1f} MB em {RODADAS} rodadas"
@@ -0,0 +1,36 @@
+import os
+import asyncio
+import pytest
+import trabalhadores
+
+
+def _morrer_na_primeira(marcador):
+    """derruba o processo filho (como um OOM) na primeira chamada; depois responde normalmente"""
+    if not os.path.exists(marcador):
+        open(marcador, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+@pytest.fixture(autouse=True)
+def pool_pequeno(monkeypatch):
+    monkeypatch.setattr(trabalhadores, "NUM_TRABALHADORES", 1)
+    trabalhadores.encerrar_pool()
+    yield
+    trabalhadores.encerrar_pool()
+
+
+def test_executar_recria_o_pool_quebrado(tmp_path):
+    marcador = str(tmp_path / "morreu")
+    pool = trabalhadores.obter_pool()
+    pid = asyncio.run(trabalhadores.executar(_morrer_na_primeira, marcador))
+    assert os.path.exists(marcador) and pid != os.getpid()
+    assert trabalhadores.obter_pool() is not pool
+    # e os pedidos seguintes continuam funcionando
+    assert asyncio.run(trabalhadores.executar(os.getpid)) == pid
+
+
+def test_submeter_recria_o_pool_quebrado(tmp_path):
+    marcador = str(tmp_path / "morreu")
+    futuro = trabalhadores.submeter(_morrer_na_primeira, marcador)
+    assert futuro.result(timeout=60) != os.getpid()
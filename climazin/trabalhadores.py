@@ -0,0 +1,159 @@
+import os
+import atexit
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from metricas import metricas
+from ClimaAPI import PRECARREGAR, precarregar
+
+# busca, interpolação e rasterização rodam em processos separados: o loop de eventos
+# do Shiny fica livre e o matplotlib não disputa o GIL com as outras sessões
+NUM_TRABALHADORES = int(os.environ.get("CLIMAZIN_TRABALHADORES", os.cpu_count() or 2))
+
+_pool = None
+_trava_pool = threading.Lock()
+_em_andamento = {}
+
+
+def obter_pool():
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            # spawn em vez de fork: o processo principal já tem threads (aquecimento, servidor)
+            # com CLIMAZIN_PRECARREGAR cada processo importa os subsistemas ao nascer: sobe mais
+            # devagar, mas o primeiro job não paga o import do cartopy/metpy
+            _pool = ProcessPoolExecutor(max_workers=NUM_TRABALHADORES, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=precarregar if PRECARREGAR else None)
+        return _pool
+
+
+def _descartar_pool(quebrado):
+    """um processo morreu (ex. OOM no meio de um mapa) e o pool não aceita mais jobs: o próximo obter_pool cria outro"""
+    global _pool
+    with _trava_pool:
+        if _pool is not quebrado:
+            return  # outro interessado no mesmo pool já o descartou
+        _pool = None
+    quebrado.shutdown(wait=False, cancel_futures=True)
+    print("Um processo do pool morreu; o pool será recriado.")
+
+
+def iniciar_pool():
+    """sobe todos os processos do pool agora, em vez de no primeiro job que precisar de cada um"""
+    pool = obter_pool()
+    for _ in range(NUM_TRABALHADORES):
+        pool.submit(os.getpid)
+
+
+def encerrar_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(encerrar_pool)
+
+
+def _rodar_medindo(func, *args):
+    """roda no processo filho: devolve (ok, resultado ou erro, métricas do job) para somar no processo principal"""
+    try:
+        ok, valor = True, func(*args)
+    except Exception as e:
+        ok, valor = False, e
+    return ok, valor, metricas.extrair()
+
+
+def _incorporar_metricas(futuro):
+    if not futuro.cancelled() and futuro.exception() is None:
+        metricas.incorporar(futuro.result()[2])
+
+
+def submeter(func, *args):
+    """func(*args) no pool para quem está fora do loop de eventos (ex. a thread de aquecimento); devolve um Future
+
+    Se o pool quebrar no caminho, ele é recriado e o job enviado mais uma vez.
+    """
+    resultado = Future()
+
+    def enviar(tentativa):
+        pool = obter_pool()
+        try:
+            futuro = pool.submit(_rodar_medindo, func, *args)
+        except BrokenProcessPool as e:
+            _descartar_pool(pool)
+            if tentativa == 0:
+                enviar(1)
+            else:
+                resultado.set_exception(e)
+            return
+        futuro.add_done_callback(_incorporar_metricas)
+
+        def repassar(futuro):
+            if futuro.cancelled():
+                resultado.cancel()
+            elif isinstance(futuro.exception(), BrokenProcessPool):
+                _descartar_pool(pool)
+                if tentativa == 0:
+                    enviar(1)
+                else:
+                    resultado.set_exception(futuro.exception())
+            elif futuro.exception() is not None:
+                resultado.set_exception(futuro.exception())
+            else:
+                resultado.set_result(futuro.result())
+        futuro.add_done_callback(repassar)
+
+    enviar(0)
+    return resultado
+
+
+async def executar(func, *args):
+    """Roda func(*args) no pool de processos; pedidos iguais em andamento compartilham o mesmo job.
+
+    `func` precisa ser uma função de módulo (é enviada por nome ao processo filho).
+    Se todos os interessados desistirem (cancelamento) antes de o job começar a
+    rodar, ele sai da fila do pool. Se um processo morrer e quebrar o pool, ele é
+    recriado e o pedido repetido uma vez.
+    """
+    try:
+        return await _executar_no_pool(func, args)
+    except BrokenProcessPool:
+        return await _executar_no_pool(func, args)
+
+
+async def _executar_no_pool(func, args):
+    chave = (func.__module__, func.__qualname__, args)
+    entrada = _em_andamento.get(chave)
+    if entrada is None:
+        loop = asyncio.get_running_loop()
+        pool = obter_pool()
+        try:
+            futuro = loop.run_in_executor(pool, _rodar_medindo, func, *args)
+        except BrokenProcessPool:
+            _descartar_pool(pool)
+            raise
+        futuro.add_done_callback(_incorporar_metricas)  # uma vez por job, mesmo com vários interessados
+        entrada = _em_andamento[chave] = {"futuro": futuro, "interessados": 0, "pool": pool}
+
+        def _remover(_, entrada=entrada):
+            if _em_andamento.get(chave) is entrada:
+                del _em_andamento[chave]
+        futuro.add_done_callback(_remover)
+
+    entrada["interessados"] += 1
+    try:
+        # shield: cancelar uma espera não cancela o job compartilhado com outras sessões
+        ok, valor, _ = await asyncio.shield(entrada["futuro"])
+    except BrokenProcessPool:
+        _descartar_pool(entrada["pool"])
+        raise
+    finally:
+        entrada["interessados"] -= 1
+        if entrada["interessados"] == 0 and not entrada["futuro"].done():
+            entrada["futuro"].cancel()
+    if not ok:
+        raise valor
+    return valor